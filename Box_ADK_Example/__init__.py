@@ -1 +1,5 @@
-from . import agent
\ No newline at end of file
+# Load .env once, before any module reads its configuration.
+from dotenv import load_dotenv
+load_dotenv()
+
+from . import agent
@@ -1,12 +1,25 @@
 # File: agent.py
 
+import time
 import logging
-from typing import AsyncGenerator
+from typing import Any, AsyncGenerator, Optional
 from typing_extensions import override
 
 from google.adk.agents import LlmAgent, BaseAgent
 from google.adk.agents.invocation_context import InvocationContext
-from google.adk.events import Event
+from google.adk.events import Event, EventActions
+from google.genai import types
+
+from Box_ADK_Example.event_trace import trace_event
+from Box_ADK_Example.tools import box_client, box_speculation, box_stream, box_telemetry
+from Box_ADK_Example.tools.box_generic_search import search_entries
+from Box_ADK_Example.fast_router import (
+    FastPathRouter,
+    build_fast_router,
+    build_routing_cache,
+    normalize_decision,
+    normalize_query,
+)
 
 # Import sub-agents
 from Box_ADK_Example.sub_agents.Box_search_agent import Box_search_agent
@@ -16,6 +29,9 @@ from Box_ADK_Example.sub_agents.Box_hub_agent import Box_hub_agent
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Export spans when BOX_TRACE_EXPORTER is set (no-op by default)
+box_telemetry.configure_tracing()
+
 # Define the decision router agent
 decision_router = LlmAgent(
     model='gemini-2.0-flash',
@@ -53,6 +69,14 @@ decision_router = LlmAgent(
     output_key="routing_decision",  # Key for storing the routing decision in session state
 )
 
+def _query_text(ctx: InvocationContext) -> str:
+    """Returns the text of the user message that started this invocation."""
+    content = ctx.user_content
+    if not content or not content.parts:
+        return ""
+    return " ".join(part.text for part in content.parts if part.text)
+
+
 class BoxFlowAgent(BaseAgent):
     """
     Custom agent for Box content search workflow.
@@ -65,6 +89,8 @@ class BoxFlowAgent(BaseAgent):
     decision_router: LlmAgent
     box_search_agent: LlmAgent
     box_hub_agent: LlmAgent
+    fast_router: Optional[FastPathRouter] = None
+    routing_cache: Optional[Any] = None
     
     # Allow arbitrary types for Pydantic
     model_config = {"arbitrary_types_allowed": True}
@@ -75,6 +101,8 @@ class BoxFlowAgent(BaseAgent):
         decision_router: LlmAgent,
         box_search_agent: LlmAgent,
         box_hub_agent: LlmAgent,
+        fast_router: Optional[FastPathRouter] = None,
+        routing_cache: Optional[Any] = None,
     ):
         """
         Initializes the BoxFlowAgent.
@@ -84,6 +112,10 @@ class BoxFlowAgent(BaseAgent):
             decision_router: An LlmAgent to decide which path to take.
             box_search_agent: An LlmAgent for Box content search.
             box_hub_agent: An LlmAgent for Box hub interactions.
+            fast_router: Optional local pre-classifier that answers confident
+                routing cases without running the decision router.
+            routing_cache: Optional cache (see tools/box_cache.py) mapping
+                normalized query text to a previous routing decision.
         """
         # Define the sub_agents list for the framework
         sub_agents_list = [
@@ -98,12 +130,83 @@ class BoxFlowAgent(BaseAgent):
             decision_router=decision_router,
             box_search_agent=box_search_agent,
             box_hub_agent=box_hub_agent,
+            fast_router=fast_router,
+            routing_cache=routing_cache,
             sub_agents=sub_agents_list,
         )
     
+    def _route_locally(self, query: str):
+        """
+        Returns (routing_decision, source) from the routing cache or the fast
+        router, or (None, None) when the decision router has to run.
+        """
+        if self.routing_cache is not None and query:
+            cached = self.routing_cache.get(normalize_query(query))
+            if cached is not None:
+                return cached, "cache"
+        if self.fast_router is not None:
+            fast_route = self.fast_router.classify(query)
+            if fast_route is not None:
+                return fast_route.decision, fast_route.source
+        return None, None
+
+    async def _traced(self, source: str, agent_events) -> AsyncGenerator[Event, None]:
+        """Yields a sub-agent's events inside a span recording how many and how much text."""
+        with box_telemetry.tracer.start_as_current_span(f"{source}.run_async") as span:
+            events = text_chars = function_calls = 0
+            async for event in agent_events:
+                events += 1
+                if event.content and event.content.parts:
+                    for part in event.content.parts:
+                        text_chars += len(part.text or "")
+                        function_calls += part.function_call is not None
+                yield event
+            span.set_attribute("box.events", events)
+            span.set_attribute("box.text_chars", text_chars)
+            span.set_attribute("box.function_calls", function_calls)
+
+    async def _run_sub_agent(
+        self, agent: BaseAgent, ctx: InvocationContext, source: str
+    ) -> AsyncGenerator[Event, None]:
+        """
+        Runs a sub-agent and yields its events. With BOX_AI_STREAM=on, Box AI
+        answer text published by its tools is also yielded, as partial events,
+        while the tool call is still running.
+        """
+        if not box_stream.BOX_AI_STREAM:
+            async for event in self._traced(source, agent.run_async(ctx)):
+                trace_event(self.name, source, event)
+                yield event
+            return
+
+        queue = box_stream.open_channel(ctx.invocation_id)
+        try:
+            async for kind, item in box_stream.merge_agent_events(self._traced(source, agent.run_async(ctx)), queue):
+                if kind == box_stream.CHUNK:
+                    item = Event(
+                        author=self.name,
+                        invocation_id=ctx.invocation_id,
+                        branch=ctx.branch,
+                        partial=True,
+                        content=types.Content(role="model", parts=[types.Part(text=item)]),
+                    )
+                trace_event(self.name, source, item)
+                yield item
+        finally:
+            box_stream.close_channel(ctx.invocation_id)
+
     @override
     async def _run_async_impl(
         self, ctx: InvocationContext
+    ) -> AsyncGenerator[Event, None]:
+        """Runs the workflow inside a span, see tools/box_telemetry.py."""
+        with box_telemetry.tracer.start_as_current_span(f"{self.name}.run_async") as span:
+            span.set_attribute("box.invocation_id", ctx.invocation_id)
+            async for event in self._run_workflow(ctx, span):
+                yield event
+
+    async def _run_workflow(
+        self, ctx: InvocationContext, span
     ) -> AsyncGenerator[Event, None]:
         """
         Implements the custom orchestration logic for the Box search workflow.
@@ -111,15 +214,43 @@ class BoxFlowAgent(BaseAgent):
         """
         logger.info(f"[{self.name}] Starting Box content search workflow.")
         
-        # 1. Run Decision Router
-        logger.info(f"[{self.name}] Running DecisionRouter...")
-        async for event in self.decision_router.run_async(ctx):
-            logger.info(f"[{self.name}] Event from DecisionRouter: {event.model_dump_json(indent=2, exclude_none=True)}")
-            yield event
-        
-        # 2. Check the routing decision
-        routing_decision = ctx.session.state.get("routing_decision")
+        query = _query_text(ctx)
+        routing_decision, source = self._route_locally(query)
+
+        if routing_decision is not None:
+            # 1a. Cached or confident local decision: skip the DecisionRouter LLM call
+            logger.info(f"[{self.name}] Local routing decision: {routing_decision} (source: {source})")
+            yield Event(
+                author=self.name,
+                invocation_id=ctx.invocation_id,
+                branch=ctx.branch,
+                actions=EventActions(state_delta={"routing_decision": routing_decision}),
+            )
+        else:
+            # 1b. Run Decision Router
+            logger.info(f"[{self.name}] Running DecisionRouter...")
+            # Speculative mode: the search path's Box search runs while the router decides.
+            client = box_client.client_for_context(ctx.session)
+            box_speculation.start(ctx.invocation_id, query, lambda keywords: search_entries(keywords, client))
+            started = time.perf_counter()
+            try:
+                async for event in self._traced("DecisionRouter", self.decision_router.run_async(ctx)):
+                    trace_event(self.name, "DecisionRouter", event)
+                    yield event
+            except BaseException:
+                box_speculation.cancel(ctx.invocation_id)
+                raise
+
+            # 2. Check the routing decision
+            routing_decision = normalize_decision(ctx.session.state.get("routing_decision"))
+            if self.fast_router:
+                self.fast_router.record_llm_decision(query, routing_decision, time.perf_counter() - started)
+
+        if routing_decision and source != "cache" and self.routing_cache is not None and query:
+            self.routing_cache.set(normalize_query(query), routing_decision)
         logger.info(f"[{self.name}] Routing decision: {routing_decision}")
+        span.set_attribute("box.routing_decision", routing_decision or "")
+        span.set_attribute("box.routing_source", source or "llm")
         
         if not routing_decision:
             logger.error(f"[{self.name}] Failed to make routing decision. Defaulting to Box Search.")
@@ -127,15 +258,18 @@ class BoxFlowAgent(BaseAgent):
         
         # 3. Execute the appropriate agent based on the decision
         if routing_decision == "box_hub":
+            box_speculation.cancel(ctx.invocation_id)
             logger.info(f"[{self.name}] Running Box Hub Agent...")
-            async for event in self.box_hub_agent.run_async(ctx):
-                logger.info(f"[{self.name}] Event from BoxHubAgent: {event.model_dump_json(indent=2, exclude_none=True)}")
+            async for event in self._run_sub_agent(self.box_hub_agent, ctx, "BoxHubAgent"):
                 yield event
         else:  # Default to box_search
             logger.info(f"[{self.name}] Running Box Search Agent...")
-            async for event in self.box_search_agent.run_async(ctx):
-                logger.info(f"[{self.name}] Event from BoxSearchAgent: {event.model_dump_json(indent=2, exclude_none=True)}")
-                yield event
+            try:
+                async for event in self._run_sub_agent(self.box_search_agent, ctx, "BoxSearchAgent"):
+                    yield event
+            finally:
+                # Dropped if the search tool searched for different keywords, or not at all.
+                box_speculation.discard(ctx.invocation_id)
         
         logger.info(f"[{self.name}] Workflow finished.")
 
@@ -146,4 +280,6 @@ root_agent = BoxFlowAgent(
     decision_router=decision_router,
     box_search_agent=Box_search_agent,
     box_hub_agent=Box_hub_agent,
+    fast_router=build_fast_router(),
+    routing_cache=build_routing_cache(),
 )
\ No newline at end of file
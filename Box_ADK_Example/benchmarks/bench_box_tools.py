@@ -0,0 +1,163 @@
+"""Load test for the Box tools against the offline fake Box server.
+
+Drives box_generic_search, box_AI_ask and box_hub_ask at increasing
+concurrency and reports p50/p95/p99 latency and throughput per level. Use
+--max-p95-ms as a regression gate: the exit status is 1 when any level is
+slower than that.
+
+Usage:
+    python -m Box_ADK_Example.benchmarks.bench_box_tools [--concurrency 1,4,16,64] [--requests 200]
+    python -m Box_ADK_Example.benchmarks.bench_box_tools --mode sync --latency-ms 100 --error-rate 0.02
+    python -m Box_ADK_Example.benchmarks.bench_box_tools --base-url http://127.0.0.1:8765/2.0
+"""
+
+import sys
+import json
+import time
+import asyncio
+import argparse
+import logging
+import statistics
+from concurrent.futures import ThreadPoolExecutor
+
+from Box_ADK_Example.benchmarks.fake_box_server import FakeBoxServer, TOPICS
+from Box_ADK_Example.tools import box_client, box_resilience
+from Box_ADK_Example.tools.box_AI_ask import box_AI_ask, box_AI_ask_async
+from Box_ADK_Example.tools.box_generic_search import box_generic_search, box_generic_search_async
+from Box_ADK_Example.tools.box_hub_ask import box_hub_ask, box_hub_ask_async
+
+ITEMS = json.dumps([{"type": "file", "id": str(100000000 + i)} for i in range(3)])
+
+# name -> (sync tool, async tool, builds the arguments of call number i)
+TOOLS = {
+    "search": (box_generic_search, box_generic_search_async,
+               lambda i: (TOPICS[i % len(TOPICS)],)),
+    "ai_ask": (box_AI_ask, box_AI_ask_async,
+               lambda i: (f"Summarize the {TOPICS[i % len(TOPICS)]} terms ({i})", ITEMS)),
+    # Prompts are unique so every call misses the answer cache and reaches the server.
+    "hub_ask": (box_hub_ask, box_hub_ask_async,
+                lambda i: (f"What is our {TOPICS[i % len(TOPICS)]} policy? ({i})",)),
+}
+
+
+def is_error(result: str) -> bool:
+    return result.startswith(("API Error", "An unexpected error"))
+
+
+def summarize(latencies: list, errors: int, wall_seconds: float) -> dict:
+    if len(latencies) > 1:
+        cuts = statistics.quantiles(latencies, n=100, method="inclusive")
+        p50, p95, p99 = cuts[49], cuts[94], cuts[98]
+    else:
+        p50 = p95 = p99 = latencies[0] if latencies else 0.0
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "p50_ms": 1000 * p50,
+        "p95_ms": 1000 * p95,
+        "p99_ms": 1000 * p99,
+        "throughput_rps": len(latencies) / wall_seconds if wall_seconds else 0.0,
+    }
+
+
+async def run_async(tool, make_args, requests: int, concurrency: int, first: int = 0) -> dict:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, errors = [], 0
+
+    async def one(i):
+        nonlocal errors
+        async with semaphore:
+            start = time.perf_counter()
+            result = await tool(*make_args(first + i))
+            latencies.append(time.perf_counter() - start)
+            errors += is_error(result)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    return summarize(latencies, errors, time.perf_counter() - start)
+
+
+def run_sync(tool, make_args, requests: int, concurrency: int, first: int = 0) -> dict:
+    def one(i):
+        start = time.perf_counter()
+        result = tool(*make_args(first + i))
+        return time.perf_counter() - start, is_error(result)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(one, range(requests)))
+    return summarize([r[0] for r in results], sum(r[1] for r in results), time.perf_counter() - start)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tools", default="search,ai_ask,hub_ask", help=f"Comma separated, from {', '.join(TOOLS)}")
+    parser.add_argument("--concurrency", default="1,4,16,64", help="Comma separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=200, help="Calls per tool and concurrency level")
+    parser.add_argument("--mode", choices=["async", "sync"], default="async",
+                        help="async drives the *_async tools on one event loop, sync uses a thread pool")
+    parser.add_argument("--base-url", help="Use an already running server instead of starting one")
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--jitter-ms", type=float, default=20.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--corpus-size", type=int, default=5000)
+    parser.add_argument("--keep-rate-limit", action="store_true",
+                        help="Keep the client-side token bucket (BOX_RATE_LIMIT_PER_SEC) enabled")
+    parser.add_argument("--json", help="Also write the results to this file")
+    parser.add_argument("--max-p95-ms", type=float, help="Exit with status 1 if any p95 exceeds this")
+    return parser
+
+
+def main():
+    args = build_parser().parse_args()
+    # The tools log every call at INFO, which would dominate the measurement.
+    logging.getLogger().setLevel(logging.CRITICAL)
+    if not args.keep_rate_limit:
+        box_resilience.rate_limiter.rate = 0
+
+    server = None
+    if args.base_url:
+        box_client.BOX_API_BASE_URL = args.base_url.rstrip("/")
+    else:
+        server = FakeBoxServer(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, error_rate=args.error_rate,
+                               rate_limit_rate=args.rate_limit_rate, corpus_size=args.corpus_size).start()
+        box_client.BOX_API_BASE_URL = server.base_url
+
+    levels = [int(level) for level in args.concurrency.split(",")]
+    print(f"{args.mode} mode, {args.requests} calls per level against {box_client.BOX_API_BASE_URL}")
+    print(f"{'tool':<9} {'conc':>5} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'req/s':>9} {'errors':>7}")
+    results = []
+    try:
+        for name in args.tools.split(","):
+            sync_tool, async_tool, make_args = TOOLS[name]
+            for level, concurrency in enumerate(levels):
+                # Each level gets fresh call numbers so hub prompts never repeat.
+                first = level * args.requests
+                if args.mode == "async":
+                    row = asyncio.run(run_async(async_tool, make_args, args.requests, concurrency, first))
+                else:
+                    row = run_sync(sync_tool, make_args, args.requests, concurrency, first)
+                row.update(tool=name, concurrency=concurrency, mode=args.mode)
+                results.append(row)
+                print(f"{name:<9} {concurrency:>5} {row['p50_ms']:>9.1f} {row['p95_ms']:>9.1f} "
+                      f"{row['p99_ms']:>9.1f} {row['throughput_rps']:>9.1f} {row['errors']:>7}")
+    finally:
+        if server is not None:
+            server.stop()
+
+    print(f"Box client: {box_resilience.get_resilience_stats()}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.max_p95_ms is not None:
+        slow = [row for row in results if row["p95_ms"] > args.max_p95_ms]
+        for row in slow:
+            print(f"FAIL: {row['tool']} at concurrency {row['concurrency']} p95 {row['p95_ms']:.1f} ms "
+                  f"> {args.max_p95_ms} ms")
+        if slow:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Per-event overhead of BoxFlowAgent event logging, before and after event_trace.
+
+Usage:
+    python -m Box_ADK_Example.benchmarks.bench_event_trace [--events N] [--text-chars N]
+"""
+
+import io
+import argparse
+import logging
+import timeit
+
+from google.adk.events import Event
+from google.genai import types
+
+from Box_ADK_Example.event_trace import EventTracer
+
+
+def make_event(text_chars: int) -> Event:
+    return Event(
+        author="box_Search_Agent",
+        invocation_id="e-bench",
+        content=types.Content(role="model", parts=[types.Part(text="x" * text_chars)]),
+    )
+
+
+def make_logger(name: str, level: int) -> logging.Logger:
+    # Handler writes to memory so the numbers measure formatting, not the terminal.
+    bench_logger = logging.getLogger(f"bench.{name}")
+    bench_logger.handlers = [logging.StreamHandler(io.StringIO())]
+    bench_logger.propagate = False
+    bench_logger.setLevel(level)
+    return bench_logger
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=2000)
+    parser.add_argument("--text-chars", type=int, default=4000)
+    args = parser.parse_args()
+
+    event = make_event(args.text_chars)
+    before_logger = make_logger("before", logging.INFO)
+
+    def before():
+        # The original BoxFlowAgent hot loop.
+        before_logger.info(f"[BoxFlowAgent] Event from BoxSearchAgent: {event.model_dump_json(indent=2, exclude_none=True)}")
+
+    cases = [
+        ("before: f-string model_dump_json(indent=2) at INFO", before),
+        ("after: mode=off", EventTracer("off", 1.0, 2000, make_logger("off", logging.DEBUG)).trace),
+        ("after: mode=summary, DEBUG disabled (default)", EventTracer("summary", 1.0, 2000, make_logger("quiet", logging.INFO)).trace),
+        ("after: mode=summary, DEBUG enabled", EventTracer("summary", 1.0, 2000, make_logger("summary", logging.DEBUG)).trace),
+        ("after: mode=full, DEBUG enabled, 2000 char cap", EventTracer("full", 1.0, 2000, make_logger("full", logging.DEBUG)).trace),
+        ("after: mode=full, DEBUG enabled, 10% sampled", EventTracer("full", 0.1, 2000, make_logger("sampled", logging.DEBUG)).trace),
+    ]
+
+    print(f"{args.events} events, {args.text_chars} text chars each")
+    for label, fn in cases:
+        if fn is before:
+            seconds = timeit.timeit(fn, number=args.events)
+        else:
+            seconds = timeit.timeit(lambda: fn("BoxFlowAgent", "BoxSearchAgent", event), number=args.events)
+        print(f"{label:<52} {1e6 * seconds / args.events:10.2f} us/event")
+
+
+if __name__ == "__main__":
+    main()
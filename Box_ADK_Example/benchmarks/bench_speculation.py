@@ -0,0 +1,89 @@
+"""Latency saved vs. Box API calls spent by BoxFlowAgent's speculative search.
+
+Replays requests against the fake Box server with the DecisionRouter LLM
+replaced by a fixed delay. Without speculation the search runs after the
+routing decision; with it, the search starts with the router and is reused
+on the search path or cancelled on the hub path.
+
+Usage:
+    python -m Box_ADK_Example.benchmarks.bench_speculation [--requests 40] [--router-ms 400] [--search-share 0.5]
+"""
+
+import time
+import random
+import asyncio
+import argparse
+import logging
+import statistics
+from types import SimpleNamespace
+
+from Box_ADK_Example.benchmarks.fake_box_server import FakeBoxServer, TOPICS
+from Box_ADK_Example.tools import box_client, box_resilience, box_speculation
+from Box_ADK_Example.tools.box_generic_search import box_generic_search_async, search_entries
+
+
+async def handle(i: int, use_search: bool, router_seconds: float, speculate: bool) -> float:
+    """Routes one request and runs the search tool on the search path. Returns seconds to the search result."""
+    first, second = TOPICS[i % len(TOPICS)], TOPICS[(i * 7 + 3) % len(TOPICS)]
+    query = f"Find documents that mention {first} {second}"
+    # The search agent is told to send keywords joined with %20.
+    tool_prompt = f"{first}%20{second}"
+    tool_context = SimpleNamespace(invocation_id=f"e-{speculate}-{i}", state={})
+    client = box_client.client_for_context(tool_context)
+
+    start = time.perf_counter()
+    if speculate:
+        box_speculation.start(tool_context.invocation_id, query, lambda keywords: search_entries(keywords, client))
+    await asyncio.sleep(router_seconds)
+    if not use_search:
+        box_speculation.cancel(tool_context.invocation_id)
+        return None
+    try:
+        await box_generic_search_async(tool_prompt, tool_context)
+    finally:
+        box_speculation.discard(tool_context.invocation_id)
+    return time.perf_counter() - start
+
+
+async def run(server: FakeBoxServer, routes: list, router_seconds: float, speculate: bool):
+    box_speculation.BOX_SPECULATIVE_SEARCH = speculate
+    searches_before = server.counts["search"]
+    latencies = [
+        await handle(i, use_search, router_seconds, speculate) for i, use_search in enumerate(routes)
+    ]
+    # Let cancelled requests finish on the server before counting them.
+    await asyncio.sleep(0.2)
+    return [latency for latency in latencies if latency is not None], server.counts["search"] - searches_before
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=40)
+    parser.add_argument("--router-ms", type=float, default=400.0, help="Simulated DecisionRouter LLM latency")
+    parser.add_argument("--search-share", type=float, default=0.5, help="Fraction of requests routed to search")
+    parser.add_argument("--latency-ms", type=float, default=150.0, help="Fake Box server latency")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    logging.getLogger().setLevel(logging.CRITICAL)
+    box_resilience.rate_limiter.rate = 0
+
+    rng = random.Random(args.seed)
+    routes = [rng.random() < args.search_share for _ in range(args.requests)]
+    with FakeBoxServer(latency_ms=args.latency_ms, jitter_ms=0) as server:
+        box_client.BOX_API_BASE_URL = server.base_url
+        baseline, baseline_calls = asyncio.run(run(server, routes, args.router_ms / 1000, False))
+        speculative, speculative_calls = asyncio.run(run(server, routes, args.router_ms / 1000, True))
+
+    stats = box_speculation.get_speculation_stats()
+    searches = sum(routes)
+    print(f"{args.requests} requests, {searches} routed to search, router {args.router_ms:.0f} ms, Box {args.latency_ms:.0f} ms")
+    print(f"{'sequential: search result':<34} {1000 * statistics.median(baseline):8.1f} ms (median)")
+    print(f"{'speculative: search result':<34} {1000 * statistics.median(speculative):8.1f} ms (median)")
+    print(f"{'latency saved per search request':<34} {1000 * stats['saved_seconds'] / max(stats['used'], 1):8.1f} ms")
+    print(f"{'latency saved per request':<34} {1000 * stats['saved_seconds'] / args.requests:8.1f} ms")
+    print(f"{'Box search calls':<34} {baseline_calls:8d} sequential, {speculative_calls} speculative "
+          f"(+{speculative_calls - baseline_calls}, {stats['cancelled']} cancelled, {stats['unused']} unused)")
+
+
+if __name__ == "__main__":
+    main()
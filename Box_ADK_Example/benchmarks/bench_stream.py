@@ -0,0 +1,60 @@
+"""Time to first answer text for streamed vs. buffered Box Hub answers.
+
+Runs against the fake Box server, which generates answers chunk by chunk.
+
+Usage:
+    python -m Box_ADK_Example.benchmarks.bench_stream [--calls 20] [--chunk-ms 50] [--answer-chars 800]
+"""
+
+import time
+import asyncio
+import argparse
+import logging
+import statistics
+
+from Box_ADK_Example.benchmarks.fake_box_server import FakeBoxServer
+from Box_ADK_Example.tools import box_client, box_resilience
+
+
+async def measure(client: box_client.BoxClient, calls: int):
+    buffered, first, streamed = [], [], []
+    for i in range(calls):
+        start = time.perf_counter()
+        # Prompts are unique, so the answer cache never serves them.
+        await client.aask_hub(f"buffered question {i}")
+        buffered.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        first_at = None
+        async for piece in client.astream_hub(f"streamed question {i}"):
+            if first_at is None and piece.get("answer"):
+                first_at = time.perf_counter() - start
+        first.append(first_at)
+        streamed.append(time.perf_counter() - start)
+    return buffered, first, streamed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=20)
+    parser.add_argument("--latency-ms", type=float, default=100.0)
+    parser.add_argument("--chunk-ms", type=float, default=50.0)
+    parser.add_argument("--chunk-chars", type=int, default=40)
+    parser.add_argument("--answer-chars", type=int, default=800)
+    args = parser.parse_args()
+    logging.getLogger().setLevel(logging.CRITICAL)
+    box_resilience.rate_limiter.rate = 0
+
+    with FakeBoxServer(latency_ms=args.latency_ms, jitter_ms=0, answer_chars=args.answer_chars,
+                       chunk_chars=args.chunk_chars, chunk_ms=args.chunk_ms) as server:
+        box_client.BOX_API_BASE_URL = server.base_url
+        buffered, first, streamed = asyncio.run(measure(box_client.BoxClient(), args.calls))
+
+    print(f"{args.calls} calls, {args.answer_chars} char answers in {args.chunk_chars} char chunks every {args.chunk_ms} ms")
+    print(f"{'buffered: full answer':<32} {1000 * statistics.median(buffered):8.1f} ms (median)")
+    print(f"{'streamed: first answer text':<32} {1000 * statistics.median(first):8.1f} ms (median)")
+    print(f"{'streamed: full answer':<32} {1000 * statistics.median(streamed):8.1f} ms (median)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,379 @@
+"""Offline stand-in for the Box API endpoints the tools call.
+
+Implements GET /2.0/search, GET /2.0/folders/{id}/items, GET /2.0/events and
+POST /2.0/ai/ask over a generated corpus (a flat root folder, to which tests
+can add subfolders), with configurable latency, error rate and rate limiting,
+so the tools and BoxFlowAgent can be load-tested without touching real Box. AI answers are
+"generated" in chunks: a request that accepts text/event-stream receives
+them as server-sent events as they are produced, any other request waits for
+the whole answer.
+
+Usage:
+    python -m Box_ADK_Example.benchmarks.fake_box_server [--port 8765] [--latency-ms 50] ...
+    BOX_API_BASE_URL=http://127.0.0.1:8765/2.0 adk web
+"""
+
+import re
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+TOPICS = [
+    "pricing", "roadmap", "security", "onboarding", "contract", "launch",
+    "marketing", "sales", "compliance", "invoice", "architecture", "support",
+]
+EXTENSIONS = ["pdf", "docx", "pptx", "xlsx", "boxnote"]
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    # The default backlog of 5 drops connections under load, which shows up as
+    # one second SYN retransmits in the client latencies.
+    request_queue_size = 1024
+
+    def handle_error(self, request, client_address):
+        # Clients that cancel a request (e.g. a dropped speculative search) close the connection.
+        if isinstance(sys.exc_info()[1], ConnectionError):
+            return
+        super().handle_error(request, client_address)
+
+
+def build_corpus(size: int, seed: int = 0) -> list:
+    """Returns size deterministic file entries named after two topics each."""
+    rng = random.Random(seed)
+    corpus = []
+    for i in range(size):
+        first, second = rng.sample(TOPICS, 2)
+        corpus.append({
+            "type": "file",
+            "id": str(100000000 + i),
+            "name": f"{first.title()} {second} notes {i}.{rng.choice(EXTENSIONS)}",
+            "size": rng.randint(10_000, 5_000_000),
+            "modified_at": f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}T12:00:00-07:00",
+            "path_collection": {"total_count": 1, "entries": [{"type": "folder", "id": "0", "name": "All Files"}]},
+        })
+    return corpus
+
+
+def _parent_id(entry: dict) -> str:
+    return entry["path_collection"]["entries"][-1]["id"]
+
+
+class FakeBoxServer:
+    """
+    Threaded HTTP server emulating the Box search and AI ask endpoints.
+
+    Args:
+      port: Port to listen on, 0 for a free one.
+      latency_ms: Base latency added to every response.
+      jitter_ms: Extra random latency, uniformly distributed up to this value.
+      error_rate: Fraction of requests answered with 500.
+      rate_limit_rate: Fraction of requests answered with 429 and Retry-After.
+      corpus_size: Number of files in the generated corpus.
+      answer_chars: Length of generated AI answers.
+      chunk_chars: Answer characters generated per chunk.
+      chunk_ms: Time to generate one chunk.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency_ms: float = 50.0,
+                 jitter_ms: float = 20.0, error_rate: float = 0.0, rate_limit_rate: float = 0.0,
+                 corpus_size: int = 5000, answer_chars: int = 800, chunk_chars: int = 40,
+                 chunk_ms: float = 0.0, seed: int = 0):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.answer_chars = answer_chars
+        self.chunk_chars = chunk_chars
+        self.chunk_ms = chunk_ms
+        self.corpus = build_corpus(corpus_size, seed)
+        self._next_id = 100000000 + len(self.corpus)
+        self.events = []
+        self.counts = {"search": 0, "ai_ask": 0, "folder_items": 0, "events": 0, "errors": 0, "rate_limited": 0}
+        self._lock = threading.Lock()
+        self._rng = random.Random(seed)
+        self._thread = None
+        self.httpd = _Server((host, port), self._handler_class())
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/2.0"
+
+    def start(self) -> "FakeBoxServer":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def search(self, query: str, offset: int, limit: int, fields) -> dict:
+        terms = [term for term in query.lower().split() if term]
+        matches = [entry for entry in self.corpus
+                   if any(term in entry["name"].lower() for term in terms)]
+        page = self._project(matches[offset:offset + limit], fields)
+        return {"total_count": len(matches), "offset": offset, "limit": limit, "entries": page}
+
+    def _project(self, entries: list, fields) -> list:
+        if not fields:
+            return entries
+        keep = set(fields.split(","))
+        return [{key: value for key, value in entry.items() if key in keep} for entry in entries]
+
+    def folder_items(self, folder_id: str, offset: int, limit: int, fields) -> dict:
+        entries = [entry for entry in self.corpus if _parent_id(entry) == folder_id]
+        return {"total_count": len(entries), "offset": offset, "limit": limit,
+                "entries": self._project(entries[offset:offset + limit], fields)}
+
+    def get_events(self, stream_position: str, limit: int) -> dict:
+        with self._lock:
+            if stream_position == "now":
+                return {"chunk_size": 0, "next_stream_position": len(self.events), "entries": []}
+            start = int(stream_position)
+            entries = self.events[start:start + limit]
+        return {"chunk_size": len(entries), "next_stream_position": start + len(entries), "entries": entries}
+
+    def _record(self, event_type: str, entry: dict) -> None:
+        with self._lock:
+            self.events.append({"type": "event", "event_type": event_type, "source": dict(entry)})
+
+    def _entry(self, item_id: str) -> dict:
+        return next(entry for entry in self.corpus if entry["id"] == item_id)
+
+    def _path_collection(self, parent_id: str) -> dict:
+        if parent_id == "0":
+            entries = [{"type": "folder", "id": "0", "name": "All Files"}]
+        else:
+            parent = self._entry(parent_id)
+            entries = parent["path_collection"]["entries"] + [
+                {"type": "folder", "id": parent["id"], "name": parent["name"]}]
+        return {"total_count": len(entries), "entries": entries}
+
+    def _descendants(self, folder_id: str) -> list:
+        children = [entry for entry in self.corpus if _parent_id(entry) == folder_id]
+        return children + [entry for child in children if child["type"] == "folder"
+                           for entry in self._descendants(child["id"])]
+
+    def _update_paths(self, folder_id: str) -> None:
+        """Rewrites the path_collection of everything under a renamed or moved folder; Box sends no events for them."""
+        for child in [entry for entry in self.corpus if _parent_id(entry) == folder_id]:
+            child["path_collection"] = self._path_collection(folder_id)
+            if child["type"] == "folder":
+                self._update_paths(child["id"])
+
+    def add_file(self, name: str, parent_id: str = "0") -> dict:
+        """Adds a file to the corpus and records an ITEM_UPLOAD event."""
+        entry = dict(self.corpus[0], id=str(self._next_id), name=name,
+                     path_collection=self._path_collection(parent_id))
+        self._next_id += 1
+        self.corpus.append(entry)
+        self._record("ITEM_UPLOAD", entry)
+        return entry
+
+    def add_folder(self, name: str, parent_id: str = "0") -> dict:
+        """Adds an empty folder and records an ITEM_CREATE event."""
+        entry = {"type": "folder", "id": str(self._next_id), "name": name,
+                 "modified_at": "2024-01-01T12:00:00-07:00", "path_collection": self._path_collection(parent_id)}
+        self._next_id += 1
+        self.corpus.append(entry)
+        self._record("ITEM_CREATE", entry)
+        return entry
+
+    def rename_file(self, file_id: str, name: str) -> None:
+        self.rename_item(file_id, name)
+
+    def rename_item(self, item_id: str, name: str) -> None:
+        entry = self._entry(item_id)
+        entry["name"] = name
+        if entry["type"] == "folder":
+            self._update_paths(item_id)
+        self._record("ITEM_RENAME", entry)
+
+    def move_item(self, item_id: str, parent_id: str) -> None:
+        entry = self._entry(item_id)
+        entry["path_collection"] = self._path_collection(parent_id)
+        if entry["type"] == "folder":
+            self._update_paths(item_id)
+        self._record("ITEM_MOVE", entry)
+
+    def trash_file(self, file_id: str) -> None:
+        self.trash_item(file_id)
+
+    def trash_item(self, item_id: str) -> None:
+        """Trashes an item, and a folder's contents with it; only the item itself gets an event."""
+        entry = self._entry(item_id)
+        for removed in [entry] + (self._descendants(item_id) if entry["type"] == "folder" else []):
+            self.corpus.remove(removed)
+        self._record("ITEM_TRASH", entry)
+
+    def ask(self, payload: dict) -> dict:
+        items = payload.get("items") or []
+        prompt = payload.get("prompt", "")
+        sentence = f"Based on {len(items)} item(s), the answer to '{prompt}' is documented in the content. "
+        answer = (sentence * (self.answer_chars // len(sentence) + 1))[:self.answer_chars]
+        response = {"answer": answer, "created_at": "2024-01-01T00:00:00Z", "completion_reason": "done"}
+        if payload.get("includes_citations"):
+            response["citations"] = [
+                {"type": "file", "id": str(item.get("id")), "name": f"File {item.get('id')}", "content": answer[:80]}
+                for item in items[:5]
+            ]
+        return response
+
+    def _delay_and_fault(self):
+        """Sleeps for the configured latency and returns a fault status, or None."""
+        with self._lock:
+            delay = self.latency_ms + self._rng.uniform(0, self.jitter_ms)
+            roll = self._rng.random()
+        time.sleep(delay / 1000)
+        if roll < self.rate_limit_rate:
+            return 429
+        if roll < self.rate_limit_rate + self.error_rate:
+            return 500
+        return None
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send_json(self, status: int, body: dict, headers: dict = None):
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _fault(self) -> bool:
+                status = server._delay_and_fault()
+                if status is None:
+                    return False
+                with server._lock:
+                    server.counts["rate_limited" if status == 429 else "errors"] += 1
+                if status == 429:
+                    self._send_json(429, {"type": "error", "code": "rate_limit_exceeded"}, {"Retry-After": "1"})
+                else:
+                    self._send_json(500, {"type": "error", "code": "internal_server_error"})
+                return True
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                params = parse_qs(url.query)
+                param = lambda name, default: params.get(name, [default])[0]
+                folder = re.fullmatch(r"/2\.0/folders/(\w+)/items", url.path)
+                if url.path == "/2.0/search":
+                    endpoint = "search"
+                elif folder:
+                    endpoint = "folder_items"
+                elif url.path == "/2.0/events":
+                    endpoint = "events"
+                else:
+                    self._send_json(404, {"type": "error", "code": "not_found"})
+                    return
+                if self._fault():
+                    return
+                with server._lock:
+                    server.counts[endpoint] += 1
+                if endpoint == "search":
+                    body = server.search(param("query", ""), int(param("offset", "0")),
+                                         min(int(param("limit", "30")), 200), param("fields", None))
+                elif endpoint == "folder_items":
+                    body = server.folder_items(folder.group(1), int(param("offset", "0")),
+                                               min(int(param("limit", "100")), 1000), param("fields", None))
+                else:
+                    body = server.get_events(param("stream_position", "now"), int(param("limit", "100")))
+                self._send_json(200, body)
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                body = self.rfile.read(length)
+                if urlparse(self.path).path != "/2.0/ai/ask":
+                    self._send_json(404, {"type": "error", "code": "not_found"})
+                    return
+                if self._fault():
+                    return
+                try:
+                    payload = json.loads(body or b"{}")
+                except json.JSONDecodeError:
+                    self._send_json(400, {"type": "error", "code": "bad_request"})
+                    return
+                with server._lock:
+                    server.counts["ai_ask"] += 1
+                response = server.ask(payload)
+                answer = response["answer"]
+                chunks = [answer[i:i + server.chunk_chars] for i in range(0, len(answer), server.chunk_chars)]
+                if "text/event-stream" not in self.headers.get("Accept", ""):
+                    time.sleep(len(chunks) * server.chunk_ms / 1000)
+                    self._send_json(200, response)
+                    return
+                self._send_stream(chunks, {key: value for key, value in response.items() if key != "answer"})
+
+            def _send_stream(self, chunks: list, final: dict):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                for chunk in chunks:
+                    time.sleep(server.chunk_ms / 1000)
+                    self._write_chunk(f"data: {json.dumps({'answer': chunk})}\n\n")
+                self._write_chunk(f"data: {json.dumps({'answer': '', **final})}\n\n")
+                self._write_chunk("data: [DONE]\n\n")
+                self.wfile.write(b"0\r\n\r\n")
+
+            def _write_chunk(self, text: str):
+                data = text.encode()
+                self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+                self.wfile.flush()
+
+        return Handler
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--jitter-ms", type=float, default=20.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 500")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Fraction of requests answered with 429")
+    parser.add_argument("--corpus-size", type=int, default=5000)
+    parser.add_argument("--answer-chars", type=int, default=800)
+    parser.add_argument("--chunk-chars", type=int, default=40, help="Answer characters per generated chunk")
+    parser.add_argument("--chunk-ms", type=float, default=0.0, help="Generation time per chunk")
+    return parser
+
+
+def main():
+    args = build_parser().parse_args()
+    server = FakeBoxServer(args.host, args.port, args.latency_ms, args.jitter_ms, args.error_rate,
+                           args.rate_limit_rate, args.corpus_size, args.answer_chars, args.chunk_chars, args.chunk_ms)
+    print(f"Fake Box API listening on {server.base_url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
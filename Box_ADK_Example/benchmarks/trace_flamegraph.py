@@ -0,0 +1,56 @@
+"""Folded stacks for a flame graph from a BOX_TRACE_EXPORTER=jsonl span file.
+
+Each line is "root;child;leaf <self time in microseconds>", the input format
+of flamegraph.pl, speedscope and inferno.
+
+Usage:
+    python -m Box_ADK_Example.benchmarks.trace_flamegraph [box_traces.jsonl] > box.folded
+    flamegraph.pl box.folded > box.svg
+"""
+
+import sys
+import json
+import argparse
+from collections import defaultdict
+
+from Box_ADK_Example.tools import box_telemetry
+
+
+def folded_stacks(path: str) -> dict:
+    """
+    Reads a JSONL span file and returns {"root;child;leaf": self time in
+    microseconds}, the folded-stack input of flamegraph.pl and speedscope.
+    """
+    spans = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                spans[record["span_id"]] = record
+    child_time = defaultdict(float)
+    for record in spans.values():
+        if record["parent_span_id"] in spans:
+            child_time[record["parent_span_id"]] += record["duration_ms"]
+
+    stacks = defaultdict(int)
+    for span_id, record in spans.items():
+        names, parent = [], record
+        while parent is not None:
+            names.append(parent["name"].replace(";", ","))
+            parent = spans.get(parent["parent_span_id"])
+        self_ms = max(record["duration_ms"] - child_time[span_id], 0.0)
+        stacks[";".join(reversed(names))] += int(self_ms * 1000)
+    return stacks
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert a JSONL span file to folded stacks for a flame graph.")
+    parser.add_argument("path", nargs="?", default=box_telemetry.BOX_TRACE_PATH)
+    args = parser.parse_args()
+    for stack, micros in sorted(folded_stacks(args.path).items()):
+        if micros:
+            sys.stdout.write(f"{stack} {micros}\n")
+
+
+if __name__ == "__main__":
+    main()
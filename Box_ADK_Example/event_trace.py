@@ -0,0 +1,87 @@
+# File: event_trace.py
+
+import os
+import random
+import logging
+
+logger = logging.getLogger("Box_ADK_Example.events")
+
+# "off" skips tracing entirely, "summary" logs one short line per event and
+# "full" logs the event JSON. Traces are written at DEBUG level, so nothing is
+# serialized unless the "Box_ADK_Example.events" logger has DEBUG enabled.
+BOX_EVENT_TRACE = os.getenv("BOX_EVENT_TRACE", "summary").lower()
+# Fraction of events to trace, between 0 and 1.
+BOX_EVENT_TRACE_SAMPLE = float(os.getenv("BOX_EVENT_TRACE_SAMPLE", "1.0"))
+# Longest payload written per event; longer payloads are truncated.
+BOX_EVENT_TRACE_MAX_CHARS = int(os.getenv("BOX_EVENT_TRACE_MAX_CHARS", "2000"))
+
+
+def _truncate(text: str, max_chars: int) -> str:
+    if len(text) <= max_chars:
+        return text
+    return f"{text[:max_chars]}... [{len(text) - max_chars} more chars]"
+
+
+def summarize_event(event) -> dict:
+    """Returns a small structured summary of an ADK event without serializing it."""
+    summary = {"id": event.id, "author": event.author}
+    if event.partial:
+        summary["partial"] = True
+    content = event.content
+    if content and content.parts:
+        text_chars = 0
+        calls, responses = [], []
+        for part in content.parts:
+            if part.text:
+                text_chars += len(part.text)
+            if part.function_call:
+                calls.append(part.function_call.name)
+            if part.function_response:
+                responses.append(part.function_response.name)
+        if text_chars:
+            summary["text_chars"] = text_chars
+        if calls:
+            summary["function_calls"] = calls
+        if responses:
+            summary["function_responses"] = responses
+    if event.actions and event.actions.state_delta:
+        summary["state_delta"] = sorted(event.actions.state_delta)
+    if event.error_code:
+        summary["error_code"] = event.error_code
+    return summary
+
+
+class EventTracer:
+    """
+    Structured, lazily evaluated tracing of the events BoxFlowAgent yields.
+
+    trace() returns before doing any work when tracing is off, when DEBUG is not
+    enabled for the events logger, or when the event is not sampled.
+    """
+
+    def __init__(self, mode: str = BOX_EVENT_TRACE, sample_rate: float = BOX_EVENT_TRACE_SAMPLE,
+                 max_chars: int = BOX_EVENT_TRACE_MAX_CHARS, trace_logger: logging.Logger = logger):
+        self.enabled = mode != "off"
+        self.full = mode == "full"
+        self.sample_rate = sample_rate
+        self.max_chars = max_chars
+        self.logger = trace_logger
+
+    def trace(self, agent_name: str, source: str, event) -> None:
+        if not self.enabled or not self.logger.isEnabledFor(logging.DEBUG):
+            return
+        if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            return
+        if self.full:
+            payload = _truncate(event.model_dump_json(exclude_none=True), self.max_chars)
+        else:
+            payload = _truncate(str(summarize_event(event)), self.max_chars)
+        self.logger.debug("[%s] Event from %s: %s", agent_name, source, payload)
+
+
+event_tracer = EventTracer()
+
+
+def trace_event(agent_name: str, source: str, event) -> None:
+    """Traces an event with the process-wide tracer configured by the environment."""
+    event_tracer.trace(agent_name, source, event)
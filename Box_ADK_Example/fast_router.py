@@ -0,0 +1,221 @@
+# File: fast_router.py
+
+import os
+import re
+import json
+import time
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Optional
+
+from Box_ADK_Example.tools.box_cache import LRUTTLCache, SQLiteCache
+
+logger = logging.getLogger(__name__)
+
+BOX_HUB = "box_hub"
+BOX_SEARCH = "box_search"
+ROUTES = (BOX_HUB, BOX_SEARCH)
+
+# Set BOX_FAST_ROUTER=off to always ask the DecisionRouter LLM.
+BOX_FAST_ROUTER = os.getenv("BOX_FAST_ROUTER", "on").lower()
+# JSONL file of {"query": ..., "decision": ...} lines. LLM decisions are
+# appended to it, and it is used to train the optional TF-IDF model.
+BOX_ROUTER_LOG_PATH = os.getenv("BOX_ROUTER_LOG_PATH", "")
+# Minimum class probability for the TF-IDF model to answer without the LLM.
+BOX_ROUTER_MODEL_THRESHOLD = float(os.getenv("BOX_ROUTER_MODEL_THRESHOLD", "0.85"))
+# Minimum number of logged decisions before the TF-IDF model is trained.
+BOX_ROUTER_MIN_TRAINING = int(os.getenv("BOX_ROUTER_MIN_TRAINING", "50"))
+
+# Routing decision cache: "memory" (default), "sqlite" (shared by workers on
+# one host) or "off".
+BOX_ROUTING_CACHE = os.getenv("BOX_ROUTING_CACHE", "memory").lower()
+BOX_ROUTING_CACHE_TTL = float(os.getenv("BOX_ROUTING_CACHE_TTL", "86400"))
+BOX_ROUTING_CACHE_MAX_ENTRIES = int(os.getenv("BOX_ROUTING_CACHE_MAX_ENTRIES", "10000"))
+BOX_ROUTING_CACHE_PATH = os.getenv("BOX_ROUTING_CACHE_PATH", "box_routing_cache.sqlite3")
+
+# Phrases that mirror the DecisionRouter instructions: products, GTM content
+# and hubs go to the hub agent; file retrieval and cross-content searches go
+# to the search agent.
+HUB_PATTERNS = [
+    r"\bproducts?\b", r"\bfeatures?\b", r"\bspecs?\b", r"\bspecifications?\b",
+    r"\breleases?\b", r"\blaunch(es|ed)?\b", r"\broadmaps?\b",
+    r"\bgtm\b", r"\bgo[- ]to[- ]market\b", r"\bmarketing\b", r"\bsales (materials?|enablement|collateral)\b",
+    r"\bpitch( decks?)?\b", r"\bdecks?\b", r"\bpresentations?\b", r"\bbattle ?cards?\b",
+    r"\bhubs?\b", r"\brelay\b",
+]
+SEARCH_PATTERNS = [
+    r"\bfiles?\b", r"\bdocuments?\b", r"\bdocs\b", r"\bfolders?\b",
+    r"\bmention(s|ed|ing)?\b", r"\bsearch\b", r"\bfind all\b", r"\bwhich (files|documents)\b",
+    r"\b(pdf|docx?|xlsx?|pptx?|csv)\b", r"\bspreadsheets?\b", r"\bcontracts?\b",
+    r"\bfile ?id\b", r"\b\d{6,}\b",
+]
+_PUNCTUATION_RE = re.compile(r"[^\w\s]+")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+_HUB_RE = [re.compile(p, re.IGNORECASE) for p in HUB_PATTERNS]
+_SEARCH_RE = [re.compile(p, re.IGNORECASE) for p in SEARCH_PATTERNS]
+
+
+@dataclass
+class RouteResult:
+    decision: str
+    source: str  # "keyword" or "model"
+    confidence: float
+
+
+def normalize_decision(text: Optional[str]) -> Optional[str]:
+    """Maps raw DecisionRouter output (quotes, whitespace, casing) onto a route."""
+    if not text:
+        return None
+    cleaned = text.strip().strip("\"'`.").strip().lower()
+    return cleaned if cleaned in ROUTES else None
+
+
+def normalize_query(query: str) -> str:
+    """Lower-cases a query and strips punctuation and repeated whitespace so near-duplicates share a key."""
+    return _WHITESPACE_RE.sub(" ", _PUNCTUATION_RE.sub(" ", query.lower())).strip()
+
+
+class KeywordRouter:
+    """Rule based classifier. Only answers when one side matches and the other does not."""
+
+    def classify(self, query: str) -> Optional[RouteResult]:
+        hub_hits = sum(1 for pattern in _HUB_RE if pattern.search(query))
+        search_hits = sum(1 for pattern in _SEARCH_RE if pattern.search(query))
+        if hub_hits and not search_hits:
+            return RouteResult(BOX_HUB, "keyword", 1.0)
+        if search_hits and not hub_hits:
+            return RouteResult(BOX_SEARCH, "keyword", 1.0)
+        return None
+
+
+class TfidfRouter:
+    """
+    Optional TF-IDF + logistic regression classifier trained on logged decisions.
+
+    Requires scikit-learn; use TfidfRouter.from_log() which returns None when
+    scikit-learn is missing or there is not enough data.
+    """
+
+    def __init__(self, pipeline, threshold: float):
+        self.pipeline = pipeline
+        self.threshold = threshold
+
+    @classmethod
+    def from_log(cls, path: str, threshold: float = BOX_ROUTER_MODEL_THRESHOLD,
+                 min_examples: int = BOX_ROUTER_MIN_TRAINING):
+        try:
+            from sklearn.feature_extraction.text import TfidfVectorizer
+            from sklearn.linear_model import LogisticRegression
+            from sklearn.pipeline import make_pipeline
+        except ImportError:
+            logger.info("scikit-learn is not installed; TF-IDF routing is disabled.")
+            return None
+        queries, decisions = [], []
+        with open(path) as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                decision = normalize_decision(record.get("decision"))
+                if record.get("query") and decision:
+                    queries.append(record["query"])
+                    decisions.append(decision)
+        if len(queries) < min_examples or len(set(decisions)) < 2:
+            logger.info(f"Not enough logged routing decisions to train ({len(queries)} found).")
+            return None
+        pipeline = make_pipeline(
+            TfidfVectorizer(ngram_range=(1, 2), sublinear_tf=True),
+            LogisticRegression(max_iter=1000),
+        )
+        pipeline.fit(queries, decisions)
+        logger.info(f"Trained TF-IDF router on {len(queries)} logged decisions.")
+        return cls(pipeline, threshold)
+
+    def classify(self, query: str) -> Optional[RouteResult]:
+        probabilities = self.pipeline.predict_proba([query])[0]
+        best = probabilities.argmax()
+        if probabilities[best] < self.threshold:
+            return None
+        return RouteResult(str(self.pipeline.classes_[best]), "model", float(probabilities[best]))
+
+
+class FastPathRouter:
+    """
+    Local pre-classifier that runs in front of the DecisionRouter LLM.
+
+    classify() returns a RouteResult for confident cases and None when the LLM
+    should decide. Keeps hit-rate and latency counters, see stats().
+    """
+
+    def __init__(self, keyword_router=None, model_router=None, log_path: str = BOX_ROUTER_LOG_PATH):
+        self.keyword_router = keyword_router or KeywordRouter()
+        self.model_router = model_router
+        self.log_path = log_path
+        self._lock = threading.Lock()
+        self.counts = {"queries": 0, "keyword": 0, "model": 0, "fallback": 0}
+        self.classify_seconds = 0.0
+        self.llm_seconds = 0.0
+
+    def classify(self, query: str) -> Optional[RouteResult]:
+        start = time.perf_counter()
+        result = None
+        if query:
+            result = self.keyword_router.classify(query)
+            if result is None and self.model_router is not None:
+                result = self.model_router.classify(query)
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self.counts["queries"] += 1
+            self.counts[result.source if result else "fallback"] += 1
+            self.classify_seconds += elapsed
+        return result
+
+    def record_llm_decision(self, query: str, decision: Optional[str], seconds: float) -> None:
+        """Records an LLM routing round trip and appends it to the training log."""
+        with self._lock:
+            self.llm_seconds += seconds
+        decision = normalize_decision(decision)
+        if not (self.log_path and query and decision):
+            return
+        try:
+            with self._lock, open(self.log_path, "a") as f:
+                f.write(json.dumps({"query": query, "decision": decision}) + "\n")
+        except OSError as e:
+            logger.warning(f"Could not log routing decision: {e}")
+
+    def stats(self) -> dict:
+        with self._lock:
+            queries = self.counts["queries"]
+            fast = self.counts["keyword"] + self.counts["model"]
+            fallbacks = self.counts["fallback"]
+            return {
+                **self.counts,
+                "hit_rate": fast / queries if queries else 0.0,
+                "avg_classify_ms": 1000 * self.classify_seconds / queries if queries else 0.0,
+                "avg_llm_ms": 1000 * self.llm_seconds / fallbacks if fallbacks else 0.0,
+            }
+
+
+def build_fast_router() -> Optional[FastPathRouter]:
+    """Builds the router configured by the environment, or None when disabled."""
+    if BOX_FAST_ROUTER == "off":
+        return None
+    model_router = None
+    if BOX_ROUTER_LOG_PATH and os.path.exists(BOX_ROUTER_LOG_PATH):
+        model_router = TfidfRouter.from_log(BOX_ROUTER_LOG_PATH)
+    return FastPathRouter(model_router=model_router)
+
+
+def build_routing_cache():
+    """
+    Builds the process-wide routing decision cache configured by the
+    environment, or None when disabled. Keys are normalize_query() output.
+    """
+    if BOX_ROUTING_CACHE == "off":
+        return None
+    if BOX_ROUTING_CACHE == "sqlite":
+        return SQLiteCache(BOX_ROUTING_CACHE_PATH, BOX_ROUTING_CACHE_MAX_ENTRIES, BOX_ROUTING_CACHE_TTL)
+    return LRUTTLCache(BOX_ROUTING_CACHE_MAX_ENTRIES, BOX_ROUTING_CACHE_TTL)
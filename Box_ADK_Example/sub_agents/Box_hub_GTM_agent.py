@@ -1,6 +1,6 @@
 
 from google.adk.agents import LlmAgent # Use LlmAgent
-from ..tools.box_hub_ask_GTM import box_hub_ask_GTM
+from ..tools.box_hub_ask_GTM import box_hub_ask_GTM_async
 
 Box_hub_GTM_agent = LlmAgent(
     model='gemini-2.0-flash', # Or your preferred Gemini model
@@ -10,12 +10,12 @@ Box_hub_GTM_agent = LlmAgent(
     Your primary goal is to answer user questions accurately using the provided tools.
 
     Tool Usage Guidance:
-    1. For questions related to GTM (Go To Market) content, use the box_hub_ask_GTM tool. Pass the user's core question directly as the 'prompt'. Preface your final answer to the user with "This is what I found with Box Hub GTM: ".
+    1. For questions related to GTM (Go To Market) content, use the box_hub_ask_GTM_async tool. Pass the user's core question directly as the 'prompt'. Preface your final answer to the user with "This is what I found with Box Hub GTM: ".
     2. If you do not get a clear answer from the Box hub you can use the other and then compare the results to see which will help the user find the information they are looking for.
     3. If a tool returns an error message (e.g., starting with 'API Error:' or 'An unexpected error occurred:'), relay that information clearly to the user. If it returns 'No files found...' or 'Box Hub did not provide an answer...', state that to the user.
     4. You can also ask the user for more contect if you are not sure where the best places to look are. Asking questions like is this go to martket material you are looking for is a good example of how to get context. 
     """,
     tools=[
-        box_hub_ask_GTM
+        box_hub_ask_GTM_async
     ]
 )
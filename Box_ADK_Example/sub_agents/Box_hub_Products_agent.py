@@ -1,5 +1,5 @@
 from google.adk.agents import LlmAgent # Use LlmAgent
-from ..tools.box_hub_ask import box_hub_ask
+from ..tools.box_hub_ask import box_hub_ask_async
 
 Box_hub_Products_agent = LlmAgent(
     model='gemini-2.0-flash', # Or your preferred Gemini model
@@ -15,6 +15,6 @@ Box_hub_Products_agent = LlmAgent(
     4. You can also ask the user for more contect if you are not sure where the best places to look are. Asking questions like is this go to martket material you are looking for is a good example of how to get context. 
     """,
     tools=[
-        box_hub_ask
+        box_hub_ask_async
     ]
 )
@@ -2,6 +2,7 @@
 from google.adk.agents import LlmAgent # Use LlmAgent
 from .Box_hub_GTM_agent import Box_hub_GTM_agent
 from .Box_hub_Products_agent import Box_hub_Products_agent
+from ..tools.box_hub_fanout import box_hub_ask_all
 
 Box_hub_agent = LlmAgent(
     model='gemini-2.0-flash', # Or your preferred Gemini model
@@ -10,10 +11,12 @@ Box_hub_agent = LlmAgent(
     You are a helpful assistant designed to interact with Box content using specialized tools.
     Your primary goal is to answer user questions accurately using the provided tools.
     Sub Agent Guidance:
-    1. For questions related to GTM (Go To Market) content, use the box_hub_ask_GTM tool. Pass the user's core question directly as the 'prompt'. Preface your final answer to the user with "This is what I found with Box Hub GTM: ".
-    2. For questions related to general product questions use the product hub agent. 
-    3. If an agent returns an error message (e.g., starting with 'API Error:' or 'An unexpected error occurred:'), relay that information clearly to the user. If it returns 'No files found...' or 'Box Hub did not provide an answer...', state that to the user. Then give them suggestoins on how to contruct their questions.
-    4. You do not always need to respond, If there is another agent that has provided a response you can just wiat untill you are expicitly called by the user. 
+    1. For questions related to GTM (Go To Market) content, use the box_hub_ask_GTM_async tool. Pass the user's core question directly as the 'prompt'. Preface your final answer to the user with "This is what I found with Box Hub GTM: ".
+    2. For questions related to general product questions use the product hub agent.
+    3. If a question could be answered by both the product and the GTM hubs, use the box_hub_ask_all tool instead of calling each agent in turn. It asks both hubs at the same time and labels each answer with its hub; tell the user which hub each part of your answer came from.
+    4. If an agent returns an error message (e.g., starting with 'API Error:' or 'An unexpected error occurred:'), relay that information clearly to the user. If it returns 'No files found...' or 'Box Hub did not provide an answer...', state that to the user. Then give them suggestoins on how to contruct their questions.
+    5. You do not always need to respond, If there is another agent that has provided a response you can just wiat untill you are expicitly called by the user.
     """,
+tools=[box_hub_ask_all], # Queries every hub concurrently
 sub_agents=[Box_hub_GTM_agent, Box_hub_Products_agent] # List of sub-agents to use
 )
@@ -2,8 +2,8 @@
 import os
 import logging # Optional: for better logging
 from google.adk.agents import LlmAgent # Use LlmAgent
-from ..tools.box_generic_search import box_generic_search
-from ..tools.box_AI_ask import box_AI_ask
+from ..tools.box_generic_search import box_generic_search_async
+from ..tools.box_AI_ask import box_AI_ask_async
 
 # Setup logging (optional but recommended)
 logging.basicConfig(level=logging.INFO)
@@ -18,12 +18,12 @@ Box_search_agent = LlmAgent(
     
     Tool Usage Guidelines:
     
-    1. For general content questions or summaries, use the `box_generic_search` tool.
+    1. For general content questions or summaries, use the `box_generic_search_async` tool.
        Format: Use keywords without spaces (use %20 instead) for optimal results.
        
-    2. For detailed analysis of specific files, use the `box_AI_ask` tool.
+    2. For detailed analysis of specific files, use the `box_AI_ask_async` tool.
        - This tool requires properly formatted JSON file objects
-       - IMPORTANT: When using box_AI_ask, format the items parameter as a JSON array:
+       - IMPORTANT: When using box_AI_ask_async, format the items parameter as a JSON array:
          '[{"type": "file", "id": "FILE_ID_HERE"}]'
          you just need to psss the file ID in the prompt no need to ask the user to format it. 
        - For multiple files: '[{"type": "file", "id": "FILE_ID_1"},{"type": "file", "id": "FILE_ID_2"}]'
@@ -40,10 +40,10 @@ Box_search_agent = LlmAgent(
        
     5. Follow-up guidance:
        - After successful searches, ask if the user wants more details about specific files
-       - For detailed file analysis, use the box_AI_ask tool with a clear, specific prompt
+       - For detailed file analysis, use the box_AI_ask_async tool with a clear, specific prompt
     """,
     tools=[
-        box_generic_search,
-        box_AI_ask
+        box_generic_search_async,
+        box_AI_ask_async
     ]
 )
@@ -0,0 +1,79 @@
+"""Tests for splitting long item lists across Box AI calls in tools/box_AI_ask.py, with a fake client."""
+
+import asyncio
+import json
+
+import httpx
+
+from Box_ADK_Example.tools import box_AI_ask
+
+
+class FakeClient:
+    """Answers each group with its file IDs, or raises for groups containing a failing ID."""
+
+    def __init__(self, failures=None):
+        self.failures = failures or {}
+        self.groups = []
+
+    def hub_id(self, hub="products"):
+        return "hub"
+
+    def _answer(self, items_list):
+        self.groups.append([item["id"] for item in items_list])
+        for item in items_list:
+            if item["id"] in self.failures:
+                raise self.failures[item["id"]]
+        ids = ",".join(item["id"] for item in items_list)
+        return {"answer": f"answer {ids}", "citations": [{"id": items_list[0]["id"], "name": "doc"}]}
+
+    def ask_items(self, prompt, items_list):
+        return self._answer(items_list)
+
+    async def aask_items(self, prompt, items_list):
+        return self._answer(items_list)
+
+
+def items(n):
+    return [{"type": "file", "id": str(i)} for i in range(n)]
+
+
+def test_batch_merges_groups_around_a_non_httpx_error():
+    client = FakeClient({"3": json.JSONDecodeError("Expecting value", "", 0)})
+    result = asyncio.run(box_AI_ask.box_AI_ask_batch("q", items(7), max_items=2, client=client))
+    assert "Files 0, 1: answer 0,1" in result
+    assert "Files 2, 3: An unexpected error occurred: Expecting value" in result
+    assert "Files 4, 5: answer 4,5" in result
+    assert "Files 6: answer 6" in result
+
+
+def test_batch_reports_http_errors_per_group():
+    client = FakeClient({"0": httpx.ConnectError("refused")})
+    result = asyncio.run(box_AI_ask.box_AI_ask_batch("q", items(4), max_items=2, client=client))
+    assert "Files 0, 1: API Error: No response details." in result
+    assert "Files 2, 3: answer 2,3" in result
+
+
+def test_sync_tool_splits_long_lists(monkeypatch):
+    client = FakeClient({"30": ValueError("bad body")})
+    monkeypatch.setattr(box_AI_ask.box_client, "client_for_context", lambda tool_context: client)
+    result = box_AI_ask.box_AI_ask("q", json.dumps(items(60)))
+    assert client.groups == [[str(i) for i in range(start, min(start + 25, 60))] for start in (0, 25, 50)]
+    assert "Files 0, 1, 2" in result and "answer 0,1,2" in result
+    assert "An unexpected error occurred: bad body" in result
+    assert "answer 50," in result
+
+
+def test_sync_tool_single_call_for_short_lists(monkeypatch):
+    client = FakeClient()
+    monkeypatch.setattr(box_AI_ask.box_client, "client_for_context", lambda tool_context: client)
+    assert box_AI_ask.box_AI_ask("q", json.dumps(items(25))) == "answer " + ",".join(map(str, range(25)))
+    assert len(client.groups) == 1
+
+
+def test_sync_batch_skips_groups_after_the_deadline(monkeypatch):
+    clock = iter(range(100))
+    monkeypatch.setattr(box_AI_ask.time, "perf_counter", lambda: next(clock))
+    result = box_AI_ask.box_AI_ask_batch_sync("q", items(6), max_items=2, timeout=2, client=FakeClient())
+    assert "Files 0, 1: answer 0,1" in result
+    assert "Files 4, 5" not in result
+    assert "Partial results: 2 of 3 file groups did not finish within 2 seconds." in result
@@ -0,0 +1,35 @@
+"""Tests for choosing and replacing the answer cache in tools/box_cache.py."""
+
+import pytest
+
+from Box_ADK_Example.tools import box_cache
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache(monkeypatch):
+    monkeypatch.setattr(box_cache, "_answer_cache", None)
+
+
+def test_default_backend_created_once():
+    cache = box_cache.get_answer_cache()
+    assert isinstance(cache, box_cache.LRUTTLCache)
+    assert box_cache.get_answer_cache() is cache
+
+
+def test_off_disables(monkeypatch):
+    monkeypatch.setattr(box_cache, "BOX_ANSWER_CACHE", "off")
+    assert box_cache.get_answer_cache() is None
+    assert box_cache.invalidate_hub("123") == 0
+
+
+def test_set_answer_cache_none_disables():
+    box_cache.get_answer_cache().set("key", "answer", tag="123")
+    box_cache.set_answer_cache(None)
+    assert box_cache.get_answer_cache() is None
+    assert box_cache.invalidate_hub() == 0
+
+
+def test_set_answer_cache_installs_custom_backend():
+    cache = box_cache.LRUTTLCache(max_entries=1, ttl=60)
+    box_cache.set_answer_cache(cache)
+    assert box_cache.get_answer_cache() is cache
@@ -0,0 +1,29 @@
+"""Tests for the paginated search of tools/box_generic_search.py, against the fake Box server."""
+
+import pytest
+
+from Box_ADK_Example.tools import box_client, box_generic_search, box_resilience
+from Box_ADK_Example.benchmarks.fake_box_server import FakeBoxServer
+
+
+@pytest.fixture
+def server(monkeypatch):
+    monkeypatch.setattr(box_resilience, "_breakers", {})
+    monkeypatch.setattr(box_resilience, "rate_limiter", box_resilience.TokenBucket(rate=0))
+    with FakeBoxServer(latency_ms=0, jitter_ms=0, corpus_size=200) as fake:
+        monkeypatch.setattr(box_client, "BOX_API_BASE_URL", fake.base_url)
+        yield fake
+
+
+def test_default_cap_fetches_one_page(server):
+    assert box_generic_search.BOX_SEARCH_MAX_RESULTS == box_generic_search.BOX_SEARCH_PAGE_SIZE
+    entries = list(box_generic_search.iter_search_results("notes", page_size=30, client=box_client.BoxClient()))
+    assert len(entries) == 30
+    assert server.counts["search"] == 1
+
+
+def test_raising_the_cap_fetches_more_pages(server):
+    entries = list(box_generic_search.iter_search_results("notes", page_size=30, max_results=90,
+                                                          client=box_client.BoxClient()))
+    assert len(entries) == 90
+    assert server.counts["search"] == 3
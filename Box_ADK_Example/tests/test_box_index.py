@@ -0,0 +1,117 @@
+"""Tests for the event sync of tools/box_index.py, against the fake Box server's event stream."""
+
+import pytest
+
+from Box_ADK_Example.tools import box_client, box_resilience
+from Box_ADK_Example.tools.box_index import BoxSearchIndex
+from Box_ADK_Example.benchmarks.fake_box_server import FakeBoxServer
+
+
+@pytest.fixture
+def server(monkeypatch):
+    monkeypatch.setattr(box_resilience, "_breakers", {})
+    monkeypatch.setattr(box_resilience, "rate_limiter", box_resilience.TokenBucket(rate=0))
+    with FakeBoxServer(latency_ms=0, jitter_ms=0, corpus_size=5) as fake:
+        monkeypatch.setattr(box_client, "BOX_API_BASE_URL", fake.base_url)
+        yield fake
+
+
+@pytest.fixture
+def client():
+    return box_client.BoxClient()
+
+
+def make_index(tmp_path, client, root_folder_id="0"):
+    index = BoxSearchIndex(str(tmp_path / "index.db"), root_folder_id=root_folder_id)
+    index.full_sync(client)
+    return index
+
+
+def paths(index):
+    return dict(index._conn.execute("SELECT id, path FROM items").fetchall())
+
+
+def found(index, query):
+    return {entry["id"] for entry in index.search(query, 50)}
+
+
+def add_tree(server):
+    """Adds Quokka/{a.pdf, Wombat/b.pdf} under the root; returns the folders and files."""
+    quokka = server.add_folder("Quokka")
+    wombat = server.add_folder("Wombat", quokka["id"])
+    a = server.add_file("a.pdf", quokka["id"])
+    b = server.add_file("b.pdf", wombat["id"])
+    return quokka, wombat, a, b
+
+
+def test_folder_created_with_contents(server, client, tmp_path):
+    index = make_index(tmp_path, client)
+    quokka, wombat, a, b = add_tree(server)
+    index.sync(client)
+    assert paths(index)[b["id"]] == "All Files/Quokka/Wombat"
+    assert found(index, "wombat") == {wombat["id"], b["id"]}
+
+
+def test_folder_trash_deletes_subtree(server, client, tmp_path):
+    quokka, wombat, a, b = add_tree(server)
+    index = make_index(tmp_path, client)
+    kept = server.add_folder("Quokka2")
+    server.trash_item(quokka["id"])
+    index.sync(client)
+    indexed = paths(index)
+    assert not {quokka["id"], wombat["id"], a["id"], b["id"]} & set(indexed)
+    # Only the folder itself, not a sibling sharing its name as a prefix
+    assert indexed[kept["id"]] == "All Files"
+    assert len(indexed) == len(server.corpus)
+
+
+def test_folder_rename_rewrites_child_paths(server, client, tmp_path):
+    quokka, wombat, a, b = add_tree(server)
+    index = make_index(tmp_path, client)
+    server.rename_item(quokka["id"], "Numbat")
+    index.sync(client)
+    indexed = paths(index)
+    assert indexed[a["id"]] == "All Files/Numbat"
+    assert indexed[b["id"]] == "All Files/Numbat/Wombat"
+    assert found(index, "quokka") == set()
+    assert found(index, "numbat") == {quokka["id"], wombat["id"], a["id"], b["id"]}
+
+
+def test_folder_move_rewrites_child_paths(server, client, tmp_path):
+    quokka, wombat, a, b = add_tree(server)
+    target = server.add_folder("Archive")
+    index = make_index(tmp_path, client)
+    server.move_item(wombat["id"], target["id"])
+    index.sync(client)
+    indexed = paths(index)
+    assert indexed[wombat["id"]] == "All Files/Archive"
+    assert indexed[b["id"]] == "All Files/Archive/Wombat"
+    assert indexed[a["id"]] == "All Files/Quokka"
+
+
+def test_folder_moves_in_and_out_of_scope(server, client, tmp_path):
+    quokka, wombat, a, b = add_tree(server)
+    outside = server.add_folder("Outside")
+    stray = server.add_file("c.pdf", outside["id"])
+    index = make_index(tmp_path, client, root_folder_id=quokka["id"])
+    assert set(paths(index)) == {wombat["id"], a["id"], b["id"]}
+
+    server.move_item(outside["id"], quokka["id"])
+    index.sync(client)
+    assert paths(index)[stray["id"]] == "All Files/Quokka/Outside"
+
+    server.move_item(wombat["id"], "0")
+    index.sync(client)
+    assert set(paths(index)) == {outside["id"], stray["id"], a["id"]}
+
+
+def test_file_events_around_a_folder_event_keep_stream_order(server, client, tmp_path):
+    quokka, wombat, a, b = add_tree(server)
+    index = make_index(tmp_path, client)
+    c = server.add_file("c.pdf", wombat["id"])
+    server.rename_item(quokka["id"], "Numbat")
+    server.rename_file(b["id"], "d.pdf")
+    index.sync(client)
+    indexed = paths(index)
+    assert indexed[c["id"]] == indexed[b["id"]] == "All Files/Numbat/Wombat"
+    assert found(index, "d") == {b["id"]}
@@ -0,0 +1,222 @@
+"""Tests for the circuit breaker and retry loops in tools/box_resilience.py, with a fake send."""
+
+import time
+import asyncio
+
+import httpx
+import pytest
+import requests
+
+from Box_ADK_Example.tools import box_resilience
+from Box_ADK_Example.tools.box_resilience import CircuitOpenError
+
+URL = "https://api.box.com/2.0/folders/123/items"
+
+
+class FakeResponse:
+    def __init__(self, status_code, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+    def close(self):
+        pass
+
+    async def aclose(self):
+        pass
+
+
+class FakeSend:
+    """Returns (or raises) the queued outcomes in order, counting the calls."""
+
+    def __init__(self, *outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = 0
+
+    def _next(self):
+        self.calls += 1
+        outcome = self.outcomes.pop(0) if len(self.outcomes) > 1 else self.outcomes[0]
+        if isinstance(outcome, BaseException):
+            raise outcome
+        return FakeResponse(outcome) if isinstance(outcome, int) else outcome
+
+    def __call__(self):
+        return self._next()
+
+    async def asend(self):
+        return self._next()
+
+
+@pytest.fixture(autouse=True)
+def resilience(monkeypatch):
+    """Fresh breakers, no rate limit, no real sleeping; returns the recorded sleeps."""
+    sleeps = []
+    monkeypatch.setattr(box_resilience, "_breakers", {})
+    monkeypatch.setattr(box_resilience, "rate_limiter", box_resilience.TokenBucket(rate=0))
+    monkeypatch.setattr(box_resilience, "BOX_RETRY_MAX_ATTEMPTS", 1)
+    monkeypatch.setattr(box_resilience.time, "sleep", sleeps.append)
+    return sleeps
+
+
+def breaker(threshold=2):
+    b = box_resilience.get_breaker("GET", URL)
+    b.failure_threshold = threshold
+    b.reset_timeout = 60
+    return b
+
+
+def half_open(b):
+    b.failures = b.failure_threshold
+    b.opened_at = time.monotonic() - b.reset_timeout
+    assert b.state == "half-open"
+
+
+def call(send):
+    return box_resilience.send_with_retries(send, "GET", URL)
+
+
+def test_opens_after_consecutive_failures():
+    b = breaker(threshold=2)
+    send = FakeSend(503)
+    call(send)
+    assert b.state == "closed"
+    call(send)
+    assert b.state == "open"
+    with pytest.raises(CircuitOpenError):
+        call(send)
+    assert send.calls == 2
+
+
+def test_success_resets_failure_count():
+    b = breaker(threshold=2)
+    call(FakeSend(503))
+    call(FakeSend(200))
+    call(FakeSend(503))
+    assert b.state == "closed"
+
+
+def test_half_open_trial_success_closes():
+    b = breaker()
+    half_open(b)
+    assert call(FakeSend(200)).status_code == 200
+    assert b.state == "closed"
+    assert b.failures == 0
+
+
+def test_half_open_trial_failure_reopens():
+    b = breaker()
+    half_open(b)
+    call(FakeSend(503))
+    assert b.state == "open"
+    with pytest.raises(CircuitOpenError):
+        call(FakeSend(200))
+
+
+def test_half_open_allows_one_trial_at_a_time():
+    b = breaker()
+    half_open(b)
+    assert b.before_call() is True
+    with pytest.raises(CircuitOpenError):
+        b.before_call()
+    b.release_trial()
+    assert b.before_call() is True
+
+
+def test_half_open_trial_429_releases_trial():
+    b = breaker()
+    half_open(b)
+    assert call(FakeSend(429)).status_code == 429
+    assert b.state == "half-open"
+    assert call(FakeSend(200)).status_code == 200
+    assert b.state == "closed"
+
+
+def test_half_open_trial_unhandled_error_releases_trial():
+    b = breaker()
+    half_open(b)
+    with pytest.raises(requests.exceptions.ChunkedEncodingError):
+        call(FakeSend(requests.exceptions.ChunkedEncodingError("truncated")))
+    assert b.state == "half-open"
+    assert call(FakeSend(200)).status_code == 200
+    assert b.state == "closed"
+
+
+def test_half_open_trial_cancelled_releases_trial():
+    b = breaker()
+    half_open(b)
+
+    async def hang():
+        await asyncio.sleep(10)
+
+    async def main():
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(box_resilience.asend_with_retries(hang, "GET", URL), 0.01)
+        assert b.state == "half-open"
+        response = await box_resilience.asend_with_retries(FakeSend(200).asend, "GET", URL)
+        assert response.status_code == 200
+
+    asyncio.run(main())
+    assert b.state == "closed"
+
+
+def test_retry_after_honored(resilience, monkeypatch):
+    monkeypatch.setattr(box_resilience, "BOX_RETRY_MAX_ATTEMPTS", 3)
+    send = FakeSend(FakeResponse(429, {"Retry-After": "7"}), FakeResponse(503, {"Retry-After": "2"}), 200)
+    assert call(send).status_code == 200
+    assert resilience == [7.0, 2.0]
+    assert send.calls == 3
+
+
+def test_retry_after_capped(resilience, monkeypatch):
+    monkeypatch.setattr(box_resilience, "BOX_RETRY_MAX_ATTEMPTS", 2)
+    call(FakeSend(FakeResponse(429, {"Retry-After": "3600"}), 200))
+    assert resilience == [box_resilience.BOX_RETRY_MAX_DELAY]
+
+
+def test_async_trial_429_releases_trial():
+    b = breaker()
+    half_open(b)
+    response = asyncio.run(box_resilience.asend_with_retries(FakeSend(429).asend, "GET", URL))
+    assert response.status_code == 429
+    assert b.state == "half-open"
+    assert b.before_call() is True
+
+
+def test_retried_call_counts_as_one_failure(monkeypatch):
+    monkeypatch.setattr(box_resilience, "BOX_RETRY_MAX_ATTEMPTS", 4)
+    b = breaker(threshold=2)
+    send = FakeSend(503)
+    assert call(send).status_code == 503
+    assert send.calls == 4
+    assert b.failures == 1
+    assert b.state == "closed"
+
+
+def test_retried_connection_errors_count_as_one_failure(monkeypatch):
+    monkeypatch.setattr(box_resilience, "BOX_RETRY_MAX_ATTEMPTS", 3)
+    b = breaker(threshold=2)
+    with pytest.raises(requests.exceptions.ConnectionError):
+        call(FakeSend(requests.exceptions.ConnectionError("refused")))
+    assert b.state == "closed"
+    call(FakeSend(requests.exceptions.ConnectionError("refused"), 200))
+    assert b.failures == 0
+
+
+def test_open_circuit_raises_requests_error():
+    b = breaker(threshold=1)
+    call(FakeSend(503))
+    with pytest.raises(requests.exceptions.RequestException) as excinfo:
+        call(FakeSend(200))
+    assert isinstance(excinfo.value, CircuitOpenError)
+    assert not isinstance(excinfo.value, httpx.HTTPError)
+    assert b.state == "open"
+
+
+def test_open_circuit_raises_httpx_error_with_request():
+    breaker(threshold=1)
+    call(FakeSend(503))
+    with pytest.raises(httpx.RequestError) as excinfo:
+        asyncio.run(box_resilience.asend_with_retries(FakeSend(200).asend, "GET", URL))
+    assert isinstance(excinfo.value, CircuitOpenError)
+    assert not isinstance(excinfo.value, requests.exceptions.RequestException)
+    assert excinfo.value.request.method == "GET"
+    assert str(excinfo.value.request.url) == URL
@@ -1,22 +1,237 @@
 import os
-import logging 
+import json
+import time
+import asyncio
+import logging
+from typing import Optional
+import httpx
 import requests
-from dotenv import load_dotenv
-load_dotenv()
-logging.basicConfig(level=logging.INFO)
+from google.adk.tools import ToolContext
+from . import box_client
+from . import box_results
+from . import box_stream
 logger = logging.getLogger(__name__)
 
-# !! SECURITY WARNING !!
-# Replace these with a secure method, e.g., environment variables
-BOX_METADATA_TOKEN = os.getenv("BOX_METADATA_TOKEN", "YOUR_METADATA_TOKEN_HERE")
-BOX_HUB_TOKEN = os.getenv("BOX_HUB_TOKEN", "YOUR_HUB_TOKEN_HERE")
-BOX_ENTERPRISE_ID = os.getenv("BOX_ENTERPRISE_ID", "YOUR_BOX_ENTERPRISE_ID_HERE")
-BOX_HUB_ID = os.getenv("BOX_HUB_ID", "YOUR_BOX_HUB_ID_HERE") # e.g., "216163155"
+# Batching for large item lists. multiple_item_qa accepts at most 25 items per
+# call, so longer lists are split into groups, asked concurrently by the async
+# tool and one after another by the sync one.
+BOX_AI_MAX_ITEMS_PER_CALL = int(os.getenv("BOX_AI_MAX_ITEMS_PER_CALL", "25"))
+BOX_AI_BATCH_CONCURRENCY = int(os.getenv("BOX_AI_BATCH_CONCURRENCY", "4"))
+# Deadline in seconds for all groups together; groups still running are
+# cancelled and the answers received so far are returned.
+BOX_AI_BATCH_TIMEOUT = float(os.getenv("BOX_AI_BATCH_TIMEOUT", "60"))
 
 
-def box_AI_ask(prompt: str, items: str) -> str:
+def _parse_items(items: str) -> list:
+  """
+  Parses the items string into a list of file objects.
+
+  Raises:
+    json.JSONDecodeError: If items is not valid JSON.
+  """
+  # If items is a string representation of a single object, wrap it in array brackets
+  if items.strip().startswith('{'):
+      items_json = f"[{items}]"
+  else:
+      items_json = items
+
+  # Convert to Python objects to ensure valid JSON
+  return json.loads(items_json)
+
+
+def _parse_answer(response_data: dict) -> str:
+  """Extracts the answer text from a Box AI ask response."""
+  answer = response_data.get("answer")
+  if answer:
+      return answer
+  else:
+      completion_reason = response_data.get("completion_reason", "No reason provided.")
+      logger.warning(f"Box Ask did not provide an answer. Reason: {completion_reason}")
+      return f"Box Ask did not provide an answer. Reason: {completion_reason}"
+
+
+def _format_answer(response_data: dict, items_list: list) -> str:
+  """Returns the answer text, or compact JSON with citations and file IDs when BOX_RESULT_FORMAT=compact."""
+  if box_results.compact_enabled():
+    return box_results.to_json(box_results.compact_answer(response_data, items_list))
+  return _parse_answer(response_data)
+
+
+def _chunk(items_list: list, size: int) -> list:
+  return [items_list[i:i + size] for i in range(0, len(items_list), size)]
+
+
+def _merge_batch_answers(groups: list, results: list, timeout: float) -> str:
+  """
+  Merges per-group answers and citations into one response.
+
+  Args:
+    groups: The item groups that were asked.
+    results: One entry per group: the response dict, an error string, or None
+      if the group did not finish before the deadline.
+    timeout: The deadline that applied, for the partial result note.
+  """
+  sections = []
+  citations = {}
+  for group, result in zip(groups, results):
+    file_ids = ", ".join(str(item.get("id")) for item in group)
+    if result is None:
+      continue
+    if isinstance(result, str):
+      sections.append(f"Files {file_ids}: {result}")
+      continue
+    sections.append(f"Files {file_ids}: {_parse_answer(result)}")
+    for citation in result.get("citations") or []:
+      key = citation.get("id") or citation.get("name")
+      if key and key not in citations:
+        citations[key] = citation
+
+  unfinished = sum(1 for result in results if result is None)
+  if unfinished:
+    sections.append(
+        f"Partial results: {unfinished} of {len(groups)} file groups did not finish within {timeout} seconds."
+    )
+  if citations:
+    sources = "; ".join(
+        f"{c.get('name', 'Unnamed item')} (ID: {c.get('id', 'unknown')})" for c in citations.values()
+    )
+    sections.append(f"Sources: {sources}")
+  return "\n\n".join(sections)
+
+
+def _compact_batch_answers(groups: list, results: list, timeout: float) -> str:
+  """Compact JSON version of _merge_batch_answers, splitting the token budget across groups."""
+  budget_chars = box_results.BOX_RESULT_TOKEN_BUDGET * box_results.CHARS_PER_TOKEN
+  answer_chars = (2 * budget_chars // 3) // max(len(groups), 1)
+  answers, citations = [], []
+  for group, result in zip(groups, results):
+    file_ids = [str(item.get("id")) for item in group]
+    if result is None:
+      continue
+    if isinstance(result, str):
+      answers.append({"file_ids": file_ids, "error": result})
+      continue
+    answers.append({"file_ids": file_ids, "answer": box_results.truncate_text(_parse_answer(result), answer_chars)})
+    citations.extend(result.get("citations") or [])
+
+  compact = {"answers": answers}
+  unfinished = sum(1 for result in results if result is None)
+  if unfinished:
+    compact["partial"] = f"{unfinished} of {len(groups)} file groups did not finish within {timeout} seconds."
+  citations = box_results.dedupe_citations(citations, excerpt_chars=0)
+  if citations:
+    compact["citations"] = citations
+  return box_results.to_json(compact)
+
+
+async def _ask_group(client: box_client.BoxClient, prompt: str, group: list, semaphore: asyncio.Semaphore):
+  """Asks one item group, returning the response dict or an error string."""
+  async with semaphore:
+    try:
+      return await client.aask_items(prompt, group)
+    except httpx.HTTPStatusError as e:
+      logger.error(f"Error during Box AI batch call: {e}")
+      return f"API Error: Status: {e.response.status_code}. Details: {e.response.text}"
+    except httpx.HTTPError as e:
+      logger.error(f"Error during Box AI batch call: {e}")
+      return "API Error: No response details."
+    except Exception as e:
+      # E.g. a malformed response body; the other groups' answers still count.
+      logger.error(f"An unexpected error occurred in a Box AI batch call: {e}", exc_info=True)
+      return f"An unexpected error occurred: {e}"
+
+
+async def box_AI_ask_batch(prompt: str, items_list: list, max_items: int = None,
+                           concurrency: int = None, timeout: float = None,
+                           client: box_client.BoxClient = None) -> str:
+  """
+  Asks Box AI about a long list of files by splitting it into API-sized groups.
+
+  Groups are asked concurrently (bounded by a semaphore) under one overall
+  deadline; the answers and citations received before the deadline are merged.
+
+  Args:
+    prompt: The question or prompt to ask the AI.
+    items_list: File objects, e.g. [{"type": "file", "id": "12345"}].
+    max_items: Items per call. Defaults to BOX_AI_MAX_ITEMS_PER_CALL.
+    concurrency: Calls in flight at once. Defaults to BOX_AI_BATCH_CONCURRENCY.
+    timeout: Overall deadline in seconds. Defaults to BOX_AI_BATCH_TIMEOUT.
+    client: BoxClient to ask through. Defaults to the default tenant's client.
+
+  Returns:
+    The merged answers, labelled by file IDs, followed by the cited sources.
+  """
+  client = client or box_client.get_box_client()
+  max_items = max_items or BOX_AI_MAX_ITEMS_PER_CALL
+  timeout = timeout or BOX_AI_BATCH_TIMEOUT
+  semaphore = asyncio.Semaphore(concurrency or BOX_AI_BATCH_CONCURRENCY)
+  groups = _chunk(items_list, max_items)
+  logger.info(f"Asking Box AI about {len(items_list)} items in {len(groups)} groups")
+
+  start = time.perf_counter()
+  tasks = [asyncio.create_task(_ask_group(client, prompt, group, semaphore)) for group in groups]
+  done, pending = await asyncio.wait(tasks, timeout=timeout)
+  for task in pending:
+    task.cancel()
+  if pending:
+    await asyncio.gather(*pending, return_exceptions=True)
+  logger.info(f"Box AI batch finished {len(done)}/{len(groups)} groups in {time.perf_counter() - start:.2f}s")
+
+  results = [task.result() if task in done else None for task in tasks]
+  return _batch_answer(groups, results, timeout)
+
+
+def _batch_answer(groups: list, results: list, timeout: float) -> str:
+  if box_results.compact_enabled():
+    return _compact_batch_answers(groups, results, timeout)
+  return _merge_batch_answers(groups, results, timeout)
+
+
+def _ask_group_sync(client: box_client.BoxClient, prompt: str, group: list):
+  """Sync version of _ask_group."""
+  try:
+    return client.ask_items(prompt, group)
+  except requests.exceptions.RequestException as e:
+    logger.error(f"Error during Box AI batch call: {e}")
+    if getattr(e, "response", None) is not None:
+      return f"API Error: Status: {e.response.status_code}. Details: {e.response.text}"
+    return "API Error: No response details."
+  except Exception as e:
+    logger.error(f"An unexpected error occurred in a Box AI batch call: {e}", exc_info=True)
+    return f"An unexpected error occurred: {e}"
+
+
+def box_AI_ask_batch_sync(prompt: str, items_list: list, max_items: int = None,
+                          timeout: float = None, client: box_client.BoxClient = None) -> str:
+  """
+  Sync version of box_AI_ask_batch, for the blocking box_AI_ask tool.
+
+  Groups are asked one after another; once the deadline has passed, the
+  remaining groups are skipped and reported as unfinished.
+  """
+  client = client or box_client.get_box_client()
+  max_items = max_items or BOX_AI_MAX_ITEMS_PER_CALL
+  timeout = timeout or BOX_AI_BATCH_TIMEOUT
+  groups = _chunk(items_list, max_items)
+  logger.info(f"Asking Box AI about {len(items_list)} items in {len(groups)} groups")
+
+  start = time.perf_counter()
+  results = []
+  for group in groups:
+    if time.perf_counter() - start >= timeout:
+      results.append(None)
+    else:
+      results.append(_ask_group_sync(client, prompt, group))
+  finished = sum(1 for result in results if result is not None)
+  logger.info(f"Box AI batch finished {finished}/{len(groups)} groups in {time.perf_counter() - start:.2f}s")
+  return _batch_answer(groups, results, timeout)
+
+
+def box_AI_ask(prompt: str, items: str, tool_context: Optional[ToolContext] = None) -> str:
   """
   Sends a prompt to Box AI to get answers based on specified file content.
+  Lists longer than one API call allows are split into groups, asked one
+  after another.
 
   Args:
     prompt: The question or prompt to ask the AI.
@@ -26,52 +241,68 @@ def box_AI_ask(prompt: str, items: str) -> str:
   Returns:
     The answer provided by the Box AI, or an error message.
   """
-  logger.info(f"Asking Box AI (ID: {BOX_HUB_ID}): '{prompt}'")
-  url = "https://api.box.com/2.0/ai/ask"
-  headers = {
-      "Authorization": f"Bearer {BOX_HUB_TOKEN}",
-      "Content-Type": "application/json"
-  }
-  
-  # Parse items string into proper JSON
+  client = box_client.client_for_context(tool_context)
   try:
-      # If items is a string representation of a single object, wrap it in array brackets
-      if items.strip().startswith('{'):
-          items_json = f"[{items}]"
-      else:
-          items_json = items
-      
-      # Convert to Python objects to ensure valid JSON
-      import json
-      items_list = json.loads(items_json)
-      
-      payload = {
-          "mode": "multiple_item_qa",
-          "items": items_list,
-          "prompt": prompt,
-          "includes_citations": True
-      }
-
-      response = requests.post(url, headers=headers, json=payload)
-      logger.info(f"Box ask API response status: {response.status_code}")
-      response.raise_for_status()
-
-      response_data = response.json()
-      answer = response_data.get("answer")
-      if answer:
-          return answer
-      else:
-          completion_reason = response_data.get("completion_reason", "No reason provided.")
-          logger.warning(f"Box Ask did not provide an answer. Reason: {completion_reason}")
-          return f"Box Ask did not provide an answer. Reason: {completion_reason}"
+      logger.info(f"Asking Box AI (ID: {client.hub_id()}): '{prompt}'")
+      items_list = _parse_items(items)
+      if len(items_list) > BOX_AI_MAX_ITEMS_PER_CALL:
+          return box_AI_ask_batch_sync(prompt, items_list, client=client)
+      return _format_answer(client.ask_items(prompt, items_list), items_list)
 
   except json.JSONDecodeError as e:
       logger.error(f"Invalid JSON format for items: {e}")
       return f"Error: Invalid JSON format for items parameter. Please provide a properly formatted JSON array of file objects."
   except requests.exceptions.RequestException as e:
       logger.error(f"Error during Box Hub API call: {e}")
-      error_details = f"Status: {e.response.status_code}. Details: {e.response.text}" if hasattr(e, 'response') else "No response details."
+      error_details = f"Status: {e.response.status_code}. Details: {e.response.text}" if hasattr(e, 'response') and e.response is not None else "No response details."
       return f"API Error: Failed to ask Box Hub. {error_details}"
   except Exception as e:
       logger.error(f"An unexpected error occurred in box_AI_ask: {e}", exc_info=True)
-      return f"An unexpected error occurred: {e}"
\ No newline at end of file
+      return f"An unexpected error occurred: {e}"
+
+
+async def box_AI_ask_async(prompt: str, items: str, tool_context: Optional[ToolContext] = None) -> str:
+  """
+  Sends a prompt to Box AI to get answers based on specified file content.
+  Non-blocking version of box_AI_ask for use on the agent event loop. Lists
+  longer than one API call allows are split into groups and asked concurrently.
+
+  Args:
+    prompt: The question or prompt to ask the AI.
+    items: JSON string of file objects in the format [{"type": "file", "id": "FILE_ID"}]
+           Example: '[{"type": "file", "id": "12345"}]'
+
+  Returns:
+    The answer provided by the Box AI, or an error message.
+  """
+  client = box_client.client_for_context(tool_context)
+  try:
+      logger.info(f"Asking Box AI (ID: {client.hub_id()}): '{prompt}'")
+      items_list = _parse_items(items)
+      if len(items_list) > BOX_AI_MAX_ITEMS_PER_CALL:
+          return await box_AI_ask_batch(prompt, items_list, client=client)
+      queue = box_stream.channel_for(tool_context)
+      if queue is None:
+          return _format_answer(await client.aask_items(prompt, items_list), items_list)
+
+      # Streamed: forward answer text to BoxFlowAgent as it arrives.
+      answer, response_data = [], {}
+      async for piece in client.astream_items(prompt, items_list):
+          box_stream.publish(queue, piece.get("answer"))
+          answer.append(piece.get("answer") or "")
+          response_data.update({key: value for key, value in piece.items() if value})
+      response_data["answer"] = "".join(answer)
+      return _format_answer(response_data, items_list)
+
+  except json.JSONDecodeError as e:
+      logger.error(f"Invalid JSON format for items: {e}")
+      return f"Error: Invalid JSON format for items parameter. Please provide a properly formatted JSON array of file objects."
+  except httpx.HTTPStatusError as e:
+      logger.error(f"Error during Box Hub API call: {e}")
+      return f"API Error: Failed to ask Box Hub. Status: {e.response.status_code}. Details: {e.response.text}"
+  except httpx.HTTPError as e:
+      logger.error(f"Error during Box Hub API call: {e}")
+      return "API Error: Failed to ask Box Hub. No response details."
+  except Exception as e:
+      logger.error(f"An unexpected error occurred in box_AI_ask_async: {e}", exc_info=True)
+      return f"An unexpected error occurred: {e}"
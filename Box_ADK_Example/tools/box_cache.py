@@ -0,0 +1,242 @@
+import os
+import re
+import time
+import sqlite3
+import logging
+import threading
+from collections import OrderedDict
+logger = logging.getLogger(__name__)
+
+# Answer cache configuration.
+# BOX_ANSWER_CACHE selects the backend: "memory" (default), "sqlite" or "off".
+BOX_ANSWER_CACHE = os.getenv("BOX_ANSWER_CACHE", "memory").lower()
+BOX_ANSWER_CACHE_TTL = float(os.getenv("BOX_ANSWER_CACHE_TTL", "3600"))
+BOX_ANSWER_CACHE_MAX_ENTRIES = int(os.getenv("BOX_ANSWER_CACHE_MAX_ENTRIES", "1024"))
+BOX_ANSWER_CACHE_PATH = os.getenv("BOX_ANSWER_CACHE_PATH", "box_answer_cache.sqlite3")
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Lower-cases a prompt, collapses whitespace and drops trailing punctuation."""
+    return _WHITESPACE_RE.sub(" ", prompt).strip().rstrip("?!.").strip().lower()
+
+
+def make_key(prompt: str, hub_id: str, mode: str, tenant: str = None) -> str:
+    """Builds a cache key from the normalized prompt, hub ID and ask mode, scoped to a tenant if given."""
+    key = f"{mode}|{hub_id}|{normalize_prompt(prompt)}"
+    return f"{tenant}|{key}" if tenant else key
+
+
+class LRUTTLCache:
+    """
+    Thread-safe in-memory cache with least-recently-used eviction and a TTL.
+
+    Entries carry an optional tag (e.g. a hub ID) so a group of entries can be
+    invalidated together.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 3600.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: str):
+        """Returns the cached value for key, or None on a miss or expired entry."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, expires_at, _ = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: str, value, tag: str = None) -> None:
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl, tag)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, tag: str = None) -> int:
+        """
+        Drops cached entries.
+
+        Args:
+          tag: Only drop entries stored with this tag. Drops everything if None.
+
+        Returns:
+          The number of entries removed.
+        """
+        with self._lock:
+            if tag is None:
+                removed = len(self._entries)
+                self._entries.clear()
+                return removed
+            keys = [k for k, (_, _, t) in self._entries.items() if t == tag]
+            for k in keys:
+                del self._entries[k]
+            return len(keys)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "backend": "memory",
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+
+class SQLiteCache:
+    """
+    On-disk cache with the same interface as LRUTTLCache.
+
+    Survives restarts and can be shared by several worker processes on one host.
+    Size is bounded by pruning the least recently accessed rows on insert.
+    """
+
+    def __init__(self, path: str, max_entries: int = 1024, ttl: float = 3600.0):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, tag TEXT, "
+            "expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS cache_tag ON cache (tag)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed_at)")
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: str):
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            value, expires_at = row
+            if expires_at < now:
+                self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE cache SET accessed_at = ? WHERE key = ?", (now, key))
+            self.hits += 1
+            return value
+
+    def set(self, key: str, value, tag: str = None) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, tag, expires_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, value, tag, now + self.ttl, now),
+            )
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM cache").fetchone()
+            overflow = count - self.max_entries
+            if overflow > 0:
+                self._conn.execute(
+                    "DELETE FROM cache WHERE key IN "
+                    "(SELECT key FROM cache ORDER BY accessed_at LIMIT ?)",
+                    (overflow,),
+                )
+                self.evictions += overflow
+
+    def invalidate(self, tag: str = None) -> int:
+        with self._lock:
+            if tag is None:
+                cursor = self._conn.execute("DELETE FROM cache")
+            else:
+                cursor = self._conn.execute("DELETE FROM cache WHERE tag = ?", (tag,))
+            return cursor.rowcount
+
+    def stats(self) -> dict:
+        with self._lock:
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM cache").fetchone()
+            return {
+                "backend": "sqlite",
+                "path": self.path,
+                "entries": count,
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+
+_answer_cache = None
+_answer_cache_lock = threading.Lock()
+# Stands for "caching off" in _answer_cache, where None means "not created yet".
+_DISABLED = object()
+
+
+def get_answer_cache():
+    """
+    Returns the process-wide Box Hub answer cache, or None when disabled.
+
+    The backend is chosen by BOX_ANSWER_CACHE on first use and can be replaced
+    with set_answer_cache().
+    """
+    global _answer_cache
+    if _answer_cache is None:
+        with _answer_cache_lock:
+            if _answer_cache is None:
+                if BOX_ANSWER_CACHE == "off":
+                    _answer_cache = _DISABLED
+                elif BOX_ANSWER_CACHE == "sqlite":
+                    _answer_cache = SQLiteCache(
+                        BOX_ANSWER_CACHE_PATH, BOX_ANSWER_CACHE_MAX_ENTRIES, BOX_ANSWER_CACHE_TTL
+                    )
+                else:
+                    _answer_cache = LRUTTLCache(BOX_ANSWER_CACHE_MAX_ENTRIES, BOX_ANSWER_CACHE_TTL)
+                if _answer_cache is not _DISABLED:
+                    logger.info(f"Using {BOX_ANSWER_CACHE} Box Hub answer cache (ttl={BOX_ANSWER_CACHE_TTL}s)")
+    return None if _answer_cache is _DISABLED else _answer_cache
+
+
+def set_answer_cache(cache) -> None:
+    """Installs a custom answer cache (any object with get/set/invalidate/stats), or None to disable."""
+    global _answer_cache
+    with _answer_cache_lock:
+        _answer_cache = _DISABLED if cache is None else cache
+
+
+def invalidate_hub(hub_id: str = None) -> int:
+    """
+    Invalidation hook: drops cached answers for one hub, or for all hubs.
+
+    Call this after the content of a hub changes.
+    """
+    cache = get_answer_cache()
+    if cache is None:
+        return 0
+    removed = cache.invalidate(hub_id)
+    logger.info(f"Invalidated {removed} cached Box Hub answers (hub: {hub_id or 'all'})")
+    return removed
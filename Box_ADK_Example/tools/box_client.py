@@ -0,0 +1,538 @@
+import os
+import json
+import asyncio
+import logging
+import threading
+import weakref
+from dataclasses import dataclass
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from . import box_cache
+from . import box_telemetry
+from .box_resilience import send_with_retries, asend_with_retries
+logger = logging.getLogger(__name__)
+
+# Base URL of the Box API. Point it at a local stand-in such as
+# benchmarks/fake_box_server.py to run the tools offline.
+BOX_API_BASE_URL = os.getenv("BOX_API_BASE_URL", "https://api.box.com/2.0").rstrip("/")
+
+# Connection pool tuning. One pool is kept per host (api.box.com), so
+# BOX_POOL_MAXSIZE is the number of keep-alive connections that can be reused
+# concurrently by the tools.
+BOX_POOL_CONNECTIONS = int(os.getenv("BOX_POOL_CONNECTIONS", "4"))
+BOX_POOL_MAXSIZE = int(os.getenv("BOX_POOL_MAXSIZE", "16"))
+BOX_POOL_BLOCK = os.getenv("BOX_POOL_BLOCK", "false").lower() == "true"
+# (connect, read) timeouts in seconds, used when a call does not pass its own.
+BOX_CONNECT_TIMEOUT = float(os.getenv("BOX_CONNECT_TIMEOUT", "5"))
+BOX_READ_TIMEOUT = float(os.getenv("BOX_READ_TIMEOUT", "60"))
+
+_session = None
+_session_lock = threading.Lock()
+# httpx.AsyncClient connections are bound to the event loop that opened them,
+# so one async client is kept per running loop.
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def get_session() -> requests.Session:
+    """
+    Returns the process-wide requests.Session shared by all Box tools.
+
+    The session is created on first use and mounts an HTTPAdapter sized by
+    BOX_POOL_CONNECTIONS / BOX_POOL_MAXSIZE, so TCP+TLS connections to
+    api.box.com are kept alive and reused across tool calls.
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(
+                    pool_connections=BOX_POOL_CONNECTIONS,
+                    pool_maxsize=BOX_POOL_MAXSIZE,
+                    pool_block=BOX_POOL_BLOCK,
+                )
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _session = session
+                logger.info(
+                    f"Created Box HTTP session (pool_connections={BOX_POOL_CONNECTIONS}, "
+                    f"pool_maxsize={BOX_POOL_MAXSIZE})"
+                )
+    return _session
+
+
+def api_url(path: str) -> str:
+    """Returns the full URL of a Box API path, e.g. api_url("search")."""
+    return f"{BOX_API_BASE_URL}/{path.lstrip('/')}"
+
+
+def request(method: str, url: str, timeout=None, **kwargs) -> requests.Response:
+    """
+    Sends a request through the shared Box session.
+
+    Args:
+      method: HTTP method, e.g. "GET" or "POST".
+      url: Full Box API URL.
+      timeout: Per-call timeout in seconds, or a (connect, read) tuple.
+        Defaults to (BOX_CONNECT_TIMEOUT, BOX_READ_TIMEOUT).
+      **kwargs: Passed through to requests.Session.request.
+
+    Returns:
+      The requests.Response. HTTP errors are not raised here; 429 and 5xx
+      responses and connection errors are retried first, see box_resilience.
+    """
+    if timeout is None:
+        timeout = (BOX_CONNECT_TIMEOUT, BOX_READ_TIMEOUT)
+    session = get_session()
+    with box_telemetry.http_span(method, url, kwargs.get("json")) as span:
+        response = send_with_retries(
+            lambda: session.request(method, url, timeout=timeout, **kwargs), method, url
+        )
+        box_telemetry.record_response(span, response)
+        return response
+
+
+def get(url: str, **kwargs) -> requests.Response:
+    return request("GET", url, **kwargs)
+
+
+def post(url: str, **kwargs) -> requests.Response:
+    return request("POST", url, **kwargs)
+
+
+def get_pool_stats() -> dict:
+    """
+    Returns connection pool counters for the shared session.
+
+    A "hit" is a request served on an already open keep-alive connection and a
+    "miss" is a request that had to open a new connection (TCP+TLS handshake).
+    Counters are read from the underlying urllib3 pools, so they cover every
+    host the session has talked to.
+    """
+    stats = {"requests": 0, "hits": 0, "misses": 0, "pools": 0}
+    if _session is None:
+        return stats
+    seen = set()
+    for adapter in _session.adapters.values():
+        if id(adapter) in seen:
+            continue
+        seen.add(id(adapter))
+        pools = adapter.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            stats["pools"] += 1
+            stats["requests"] += pool.num_requests
+            stats["misses"] += pool.num_connections
+    stats["hits"] = max(stats["requests"] - stats["misses"], 0)
+    return stats
+
+
+def close_session() -> None:
+    """Closes the shared session and its pooled connections."""
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
+
+
+def get_async_client() -> httpx.AsyncClient:
+    """
+    Returns the httpx.AsyncClient shared by the async Box tools on the running
+    event loop.
+
+    Must be called from inside a coroutine. The client uses the same pool sizes
+    and timeouts as the synchronous session.
+    """
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=BOX_POOL_MAXSIZE,
+                max_keepalive_connections=BOX_POOL_MAXSIZE,
+            ),
+            timeout=httpx.Timeout(BOX_READ_TIMEOUT, connect=BOX_CONNECT_TIMEOUT),
+        )
+        _async_clients[loop] = client
+        logger.info(f"Created async Box HTTP client (max_connections={BOX_POOL_MAXSIZE})")
+    return client
+
+
+async def arequest(method: str, url: str, timeout=None, **kwargs) -> httpx.Response:
+    """
+    Sends a request through the shared async Box client.
+
+    Args:
+      method: HTTP method, e.g. "GET" or "POST".
+      url: Full Box API URL.
+      timeout: Per-call timeout in seconds. Defaults to the client timeouts.
+      **kwargs: Passed through to httpx.AsyncClient.request.
+
+    Returns:
+      The httpx.Response. HTTP errors are not raised here; 429 and 5xx
+      responses and connection errors are retried first, see box_resilience.
+    """
+    if timeout is not None:
+        kwargs["timeout"] = timeout
+    client = get_async_client()
+    with box_telemetry.http_span(method, url, kwargs.get("json")) as span:
+        response = await asend_with_retries(
+            lambda: client.request(method, url, **kwargs), method, url
+        )
+        box_telemetry.record_response(span, response)
+        return response
+
+
+async def aget(url: str, **kwargs) -> httpx.Response:
+    return await arequest("GET", url, **kwargs)
+
+
+async def apost(url: str, **kwargs) -> httpx.Response:
+    return await arequest("POST", url, **kwargs)
+
+
+async def aclose_async_client() -> None:
+    """Closes the async client bound to the running event loop, if any."""
+    client = _async_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+
+# ----- Box API client -----
+
+# Session state key holding the tenant whose credentials the tools use.
+TENANT_STATE_KEY = "box_tenant"
+# Hub names understood by BoxClient.ask_hub, mapped to BoxCredentials fields.
+HUBS = {"products": "hub_id", "gtm": "gtm_hub_id"}
+
+_box_clients = {}
+_box_clients_lock = threading.Lock()
+
+
+@dataclass(frozen=True)
+class BoxCredentials:
+    token: str
+    hub_id: str
+    gtm_hub_id: str
+    gtm_token: str
+
+
+def env_credentials(tenant: str = None) -> BoxCredentials:
+    """
+    Reads a tenant's credentials from the environment.
+
+    The default tenant uses BOX_HUB_TOKEN, BOX_HUB_ID, BOX_HUB_GTM_ID and the
+    optional BOX_HUB_GTM_TOKEN. Tenant "acme" uses the same names with a
+    BOX_ACME_ prefix instead of BOX_, e.g. BOX_ACME_HUB_TOKEN.
+    """
+    prefix = f"BOX_{tenant.upper()}_" if tenant else "BOX_"
+    token = os.getenv(f"{prefix}HUB_TOKEN", "YOUR_HUB_TOKEN_HERE")
+    return BoxCredentials(
+        token=token,
+        hub_id=os.getenv(f"{prefix}HUB_ID", "YOUR_BOX_HUB_ID_HERE"),
+        gtm_hub_id=os.getenv(f"{prefix}HUB_GTM_ID", "YOUR_BOX_HUB_GTM_ID_HERE"),
+        gtm_token=os.getenv(f"{prefix}HUB_GTM_TOKEN", token),
+    )
+
+
+def _next_page(response_data: dict, offset: int, returned: int, max_results: int):
+    """Returns the offset of the next search page, or None when the search is exhausted."""
+    entries = response_data.get("entries") or []
+    next_offset = offset + len(entries)
+    total_count = response_data.get("total_count", next_offset)
+    if not entries or next_offset >= total_count or returned >= max_results:
+        return None
+    return next_offset
+
+
+class BoxClient:
+    """
+    Box API client for one tenant. The Box tools are thin wrappers over it.
+
+    Credentials are resolved on first use through credentials_provider (the
+    environment by default), not at import. Every BoxClient shares the
+    process-wide HTTP session, async clients, resilience layer and answer
+    cache; answers are cached per tenant.
+
+    Methods raise the requests (sync) or httpx (async) errors of the
+    underlying call; turning them into messages for the agent is left to the
+    tools.
+    """
+
+    def __init__(self, tenant: str = None, credentials_provider=env_credentials):
+        self.tenant = tenant
+        self._credentials_provider = credentials_provider
+        self._credentials = None
+        self._lock = threading.Lock()
+
+    @property
+    def credentials(self) -> BoxCredentials:
+        if self._credentials is None:
+            with self._lock:
+                if self._credentials is None:
+                    self._credentials = self._credentials_provider(self.tenant)
+        return self._credentials
+
+    def hub_id(self, hub: str = "products") -> str:
+        return getattr(self.credentials, HUBS[hub])
+
+    def _headers(self, token: str = None) -> dict:
+        return {
+            "Authorization": f"Bearer {token or self.credentials.token}",
+            "Content-Type": "application/json",
+        }
+
+    # Request builders
+
+    def hub_ask_request(self, prompt: str, hub: str = "products"):
+        """Returns the (url, headers, payload) for a Box Hub ask call."""
+        token = self.credentials.gtm_token if hub == "gtm" else self.credentials.token
+        payload = {
+            "mode": "multiple_item_qa",
+            "items": [
+                {
+                    "type": "hubs",
+                    "id": self.hub_id(hub)
+                }
+            ],
+            "prompt": prompt,
+            "llm": { # Specify model if needed - check Box API docs
+               # "model": "claude_3_opus" # Example
+            },
+            "includes_citations": False # Set to True if you want citations
+        }
+        return api_url("ai/ask"), self._headers(token), payload
+
+    def ai_ask_request(self, prompt: str, items_list: list):
+        """Returns the (url, headers, payload) for a Box AI ask call over files."""
+        payload = {
+            "mode": "multiple_item_qa",
+            "items": items_list,
+            "prompt": prompt,
+            "includes_citations": True
+        }
+        return api_url("ai/ask"), self._headers(), payload
+
+    def search_request(self, prompt: str, offset: int, limit: int, fields: str):
+        """Returns the (url, headers, params) for one Box search page."""
+        params = {"query": prompt, "offset": offset, "limit": limit}
+        if fields:
+            params["fields"] = fields
+        return api_url("search"), {"Authorization": f"Bearer {self.credentials.token}"}, params
+
+    # Hub answers, served from the answer cache when possible
+
+    def _cache_key(self, prompt: str, hub: str) -> str:
+        return box_cache.make_key(prompt, self.hub_id(hub), "multiple_item_qa", self.tenant)
+
+    def _cached_answer(self, prompt: str, hub: str):
+        cache = box_cache.get_answer_cache()
+        answer = cache.get(self._cache_key(prompt, hub)) if cache is not None else None
+        if answer is not None:
+            logger.info("Box Hub answer served from cache")
+            return {"answer": answer}
+        return None
+
+    def _cache_answer(self, prompt: str, hub: str, response_data: dict) -> None:
+        cache = box_cache.get_answer_cache()
+        if cache is not None and response_data.get("answer"):
+            cache.set(self._cache_key(prompt, hub), response_data["answer"], tag=self.hub_id(hub))
+
+    def ask_hub(self, prompt: str, hub: str = "products") -> dict:
+        """Asks a Box Hub ("products" or "gtm") and returns the response data."""
+        cached = self._cached_answer(prompt, hub)
+        if cached is not None:
+            return cached
+        url, headers, payload = self.hub_ask_request(prompt, hub)
+        response = post(url, headers=headers, json=payload)
+        logger.info(f"Box Hub ask API response status: {response.status_code}")
+        response.raise_for_status()
+        response_data = response.json()
+        self._cache_answer(prompt, hub, response_data)
+        return response_data
+
+    async def aask_hub(self, prompt: str, hub: str = "products") -> dict:
+        """Async version of ask_hub."""
+        cached = self._cached_answer(prompt, hub)
+        if cached is not None:
+            return cached
+        url, headers, payload = self.hub_ask_request(prompt, hub)
+        response = await apost(url, headers=headers, json=payload)
+        logger.info(f"Box Hub ask API response status: {response.status_code}")
+        response.raise_for_status()
+        response_data = response.json()
+        self._cache_answer(prompt, hub, response_data)
+        return response_data
+
+    async def astream_hub(self, prompt: str, hub: str = "products"):
+        """
+        Asks a Box Hub and yields the response in pieces as Box sends them.
+
+        Yields response dicts shaped like the ask response, whose "answer"
+        holds the next piece of answer text. A cached answer, or a response
+        Box did not stream, comes as a single dict.
+        """
+        cached = self._cached_answer(prompt, hub)
+        if cached is not None:
+            yield cached
+            return
+        url, headers, payload = self.hub_ask_request(prompt, hub)
+        answer = []
+        async for piece in self._astream_answer(url, headers, payload):
+            answer.append(piece.get("answer") or "")
+            yield piece
+        self._cache_answer(prompt, hub, {"answer": "".join(answer)})
+
+    async def _astream_answer(self, url: str, headers: dict, payload: dict):
+        """POSTs an ask request accepting an event stream and yields each data event."""
+        client = get_async_client()
+        request = client.build_request(
+            "POST", url, json=payload,
+            headers={**headers, "Accept": "text/event-stream, application/json"},
+        )
+        # The span is not made current across yields, which may resume in another context.
+        span = box_telemetry.start_http_span("POST", url, payload)
+        try:
+            with box_telemetry.use_span(span):
+                response = await asend_with_retries(lambda: client.send(request, stream=True), "POST", url)
+        except BaseException:
+            span.end()
+            raise
+        body_size = 0
+        try:
+            logger.info(f"Box ask API response status: {response.status_code} (streamed)")
+            if response.is_error:
+                body_size = len(await response.aread())
+            response.raise_for_status()
+            if not response.headers.get("Content-Type", "").startswith("text/event-stream"):
+                body_size = len(await response.aread())
+                yield response.json()
+                return
+            async for line in response.aiter_lines():
+                body_size += len(line) + 1
+                if not line.startswith("data:"):
+                    continue
+                data = line[len("data:"):].strip()
+                if data == "[DONE]":
+                    break
+                if data:
+                    yield json.loads(data)
+        finally:
+            await response.aclose()
+            box_telemetry.record_response(span, response, body_size)
+            span.end()
+
+    # Box AI over files
+
+    def ask_items(self, prompt: str, items_list: list) -> dict:
+        """Asks Box AI about the given file objects and returns the response data."""
+        url, headers, payload = self.ai_ask_request(prompt, items_list)
+        response = post(url, headers=headers, json=payload)
+        logger.info(f"Box ask API response status: {response.status_code} ({len(items_list)} items)")
+        response.raise_for_status()
+        return response.json()
+
+    async def aask_items(self, prompt: str, items_list: list) -> dict:
+        """Async version of ask_items."""
+        url, headers, payload = self.ai_ask_request(prompt, items_list)
+        response = await apost(url, headers=headers, json=payload)
+        logger.info(f"Box ask API response status: {response.status_code} ({len(items_list)} items)")
+        response.raise_for_status()
+        return response.json()
+
+    async def astream_items(self, prompt: str, items_list: list):
+        """Streaming version of aask_items, see astream_hub."""
+        url, headers, payload = self.ai_ask_request(prompt, items_list)
+        async for piece in self._astream_answer(url, headers, payload):
+            yield piece
+
+    # Search
+
+    def iter_search(self, prompt: str, page_size: int, max_results: int, fields: str):
+        """Lazily yields search entries, fetching pages only as they are consumed."""
+        offset, returned = 0, 0
+        while offset is not None:
+            limit = min(page_size, max_results - returned)
+            url, headers, params = self.search_request(prompt, offset, limit, fields)
+            response = get(url, headers=headers, params=params)
+            logger.info(f"Box Search API response status: {response.status_code} (offset {offset})")
+            response.raise_for_status()
+
+            response_data = response.json()
+            for entry in (response_data.get("entries") or [])[:max_results - returned]:
+                returned += 1
+                yield entry
+            offset = _next_page(response_data, offset, returned, max_results)
+
+    async def aiter_search(self, prompt: str, page_size: int, max_results: int, fields: str):
+        """Async version of iter_search."""
+        offset, returned = 0, 0
+        while offset is not None:
+            limit = min(page_size, max_results - returned)
+            url, headers, params = self.search_request(prompt, offset, limit, fields)
+            response = await aget(url, headers=headers, params=params)
+            logger.info(f"Box Search API response status: {response.status_code} (offset {offset})")
+            response.raise_for_status()
+
+            response_data = response.json()
+            for entry in (response_data.get("entries") or [])[:max_results - returned]:
+                returned += 1
+                yield entry
+            offset = _next_page(response_data, offset, returned, max_results)
+
+
+    # Folder listing and the event stream, used by the local search index
+
+    def iter_folder_items(self, folder_id: str, fields: str, page_size: int = 1000):
+        """Yields every item of a folder, paging through /folders/{id}/items."""
+        offset = 0
+        while True:
+            response = get(
+                api_url(f"folders/{folder_id}/items"),
+                headers={"Authorization": f"Bearer {self.credentials.token}"},
+                params={"fields": fields, "limit": page_size, "offset": offset},
+            )
+            response.raise_for_status()
+            response_data = response.json()
+            entries = response_data.get("entries") or []
+            yield from entries
+            offset += len(entries)
+            if not entries or offset >= response_data.get("total_count", offset):
+                return
+
+    def get_events(self, stream_position, limit: int = 500) -> dict:
+        """Returns one page of the user's change events, starting at stream_position ("now" for the current position)."""
+        response = get(
+            api_url("events"),
+            headers={"Authorization": f"Bearer {self.credentials.token}"},
+            params={"stream_type": "changes", "stream_position": stream_position, "limit": limit},
+        )
+        response.raise_for_status()
+        return response.json()
+
+
+def get_box_client(tenant: str = None) -> BoxClient:
+    """Returns the BoxClient for a tenant (None for the default), creating it on first use."""
+    client = _box_clients.get(tenant)
+    if client is None:
+        with _box_clients_lock:
+            client = _box_clients.get(tenant)
+            if client is None:
+                client = _box_clients[tenant] = BoxClient(tenant)
+    return client
+
+
+def set_box_client(client: BoxClient) -> None:
+    """Registers a client for its tenant, e.g. one with a custom credentials provider."""
+    with _box_clients_lock:
+        _box_clients[client.tenant] = client
+
+
+def client_for_context(tool_context=None) -> BoxClient:
+    """Returns the BoxClient for the tenant named in the session state ("box_tenant"), or the default."""
+    tenant = tool_context.state.get(TENANT_STATE_KEY) if tool_context is not None else None
+    return get_box_client(tenant)
@@ -1,26 +1,121 @@
 # ----- File: multi_tool_agent/agent.py -----
 
 import os
-import requests
 import logging # Optional: for better logging
-from dotenv import load_dotenv
-
-# --- Configuration ---
-# Load environment variables from a .env file if it exists
-load_dotenv()
+from typing import Optional
+from urllib.parse import unquote
+import httpx
+import requests
+from google.adk.tools import ToolContext
+from . import box_client
+from . import box_index
+from . import box_results
+from . import box_speculation
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# !! SECURITY WARNING !!
-# Replace these with a secure method, e.g., environment variables
-BOX_METADATA_TOKEN = os.getenv("BOX_METADATA_TOKEN", "YOUR_METADATA_TOKEN_HERE")
-BOX_HUB_TOKEN = os.getenv("BOX_HUB_TOKEN", "YOUR_HUB_TOKEN_HERE")
-BOX_ENTERPRISE_ID = os.getenv("BOX_ENTERPRISE_ID", "YOUR_BOX_ENTERPRISE_ID_HERE")
-BOX_HUB_ID = os.getenv("BOX_HUB_ID", "YOUR_BOX_HUB_ID_HERE") # e.g., "216163155"
 
+# Pagination. Box allows up to 200 entries per search page.
+BOX_SEARCH_PAGE_SIZE = int(os.getenv("BOX_SEARCH_PAGE_SIZE", "30"))
+# One page by default; raise the cap to opt in to further (serial) pages.
+BOX_SEARCH_MAX_RESULTS = int(os.getenv("BOX_SEARCH_MAX_RESULTS", str(BOX_SEARCH_PAGE_SIZE)))
+# Only these fields are returned for each entry, which keeps pages small.
+BOX_SEARCH_FIELDS = os.getenv("BOX_SEARCH_FIELDS", "id,name,type")
+
+
+def iter_search_results(prompt: str, page_size: int = None, max_results: int = None, fields: str = None,
+                        client: box_client.BoxClient = None):
+    """
+    Lazily yields Box search entries, fetching pages only as they are consumed.
+
+    Args:
+      prompt: The search query.
+      page_size: Entries requested per page (limit). Defaults to BOX_SEARCH_PAGE_SIZE.
+      max_results: Stop after this many entries. Defaults to BOX_SEARCH_MAX_RESULTS.
+      fields: Comma separated field projection. Defaults to BOX_SEARCH_FIELDS.
+      client: BoxClient to search through. Defaults to the default tenant's client.
+
+    Yields:
+      Entry dicts from the search response.
+
+    Raises:
+      requests.exceptions.RequestException: If a page request fails.
+    """
+    client = client or box_client.get_box_client()
+    page_size = min(page_size or BOX_SEARCH_PAGE_SIZE, 200)
+    max_results = max_results or BOX_SEARCH_MAX_RESULTS
+    fields = BOX_SEARCH_FIELDS if fields is None else fields
+    # The agent is told to send %20 instead of spaces, so undo that before
+    # the query is encoded again as a parameter.
+    return client.iter_search(unquote(prompt), page_size, max_results, fields)
+
+
+def aiter_search_results(prompt: str, page_size: int = None, max_results: int = None, fields: str = None,
+                         client: box_client.BoxClient = None):
+    """
+    Async version of iter_search_results.
+
+    Raises:
+      httpx.HTTPError: If a page request fails.
+    """
+    client = client or box_client.get_box_client()
+    page_size = min(page_size or BOX_SEARCH_PAGE_SIZE, 200)
+    max_results = max_results or BOX_SEARCH_MAX_RESULTS
+    fields = BOX_SEARCH_FIELDS if fields is None else fields
+    return client.aiter_search(unquote(prompt), page_size, max_results, fields)
+
+
+def _local_results(prompt: str, client: box_client.BoxClient):
+    """Returns matching entries from the local search index, or None when Box has to be asked."""
+    index = box_index.get_search_index(client)
+    if index is None:
+        return None
+    try:
+        entries = index.search(unquote(prompt), BOX_SEARCH_MAX_RESULTS)
+    except Exception as e:
+        logger.warning(f"Local search index query failed: {e}")
+        return None
+    if entries:
+        logger.info(f"Box search served {len(entries)} entries from the local index")
+        return entries
+    return None
+
+
+async def search_entries(prompt: str, client: box_client.BoxClient = None) -> list:
+    """
+    Returns the entries for a search, from the local index when it has matches
+    and from Box otherwise. BoxFlowAgent also runs this speculatively.
+
+    Raises:
+      httpx.HTTPError: If a page request fails.
+    """
+    client = client or box_client.get_box_client()
+    entries = _local_results(prompt, client)
+    if entries is None:
+        entries = [entry async for entry in aiter_search_results(prompt, client=client)]
+    return entries
+
+
+def _format_results(prompt: str, entries: list) -> str:
+    """Formats Box search entries as a bulleted list, or compact JSON with BOX_RESULT_FORMAT=compact."""
+    if box_results.compact_enabled():
+        return box_results.to_json(box_results.compact_search(unquote(prompt), entries))
+    if entries:
+        # Format the results nicely
+        results = []
+        for entry in entries:
+            name = entry.get("name", "Unnamed item")
+            item_type = entry.get("type", "unknown")
+            item_id = entry.get("id", "unknown")
+            results.append(f"- {name} (Type: {item_type}, ID: {item_id})")
 
-def box_generic_search(prompt: str) -> str:
+        return "Found the following items:\n" + "\n".join(results)
+    else:
+        # Handle cases where the API succeeds but provides no results
+        return f"No Box content found matching '{prompt}'."
+
+
+def box_generic_search(prompt: str, tool_context: Optional[ToolContext] = None) -> str:
     """
     Sends a prompt to a specific Box Search to get answers based on its associated content.
 
@@ -31,32 +126,13 @@ def box_generic_search(prompt: str) -> str:
       The answer provided by the Box Hub, or an error message.
     """
     logger.info(f"Finding Box content from: '{prompt}'")
-    url = f"https://api.box.com/2.0/search?query={prompt}"
-    headers = {
-        "Authorization": f"Bearer {BOX_HUB_TOKEN}"
-    }
-   
+
     try:
-        # Change this line from POST to GET
-        response = requests.get(url, headers=headers)  # Change from POST to GET
-        logger.info(f"Box Search API response status: {response.status_code}")
-        response.raise_for_status() # Check for HTTP errors
-
-        response_data = response.json()
-        entries = response_data.get("entries")
-        if entries:
-            # Format the results nicely
-            results = []
-            for entry in entries:
-                name = entry.get("name", "Unnamed item")
-                item_type = entry.get("type", "unknown")
-                item_id = entry.get("id", "unknown")
-                results.append(f"- {name} (Type: {item_type}, ID: {item_id})")
-            
-            return "Found the following items:\n" + "\n".join(results)
-        else:
-            # Handle cases where the API succeeds but provides no results
-            return f"No Box content found matching '{prompt}'."
+        client = box_client.client_for_context(tool_context)
+        entries = _local_results(prompt, client)
+        if entries is None:
+            entries = list(iter_search_results(prompt, client=client))
+        return _format_results(prompt, entries)
 
     except requests.exceptions.RequestException as e:
         logger.error(f"Error during Box Search call: {e}")
@@ -64,4 +140,34 @@ def box_generic_search(prompt: str) -> str:
         return f"API Error: Failed to ask Box Search. {error_details}"
     except Exception as e:
         logger.error(f"An unexpected error occurred in box_generic_search: {e}", exc_info=True)
-        return f"An unexpected error occurred: {e}"
\ No newline at end of file
+        return f"An unexpected error occurred: {e}"
+
+
+async def box_generic_search_async(prompt: str, tool_context: Optional[ToolContext] = None) -> str:
+    """
+    Sends a prompt to a specific Box Search to get answers based on its associated content.
+    Non-blocking version of box_generic_search for use on the agent event loop.
+
+    Args:
+      prompt: The question or prompt to ask the Box search.
+
+    Returns:
+      The answer provided by the Box Hub, or an error message.
+    """
+    logger.info(f"Finding Box content from: '{prompt}'")
+
+    try:
+        entries = await box_speculation.take(tool_context, prompt)
+        if entries is None:
+            entries = await search_entries(prompt, box_client.client_for_context(tool_context))
+        return _format_results(prompt, entries)
+
+    except httpx.HTTPStatusError as e:
+        logger.error(f"Error during Box Search call: {e}")
+        return f"API Error: Failed to ask Box Search. Status: {e.response.status_code}. Details: {e.response.text}"
+    except httpx.HTTPError as e:
+        logger.error(f"Error during Box Search call: {e}")
+        return "API Error: Failed to ask Box Search. No response details."
+    except Exception as e:
+        logger.error(f"An unexpected error occurred in box_generic_search_async: {e}", exc_info=True)
+        return f"An unexpected error occurred: {e}"
@@ -1,21 +1,36 @@
 
-import os
-import logging 
+import logging
+from typing import Optional
+import httpx
 import requests
-from dotenv import load_dotenv
-load_dotenv()
-logging.basicConfig(level=logging.INFO)
+from google.adk.tools import ToolContext
+from . import box_client
+from . import box_results
+from . import box_stream
 logger = logging.getLogger(__name__)
 
-# !! SECURITY WARNING !!
-# Replace these with a secure method, e.g., environment variables
-BOX_METADATA_TOKEN = os.getenv("BOX_METADATA_TOKEN", "YOUR_METADATA_TOKEN_HERE")
-BOX_HUB_TOKEN = os.getenv("BOX_HUB_TOKEN", "YOUR_HUB_TOKEN_HERE")
-BOX_ENTERPRISE_ID = os.getenv("BOX_ENTERPRISE_ID", "YOUR_BOX_ENTERPRISE_ID_HERE")
-BOX_HUB_ID = os.getenv("BOX_HUB_ID", "YOUR_BOX_HUB_ID_HERE") # e.g., "216163155"
 
+def _parse_answer(response_data: dict) -> str:
+  """Extracts the answer text from a Box Hub ask response."""
+  answer = response_data.get("answer")
+  if answer:
+      # Return only the answer text
+      return answer
+  else:
+      # Handle cases where the API succeeds but provides no answer
+      completion_reason = response_data.get("completion_reason", "No reason provided.")
+      logger.warning(f"Box Hub did not provide an answer. Reason: {completion_reason}")
+      return f"Box Hub did not provide an answer. Reason: {completion_reason}"
 
-def box_hub_ask(prompt: str) -> str:
+
+def _format_answer(response_data: dict, budget: int = None) -> str:
+  """Returns the answer text, or compact JSON within the token budget when BOX_RESULT_FORMAT=compact."""
+  if box_results.compact_enabled():
+    return box_results.to_json(box_results.compact_answer(response_data, budget=budget))
+  return _parse_answer(response_data)
+
+
+def box_hub_ask(prompt: str, tool_context: Optional[ToolContext] = None) -> str:
   """
   Sends a prompt to a specific Box AI Hub to get answers based on its associated content.
 
@@ -25,42 +40,10 @@ def box_hub_ask(prompt: str) -> str:
   Returns:
     The answer provided by the Box Hub, or an error message.
   """
-  logger.info(f"Asking Box Hub (ID: {BOX_HUB_ID}): '{prompt}'")
-  url = "https://api.box.com/2.0/ai/ask"
-  headers = {
-      "Authorization": f"Bearer {BOX_HUB_TOKEN}",
-      "Content-Type": "application/json"
-  }
-  payload = {
-      "mode": "multiple_item_qa",
-      "items": [
-          {
-              "type": "hubs",
-              "id": BOX_HUB_ID # Use configured Hub ID
-          }
-      ],
-      "prompt": prompt,
-      "llm": { # Specify model if needed - check Box API docs
-         # "model": "claude_3_opus" # Example
-      },
-      "includes_citations": False # Set to True if you want citations
-  }
-
+  client = box_client.client_for_context(tool_context)
   try:
-    response = requests.post(url, headers=headers, json=payload)
-    logger.info(f"Box Hub ask API response status: {response.status_code}")
-    response.raise_for_status() # Check for HTTP errors
-
-    response_data = response.json()
-    answer = response_data.get("answer")
-    if answer:
-        # Return only the answer text
-        return answer
-    else:
-        # Handle cases where the API succeeds but provides no answer
-        completion_reason = response_data.get("completion_reason", "No reason provided.")
-        logger.warning(f"Box Hub did not provide an answer. Reason: {completion_reason}")
-        return f"Box Hub did not provide an answer. Reason: {completion_reason}"
+    logger.info(f"Asking Box Hub (ID: {client.hub_id('products')}): '{prompt}'")
+    return _format_answer(client.ask_hub(prompt, "products"))
 
   except requests.exceptions.RequestException as e:
     logger.error(f"Error during Box Hub API call: {e}")
@@ -69,3 +52,52 @@ def box_hub_ask(prompt: str) -> str:
   except Exception as e:
       logger.error(f"An unexpected error occurred in box_hub_ask: {e}", exc_info=True)
       return f"An unexpected error occurred: {e}"
+
+
+async def ask_hub_async(prompt: str, hub: str = "products", tool_context: Optional[ToolContext] = None,
+                        stream: bool = True, budget: int = None) -> str:
+  """
+  Asks a Box Hub ("products" or "gtm") without blocking the event loop.
+
+  When streaming is enabled (BOX_AI_STREAM) and BoxFlowAgent is listening,
+  answer text is forwarded to it as it arrives; the full answer is returned
+  either way. budget overrides BOX_RESULT_TOKEN_BUDGET for compact results.
+  Returns an error message instead of raising.
+  """
+  client = box_client.client_for_context(tool_context)
+  queue = box_stream.channel_for(tool_context) if stream else None
+  try:
+    logger.info(f"Asking Box Hub (ID: {client.hub_id(hub)}): '{prompt}'")
+    if queue is None:
+      return _format_answer(await client.aask_hub(prompt, hub), budget)
+
+    answer, completion_reason = [], None
+    async for piece in client.astream_hub(prompt, hub):
+      box_stream.publish(queue, piece.get("answer"))
+      answer.append(piece.get("answer") or "")
+      completion_reason = piece.get("completion_reason") or completion_reason
+    return _format_answer({"answer": "".join(answer), "completion_reason": completion_reason or "No reason provided."}, budget)
+
+  except httpx.HTTPStatusError as e:
+    logger.error(f"Error during Box Hub API call: {e}")
+    return f"API Error: Failed to ask Box Hub. Status: {e.response.status_code}. Details: {e.response.text}"
+  except httpx.HTTPError as e:
+    logger.error(f"Error during Box Hub API call: {e}")
+    return "API Error: Failed to ask Box Hub. No response details."
+  except Exception as e:
+      logger.error(f"An unexpected error occurred while asking Box Hub {hub}: {e}", exc_info=True)
+      return f"An unexpected error occurred: {e}"
+
+
+async def box_hub_ask_async(prompt: str, tool_context: Optional[ToolContext] = None) -> str:
+  """
+  Sends a prompt to a specific Box AI Hub to get answers based on its associated content.
+  Non-blocking version of box_hub_ask for use on the agent event loop.
+
+  Args:
+    prompt: The question or prompt to ask the Box Hub.
+
+  Returns:
+    The answer provided by the Box Hub, or an error message.
+  """
+  return await ask_hub_async(prompt, "products", tool_context)
@@ -1,20 +1,13 @@
-import os
-import logging 
+import logging
+from typing import Optional
 import requests
-from dotenv import load_dotenv
-load_dotenv()
-logging.basicConfig(level=logging.INFO)
+from google.adk.tools import ToolContext
+from . import box_client
+from .box_hub_ask import _format_answer, ask_hub_async
 logger = logging.getLogger(__name__)
 
-# !! SECURITY WARNING !!
-# Replace these with a secure method, e.g., environment variables
-BOX_METADATA_TOKEN = os.getenv("BOX_METADATA_TOKEN", "YOUR_METADATA_TOKEN_HERE")
-BOX_HUB_TOKEN = os.getenv("BOX_HUB_TOKEN", "YOUR_HUB_TOKEN_HERE")
-BOX_ENTERPRISE_ID = os.getenv("BOX_ENTERPRISE_ID", "YOUR_BOX_ENTERPRISE_ID_HERE")
-BOX_HUB_ID = os.getenv("BOX_HUB_ID", "YOUR_BOX_HUB_ID_HERE") # e.g., "216163155"
-BOX_HUB_GTM_ID = os.getenv("BOX_HUB_GTM_ID", "YOUR_BOX_HUB_GTM_ID_HERE") # e.g., "216163155"
 
-def box_hub_ask_GTM(prompt: str) -> str:
+def box_hub_ask_GTM(prompt: str, tool_context: Optional[ToolContext] = None) -> str:
   """
   Sends a prompt to a specific Box AI Hub to get answers based on its associated content. This is the Go To Market (GTM) specific version.
 
@@ -24,47 +17,29 @@ def box_hub_ask_GTM(prompt: str) -> str:
   Returns:
     The answer provided by the Box Hub, or an error message.
   """
-  logger.info(f"Asking Box Hub (ID: {BOX_HUB_GTM_ID}): '{prompt}'")
-  url = "https://api.box.com/2.0/ai/ask"
-  headers = {
-      "Authorization": f"Bearer {BOX_HUB_GTM_ID}",
-      "Content-Type": "application/json"
-  }
-  payload = {
-      "mode": "multiple_item_qa",
-      "items": [
-          {
-              "type": "hubs",
-              "id": BOX_HUB_GTM_ID # Use configured Hub ID
-          }
-      ],
-      "prompt": prompt,
-      "llm": { # Specify model if needed - check Box API docs
-         # "model": "claude_3_opus" # Example
-      },
-      "includes_citations": False # Set to True if you want citations
-  }
-
+  client = box_client.client_for_context(tool_context)
   try:
-    response = requests.post(url, headers=headers, json=payload)
-    logger.info(f"Box Hub ask API response status: {response.status_code}")
-    response.raise_for_status() # Check for HTTP errors
-
-    response_data = response.json()
-    answer = response_data.get("answer")
-    if answer:
-        # Return only the answer text
-        return answer
-    else:
-        # Handle cases where the API succeeds but provides no answer
-        completion_reason = response_data.get("completion_reason", "No reason provided.")
-        logger.warning(f"Box Hub did not provide an answer. Reason: {completion_reason}")
-        return f"Box Hub did not provide an answer. Reason: {completion_reason}"
+    logger.info(f"Asking Box Hub (ID: {client.hub_id('gtm')}): '{prompt}'")
+    return _format_answer(client.ask_hub(prompt, "gtm"))
 
   except requests.exceptions.RequestException as e:
     logger.error(f"Error during Box Hub API call: {e}")
     error_details = f"Status: {e.response.status_code}. Details: {e.response.text}" if e.response else "No response details."
     return f"API Error: Failed to ask Box Hub. {error_details}"
   except Exception as e:
-      logger.error(f"An unexpected error occurred in box_hub_ask: {e}", exc_info=True)
+      logger.error(f"An unexpected error occurred in box_hub_ask_GTM: {e}", exc_info=True)
       return f"An unexpected error occurred: {e}"
+
+
+async def box_hub_ask_GTM_async(prompt: str, tool_context: Optional[ToolContext] = None) -> str:
+  """
+  Sends a prompt to a specific Box AI Hub to get answers based on its associated content. This is the Go To Market (GTM) specific version.
+  Non-blocking version of box_hub_ask_GTM for use on the agent event loop.
+
+  Args:
+    prompt: The question or prompt to ask the Box Hub.
+
+  Returns:
+    The answer provided by the Box Hub, or an error message.
+  """
+  return await ask_hub_async(prompt, "gtm", tool_context)
@@ -0,0 +1,63 @@
+import os
+import json
+import time
+import asyncio
+import logging
+from typing import Optional
+from google.adk.tools import ToolContext
+from . import box_results
+from .box_hub_ask import ask_hub_async
+logger = logging.getLogger(__name__)
+
+# Per-hub deadline in seconds. A hub that does not answer in time is reported
+# as timed out instead of holding up the other hub's answer.
+BOX_HUB_FANOUT_TIMEOUT = float(os.getenv("BOX_HUB_FANOUT_TIMEOUT", "20"))
+
+# (source label, hub name) for every hub queried by box_hub_ask_all.
+HUBS = (
+    ("Products", "products"),
+    ("GTM", "gtm"),
+)
+
+
+async def _ask_with_deadline(source: str, hub: str, prompt: str, timeout: float, tool_context=None,
+                             budget: int = None) -> str:
+  start = time.perf_counter()
+  try:
+    # Not streamed: two hubs answering at once would interleave their text.
+    answer = await asyncio.wait_for(
+        ask_hub_async(prompt, hub, tool_context, stream=False, budget=budget), timeout=timeout
+    )
+  except asyncio.TimeoutError:
+    logger.warning(f"Box Hub {source} did not answer within {timeout}s")
+    answer = f"Box Hub did not provide an answer. Reason: timed out after {timeout} seconds."
+  logger.info(f"Box Hub {source} answered in {time.perf_counter() - start:.2f}s")
+  return answer
+
+
+async def box_hub_ask_all(prompt: str, tool_context: Optional[ToolContext] = None) -> str:
+  """
+  Sends a prompt to both the Products and the GTM (Go To Market) Box Hubs at the same time.
+  Use this when a question could be answered by either hub.
+
+  Args:
+    prompt: The question or prompt to ask the Box Hubs.
+
+  Returns:
+    The answer from each hub, labelled with the hub it came from.
+  """
+  logger.info(f"Asking {len(HUBS)} Box Hubs concurrently: '{prompt}'")
+  # Compact results share one token budget between the hubs.
+  budget = box_results.BOX_RESULT_TOKEN_BUDGET // len(HUBS)
+  answers = await asyncio.gather(
+      *(_ask_with_deadline(source, hub, prompt, BOX_HUB_FANOUT_TIMEOUT, tool_context, budget) for source, hub in HUBS)
+  )
+  if box_results.compact_enabled():
+    # Errors and timeouts are plain text, answers are already compact JSON.
+    return box_results.to_json({
+        source: json.loads(answer) if answer.startswith("{") else {"error": answer}
+        for (source, _), answer in zip(HUBS, answers)
+    })
+  return "\n\n".join(
+      f"Answer from Box Hub {source}:\n{answer}" for (source, _), answer in zip(HUBS, answers)
+  )
@@ -0,0 +1,382 @@
+import os
+import re
+import json
+import time
+import sqlite3
+import logging
+import argparse
+import threading
+from . import box_client
+logger = logging.getLogger(__name__)
+
+# Optional local mirror of Box file names, paths and metadata, searched with
+# SQLite FTS5. box_generic_search serves queries from it when it has matches
+# and falls back to the Box search API otherwise. Off by default.
+BOX_SEARCH_INDEX = os.getenv("BOX_SEARCH_INDEX", "off").lower() == "on"
+BOX_SEARCH_INDEX_PATH = os.getenv("BOX_SEARCH_INDEX_PATH", "box_search_index.sqlite3")
+# Folder whose contents are mirrored; "0" is the user's whole tree.
+BOX_SEARCH_INDEX_ROOT = os.getenv("BOX_SEARCH_INDEX_ROOT", "0")
+BOX_SEARCH_INDEX_FIELDS = os.getenv(
+    "BOX_SEARCH_INDEX_FIELDS", "id,type,name,path_collection,modified_at,description"
+)
+# Seconds between incremental syncs from the Box event stream.
+BOX_SEARCH_INDEX_SYNC_INTERVAL = float(os.getenv("BOX_SEARCH_INDEX_SYNC_INTERVAL", "60"))
+# The index is not used if it has not synced for this many seconds.
+BOX_SEARCH_INDEX_MAX_STALENESS = float(os.getenv("BOX_SEARCH_INDEX_MAX_STALENESS", "900"))
+
+# Change events that add or update an item, and ones that remove it.
+UPSERT_EVENTS = {
+    "ITEM_CREATE", "ITEM_UPLOAD", "ITEM_MOVE", "ITEM_COPY", "ITEM_RENAME", "ITEM_UNDELETE_VIA_TRASH",
+}
+DELETE_EVENTS = {"ITEM_TRASH"}
+
+_TERM_RE = re.compile(r"\w+")
+
+
+def _path(item: dict) -> str:
+    entries = (item.get("path_collection") or {}).get("entries") or []
+    return "/".join(entry.get("name", "") for entry in entries)
+
+
+def _metadata_text(item: dict) -> str:
+    """Flattens the description and any metadata instances into searchable text."""
+    parts = [item.get("description") or ""]
+    metadata = item.get("metadata")
+    if metadata:
+        parts.append(" ".join(
+            str(value) for scope in metadata.values() for template in scope.values()
+            for key, value in template.items() if not key.startswith("$")
+        ))
+    return " ".join(part for part in parts if part)
+
+
+class BoxSearchIndex:
+    """
+    SQLite FTS5 index of the items under one Box folder.
+
+    A full sync walks the folder tree; after that, sync() applies the Box
+    change event stream from the last stored stream position, so only changed
+    items are fetched. Thread-safe: one connection guarded by a lock, like
+    box_cache.SQLiteCache.
+    """
+
+    def __init__(self, path: str, root_folder_id: str = BOX_SEARCH_INDEX_ROOT,
+                 fields: str = BOX_SEARCH_INDEX_FIELDS, max_staleness: float = BOX_SEARCH_INDEX_MAX_STALENESS):
+        self.path = path
+        self.root_folder_id = root_folder_id
+        self.fields = fields
+        self.max_staleness = max_staleness
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._sync_thread = None
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS items (
+                id TEXT PRIMARY KEY, type TEXT, name TEXT, path TEXT, metadata TEXT,
+                modified_at TEXT, synced_at REAL);
+            CREATE VIRTUAL TABLE IF NOT EXISTS items_fts USING fts5(
+                name, path, metadata, content='items', content_rowid='rowid');
+            CREATE TRIGGER IF NOT EXISTS items_ai AFTER INSERT ON items BEGIN
+                INSERT INTO items_fts(rowid, name, path, metadata)
+                VALUES (new.rowid, new.name, new.path, new.metadata);
+            END;
+            CREATE TRIGGER IF NOT EXISTS items_ad AFTER DELETE ON items BEGIN
+                INSERT INTO items_fts(items_fts, rowid, name, path, metadata)
+                VALUES ('delete', old.rowid, old.name, old.path, old.metadata);
+            END;
+            CREATE TRIGGER IF NOT EXISTS items_au AFTER UPDATE ON items BEGIN
+                INSERT INTO items_fts(items_fts, rowid, name, path, metadata)
+                VALUES ('delete', old.rowid, old.name, old.path, old.metadata);
+                INSERT INTO items_fts(rowid, name, path, metadata)
+                VALUES (new.rowid, new.name, new.path, new.metadata);
+            END;
+            CREATE TABLE IF NOT EXISTS sync_state (key TEXT PRIMARY KEY, value TEXT);
+        """)
+
+    # State
+
+    def _get_state(self, key: str):
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM sync_state WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_state(self, **values) -> None:
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO sync_state (key, value) VALUES (?, ?)",
+                [(key, str(value)) for key, value in values.items()],
+            )
+
+    @property
+    def last_sync_at(self) -> float:
+        value = self._get_state("last_sync_at")
+        return float(value) if value else 0.0
+
+    def is_fresh(self) -> bool:
+        return time.time() - self.last_sync_at <= self.max_staleness
+
+    # Writes
+
+    def _in_scope(self, item: dict) -> bool:
+        if self.root_folder_id == "0" or item.get("id") == self.root_folder_id:
+            return True
+        entries = (item.get("path_collection") or {}).get("entries") or []
+        return any(entry.get("id") == self.root_folder_id for entry in entries)
+
+    def upsert(self, items: list, synced_at: float = None) -> None:
+        synced_at = synced_at or time.time()
+        rows = [
+            (str(item["id"]), item.get("type"), item.get("name", ""), _path(item), _metadata_text(item),
+             item.get("modified_at"), synced_at)
+            for item in items if item.get("id")
+        ]
+        with self._lock:
+            self._conn.execute("BEGIN")
+            self._conn.executemany(
+                "INSERT INTO items (id, type, name, path, metadata, modified_at, synced_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?) ON CONFLICT(id) DO UPDATE SET "
+                "type = excluded.type, name = excluded.name, path = excluded.path, "
+                "metadata = excluded.metadata, modified_at = excluded.modified_at, synced_at = excluded.synced_at",
+                rows,
+            )
+            self._conn.execute("COMMIT")
+
+    def delete(self, item_ids: list) -> None:
+        with self._lock:
+            self._conn.executemany("DELETE FROM items WHERE id = ?", [(str(item_id),) for item_id in item_ids])
+
+    def _folder_prefix(self, folder_id: str):
+        """Returns the path of the indexed folder's children, or None if the folder is not indexed."""
+        with self._lock:
+            row = self._conn.execute("SELECT path, name FROM items WHERE id = ?", (str(folder_id),)).fetchone()
+        if row is None:
+            return None
+        path, name = row
+        return f"{path}/{name}" if path else name
+
+    def delete_folder(self, folder_id: str) -> None:
+        """Deletes a folder and everything indexed under it."""
+        prefix = self._folder_prefix(folder_id)
+        with self._lock:
+            self._conn.execute("BEGIN")
+            self._conn.execute("DELETE FROM items WHERE id = ?", (str(folder_id),))
+            if prefix is not None:
+                # Box names cannot contain "/", so the prefix matches only this folder's subtree.
+                self._conn.execute(
+                    "DELETE FROM items WHERE path = ? OR substr(path, 1, ?) = ?",
+                    (prefix, len(prefix) + 1, prefix + "/"),
+                )
+            self._conn.execute("COMMIT")
+
+    def upsert_folder(self, item: dict, client: box_client.BoxClient) -> None:
+        """
+        Updates a folder and the paths of everything under it, after a rename
+        or a move. A folder that is not indexed yet (moved into scope,
+        restored or copied) has its whole subtree fetched.
+        """
+        old_prefix = self._folder_prefix(item["id"])
+        self.upsert([item])
+        if old_prefix is None:
+            self._walk(client, item["id"], time.time())
+            return
+        new_prefix = self._folder_prefix(item["id"])
+        if new_prefix == old_prefix:
+            return
+        with self._lock:
+            self._conn.execute(
+                "UPDATE items SET path = ? || substr(path, ?) WHERE path = ? OR substr(path, 1, ?) = ?",
+                (new_prefix, len(old_prefix) + 1, old_prefix, len(old_prefix) + 1, old_prefix + "/"),
+            )
+
+    # Sync
+
+    def full_sync(self, client: box_client.BoxClient) -> int:
+        """Mirrors the whole folder tree and records the event stream position to continue from."""
+        started = time.time()
+        # Taken first, so changes made during the walk are replayed by sync().
+        stream_position = client.get_events("now").get("next_stream_position")
+        count = self._walk(client, self.root_folder_id, started)
+        with self._lock:
+            self._conn.execute("DELETE FROM items WHERE synced_at < ?", (started,))
+        self._set_state(stream_position=stream_position, last_sync_at=time.time(), last_full_sync_at=time.time())
+        logger.info(f"Box search index: full sync of {count} items in {time.time() - started:.1f}s")
+        return count
+
+    def _walk(self, client: box_client.BoxClient, folder_id: str, synced_at: float) -> int:
+        """Indexes everything under a folder; returns the number of items."""
+        folders, count = [folder_id], 0
+        while folders:
+            page = []
+            for item in client.iter_folder_items(folders.pop(), self.fields):
+                page.append(item)
+                if item.get("type") == "folder":
+                    folders.append(item["id"])
+            self.upsert(page, synced_at)
+            count += len(page)
+        return count
+
+    def sync(self, client: box_client.BoxClient) -> int:
+        """
+        Applies change events since the last sync, or runs a full sync the
+        first time. Returns the number of events applied.
+        """
+        with self._sync_lock:
+            stream_position = self._get_state("stream_position")
+            if stream_position is None:
+                self.full_sync(client)
+                return 0
+            applied = 0
+            while True:
+                page = client.get_events(stream_position)
+                events = page.get("entries") or []
+                upserts, deletes = {}, set()
+
+                def flush():
+                    if upserts:
+                        self.upsert(list(upserts.values()))
+                    if deletes:
+                        self.delete(list(deletes))
+                    upserts.clear()
+                    deletes.clear()
+
+                for event in events:
+                    item = event.get("source") or {}
+                    if item.get("type") not in ("file", "folder") or not item.get("id"):
+                        continue
+                    event_type = event.get("event_type")
+                    if event_type not in DELETE_EVENTS and event_type not in UPSERT_EVENTS:
+                        continue
+                    removed = event_type in DELETE_EVENTS or not self._in_scope(item)
+                    if item["type"] == "folder":
+                        # A folder event also changes everything under it; apply it
+                        # in stream order, after the file events batched so far.
+                        flush()
+                        if removed:
+                            self.delete_folder(item["id"])
+                        else:
+                            self.upsert_folder(item, client)
+                    elif removed:
+                        upserts.pop(item["id"], None)
+                        deletes.add(item["id"])
+                    else:
+                        deletes.discard(item["id"])
+                        upserts[item["id"]] = item
+                flush()
+                applied += len(events)
+                stream_position = page.get("next_stream_position", stream_position)
+                if not events:
+                    break
+            self._set_state(stream_position=stream_position, last_sync_at=time.time())
+            if applied:
+                logger.info(f"Box search index: applied {applied} change events")
+            return applied
+
+    def start_background_sync(self, client: box_client.BoxClient,
+                              interval: float = BOX_SEARCH_INDEX_SYNC_INTERVAL) -> None:
+        """Starts a daemon thread that calls sync() every interval seconds."""
+        if self._sync_thread is not None:
+            return
+
+        def run():
+            while True:
+                try:
+                    self.sync(client)
+                except Exception as e:
+                    logger.warning(f"Box search index sync failed: {e}")
+                time.sleep(interval)
+
+        self._sync_thread = threading.Thread(target=run, name="box-search-index-sync", daemon=True)
+        self._sync_thread.start()
+
+    # Reads
+
+    def search(self, query: str, limit: int):
+        """
+        Returns up to limit entries ({"id", "type", "name"}) whose name, path or
+        metadata contain every query term (as a prefix), best matches first.
+
+        Returns None when the index is stale or has never synced, and an empty
+        list when nothing matches; in both cases the caller should ask Box.
+        """
+        if not self.is_fresh():
+            return None
+        terms = _TERM_RE.findall(query.lower())
+        if not terms:
+            return None
+        match = " ".join(f'"{term}"*' for term in terms)
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT items.id, items.type, items.name FROM items_fts "
+                "JOIN items ON items.rowid = items_fts.rowid "
+                "WHERE items_fts MATCH ? ORDER BY bm25(items_fts, 10.0, 1.0, 2.0) LIMIT ?",
+                (match, limit),
+            ).fetchall()
+            if rows:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return [{"id": item_id, "type": item_type, "name": name} for item_id, item_type, name in rows]
+
+    def stats(self) -> dict:
+        with self._lock:
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM items").fetchone()
+        return {
+            "path": self.path,
+            "items": count,
+            "hits": self.hits,
+            "misses": self.misses,
+            "last_sync_at": self.last_sync_at,
+            "stream_position": self._get_state("stream_position"),
+        }
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def index_path(tenant: str = None) -> str:
+    """Returns the index file for a tenant, e.g. box_search_index.acme.sqlite3."""
+    if not tenant:
+        return BOX_SEARCH_INDEX_PATH
+    stem, ext = os.path.splitext(BOX_SEARCH_INDEX_PATH)
+    return f"{stem}.{tenant}{ext}"
+
+
+def get_search_index(client: box_client.BoxClient = None):
+    """
+    Returns the search index for the client's tenant, or None when
+    BOX_SEARCH_INDEX is off. The first call opens the index and starts its
+    background sync.
+    """
+    if not BOX_SEARCH_INDEX:
+        return None
+    client = client or box_client.get_box_client()
+    index = _indexes.get(client.tenant)
+    if index is None:
+        with _indexes_lock:
+            index = _indexes.get(client.tenant)
+            if index is None:
+                index = _indexes[client.tenant] = BoxSearchIndex(index_path(client.tenant))
+                index.start_background_sync(client)
+    return index
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or update the local Box search index.")
+    parser.add_argument("--tenant", help="Tenant whose credentials and index file to use")
+    parser.add_argument("--full", action="store_true", help="Walk the whole folder tree instead of applying events")
+    args = parser.parse_args()
+    client = box_client.get_box_client(args.tenant)
+    index = BoxSearchIndex(index_path(args.tenant))
+    if args.full:
+        index.full_sync(client)
+    else:
+        index.sync(client)
+    print(json.dumps(index.stats(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
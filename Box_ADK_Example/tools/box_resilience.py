@@ -0,0 +1,332 @@
+import os
+import re
+import time
+import random
+import asyncio
+import logging
+import threading
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+import httpx
+import requests
+from opentelemetry import trace
+logger = logging.getLogger(__name__)
+
+# Retries with jittered exponential backoff. Retry-After from Box is honored
+# (capped at BOX_RETRY_MAX_DELAY).
+BOX_RETRY_MAX_ATTEMPTS = int(os.getenv("BOX_RETRY_MAX_ATTEMPTS", "4"))
+BOX_RETRY_BASE_DELAY = float(os.getenv("BOX_RETRY_BASE_DELAY", "0.5"))
+BOX_RETRY_MAX_DELAY = float(os.getenv("BOX_RETRY_MAX_DELAY", "30"))
+# Per-endpoint circuit breaker: opens after this many consecutive failed calls
+# (each after its retries) and lets one trial request through after the reset
+# timeout.
+BOX_CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("BOX_CIRCUIT_FAILURE_THRESHOLD", "5"))
+BOX_CIRCUIT_RESET_TIMEOUT = float(os.getenv("BOX_CIRCUIT_RESET_TIMEOUT", "30"))
+# Global token bucket shared by every Box call in the process. Set the rate to
+# 0 to disable it.
+BOX_RATE_LIMIT_PER_SEC = float(os.getenv("BOX_RATE_LIMIT_PER_SEC", "10"))
+BOX_RATE_LIMIT_BURST = int(os.getenv("BOX_RATE_LIMIT_BURST", "20"))
+
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+_ID_SEGMENT_RE = re.compile(r"/\d+(?=/|$)")
+
+
+class CircuitOpenError(Exception):
+    """
+    Raised instead of calling Box while an endpoint's circuit is open.
+
+    The retry loops raise it as RequestsCircuitOpenError or
+    HttpxCircuitOpenError, so the existing error handling in the sync and
+    async tools reports it as an API error.
+    """
+
+
+class RequestsCircuitOpenError(CircuitOpenError, requests.exceptions.RequestException):
+    """CircuitOpenError raised by send_with_retries."""
+
+
+class HttpxCircuitOpenError(CircuitOpenError, httpx.RequestError):
+    """CircuitOpenError raised by asend_with_retries, with .request set to the request not sent."""
+
+
+def endpoint_key(method: str, url: str) -> str:
+    """Groups URLs by method and path, with numeric IDs collapsed, e.g. "GET /2.0/folders/{id}/items"."""
+    return f"{method.upper()} {_ID_SEGMENT_RE.sub('/{id}', urlparse(url).path)}"
+
+
+def parse_retry_after(value):
+    """Returns the Retry-After header value in seconds, or None if absent or malformed."""
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt: int, retry_after=None) -> float:
+    """
+    Returns how long to wait before retry number attempt + 1.
+
+    Uses the Retry-After header when Box sends one, otherwise "full jitter"
+    exponential backoff: a random delay up to BASE * 2 ** attempt.
+    """
+    delay = parse_retry_after(retry_after)
+    if delay is None:
+        delay = random.uniform(0, BOX_RETRY_BASE_DELAY * (2 ** attempt))
+    return min(delay, BOX_RETRY_MAX_DELAY)
+
+
+class CircuitBreaker:
+    """Closed / open / half-open circuit breaker for one endpoint."""
+
+    def __init__(self, name: str, failure_threshold: int = BOX_CIRCUIT_FAILURE_THRESHOLD,
+                 reset_timeout: float = BOX_CIRCUIT_RESET_TIMEOUT):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def before_call(self) -> bool:
+        """
+        Raises CircuitOpenError unless a call to the endpoint may proceed.
+
+        Returns True if the call is the half-open trial, which the caller must
+        end with release_trial() whatever the outcome.
+        """
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return False
+            if state == "half-open" and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            raise CircuitOpenError(f"Circuit open for {self.name}; not calling Box until it recovers.")
+
+    def release_trial(self) -> None:
+        """
+        Ends the half-open trial without changing the state. Called after
+        record_success/record_failure it does nothing; otherwise (a 429, or an
+        error or cancellation the retry loop does not handle) the circuit stays
+        half-open and the next call becomes the trial.
+        """
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self._trial_in_flight or self.failures >= self.failure_threshold:
+                if self.opened_at is None or self._trial_in_flight:
+                    logger.warning(f"Opening circuit for {self.name} after {self.failures} failures")
+                self.opened_at = time.monotonic()
+            self._trial_in_flight = False
+
+
+class TokenBucket:
+    """
+    Token bucket rate limiter usable from threads and coroutines.
+
+    A caller reserves a token under the lock and then waits outside it, with
+    time.sleep in sync code and asyncio.sleep in async code, so waiting never
+    blocks the event loop.
+    """
+
+    def __init__(self, rate: float = BOX_RATE_LIMIT_PER_SEC, burst: int = BOX_RATE_LIMIT_BURST):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated_at = time.monotonic()
+        self.waited_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        """Takes one token and returns how long the caller must wait for it."""
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+            self.updated_at = now
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+            self.waited_seconds += wait
+            return wait
+
+    def acquire(self) -> None:
+        wait = self._reserve()
+        if wait:
+            time.sleep(wait)
+
+    async def aacquire(self) -> None:
+        wait = self._reserve()
+        if wait:
+            await asyncio.sleep(wait)
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+rate_limiter = TokenBucket()
+_counters = {"retries": 0, "circuit_rejections": 0}
+
+
+def _trace_retry(attempt: int, delay: float, reason) -> None:
+    """Records a retry on the current Box HTTP span (see box_telemetry)."""
+    span = trace.get_current_span()
+    if span.is_recording():
+        span.add_event("retry", {"attempt": attempt + 1, "delay_seconds": delay, "reason": str(reason)})
+
+
+def get_breaker(method: str, url: str) -> CircuitBreaker:
+    key = endpoint_key(method, url)
+    with _breakers_lock:
+        breaker = _breakers.get(key)
+        if breaker is None:
+            breaker = _breakers[key] = CircuitBreaker(key)
+        return breaker
+
+
+def send_with_retries(send, method: str, url: str):
+    """
+    Calls send() under the rate limiter, circuit breaker and retry policy.
+
+    Args:
+      send: Zero-argument callable performing one HTTP attempt and returning a
+        requests.Response.
+      method: HTTP method, used to pick the circuit breaker.
+      url: Request URL, used to pick the circuit breaker.
+
+    Returns:
+      The last response. A retryable status is returned as-is once the
+      attempts are used up, so callers keep using raise_for_status().
+
+    Raises:
+      RequestsCircuitOpenError: If the endpoint's circuit is open.
+      requests.exceptions.RequestException: If the last attempt fails to connect.
+    """
+    breaker = get_breaker(method, url)
+    for attempt in range(BOX_RETRY_MAX_ATTEMPTS):
+        last_attempt = attempt == BOX_RETRY_MAX_ATTEMPTS - 1
+        try:
+            trial = breaker.before_call()
+        except CircuitOpenError as e:
+            _counters["circuit_rejections"] += 1
+            raise RequestsCircuitOpenError(str(e)) from None
+        try:
+            rate_limiter.acquire()
+            try:
+                response = send()
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                if last_attempt or trial:
+                    breaker.record_failure()
+                if last_attempt:
+                    raise
+                delay = backoff_delay(attempt)
+                logger.warning(f"{breaker.name} failed ({e}); retrying in {delay:.2f}s")
+                _trace_retry(attempt, delay, type(e).__name__)
+            else:
+                if response.status_code not in RETRY_STATUSES:
+                    breaker.record_success()
+                    return response
+                # 429 means we are over quota, not that Box is unhealthy. A call
+                # counts as one failure, once its retries are used up, so one
+                # outage call cannot open the circuit on its own; a failed trial
+                # reopens it at once.
+                if response.status_code >= 500 and (last_attempt or trial):
+                    breaker.record_failure()
+                if last_attempt:
+                    return response
+                delay = backoff_delay(attempt, response.headers.get("Retry-After"))
+                logger.warning(f"{breaker.name} returned {response.status_code}; retrying in {delay:.2f}s")
+                _trace_retry(attempt, delay, response.status_code)
+                response.close()
+        finally:
+            # Never leave the trial flag set, or the circuit stays open for good.
+            if trial:
+                breaker.release_trial()
+        _counters["retries"] += 1
+        time.sleep(delay)
+
+
+async def asend_with_retries(send, method: str, url: str):
+    """
+    Async version of send_with_retries. send is a zero-argument coroutine
+    function returning an httpx.Response, which may be a streamed one; waits
+    use asyncio.sleep.
+
+    Raises:
+      HttpxCircuitOpenError: If the endpoint's circuit is open.
+      httpx.TransportError: If the last attempt fails to connect.
+    """
+    breaker = get_breaker(method, url)
+    for attempt in range(BOX_RETRY_MAX_ATTEMPTS):
+        last_attempt = attempt == BOX_RETRY_MAX_ATTEMPTS - 1
+        try:
+            trial = breaker.before_call()
+        except CircuitOpenError as e:
+            _counters["circuit_rejections"] += 1
+            raise HttpxCircuitOpenError(str(e), request=httpx.Request(method, url)) from None
+        try:
+            await rate_limiter.aacquire()
+            try:
+                response = await send()
+            except httpx.TransportError as e:
+                if last_attempt or trial:
+                    breaker.record_failure()
+                if last_attempt:
+                    raise
+                delay = backoff_delay(attempt)
+                logger.warning(f"{breaker.name} failed ({e!r}); retrying in {delay:.2f}s")
+                _trace_retry(attempt, delay, type(e).__name__)
+            else:
+                if response.status_code not in RETRY_STATUSES:
+                    breaker.record_success()
+                    return response
+                if response.status_code >= 500 and (last_attempt or trial):
+                    breaker.record_failure()
+                if last_attempt:
+                    return response
+                delay = backoff_delay(attempt, response.headers.get("Retry-After"))
+                logger.warning(f"{breaker.name} returned {response.status_code}; retrying in {delay:.2f}s")
+                _trace_retry(attempt, delay, response.status_code)
+                # Release the connection, which a streamed response still holds.
+                await response.aclose()
+        finally:
+            # Also on cancellation, e.g. by a wait_for timeout around the call.
+            if trial:
+                breaker.release_trial()
+        _counters["retries"] += 1
+        await asyncio.sleep(delay)
+
+
+def get_resilience_stats() -> dict:
+    """Returns retry and rate limiter counters and the state of every circuit breaker."""
+    with _breakers_lock:
+        breakers = {key: breaker.state for key, breaker in _breakers.items()}
+    return {
+        **_counters,
+        "rate_limit_wait_seconds": rate_limiter.waited_seconds,
+        "circuits": breakers,
+    }
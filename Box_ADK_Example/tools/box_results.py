@@ -0,0 +1,129 @@
+import os
+import re
+import json
+import logging
+logger = logging.getLogger(__name__)
+
+# Shape of the results the Box tools hand back to Gemini. "text" (default)
+# keeps the original formatted strings; "compact" returns minified JSON with
+# the answer, deduplicated citations and file IDs, cut to a token budget so
+# follow-up turns carry less context.
+BOX_RESULT_FORMAT = os.getenv("BOX_RESULT_FORMAT", "text").lower()
+# Approximate tokens per tool result. Tokens are estimated as 4 characters.
+BOX_RESULT_TOKEN_BUDGET = int(os.getenv("BOX_RESULT_TOKEN_BUDGET", "800"))
+BOX_RESULT_MAX_CITATIONS = int(os.getenv("BOX_RESULT_MAX_CITATIONS", "5"))
+BOX_RESULT_EXCERPT_CHARS = int(os.getenv("BOX_RESULT_EXCERPT_CHARS", "160"))
+
+CHARS_PER_TOKEN = 4
+
+_SENTENCE_END_RE = re.compile(r"[.!?](?=\s)")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def compact_enabled() -> bool:
+    return BOX_RESULT_FORMAT == "compact"
+
+
+def estimate_tokens(text: str) -> int:
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def to_json(result: dict) -> str:
+    """Minified JSON, which costs fewer tokens than indented JSON or prose."""
+    return json.dumps(result, ensure_ascii=False, separators=(",", ":"))
+
+
+def truncate_text(text: str, max_chars: int) -> str:
+    """
+    Shortens text to at most max_chars, preferring to end on a sentence
+    boundary in the second half, then on a word boundary. Marks the cut
+    with "...".
+    """
+    text = _WHITESPACE_RE.sub(" ", text or "").strip()
+    if len(text) <= max_chars:
+        return text
+    limit = max(max_chars - 3, 0)
+    head = text[:limit]
+    sentence_ends = [match.end() for match in _SENTENCE_END_RE.finditer(head)]
+    if sentence_ends and sentence_ends[-1] >= limit // 2:
+        return head[:sentence_ends[-1]] + "..."
+    space = head.rfind(" ")
+    if space >= limit // 2:
+        head = head[:space]
+    return head + "..."
+
+
+def dedupe_citations(citations: list, max_citations: int = None, excerpt_chars: int = None) -> list:
+    """
+    Returns one {"id", "name", "excerpt"} per cited file, in first-seen order.
+    Repeated citations of a file contribute only their first excerpt.
+    """
+    max_citations = BOX_RESULT_MAX_CITATIONS if max_citations is None else max_citations
+    excerpt_chars = BOX_RESULT_EXCERPT_CHARS if excerpt_chars is None else excerpt_chars
+    unique = {}
+    for citation in citations or []:
+        key = citation.get("id") or citation.get("name")
+        if not key or key in unique:
+            continue
+        compact = {"id": str(citation.get("id", "")), "name": citation.get("name", "")}
+        if excerpt_chars and citation.get("content"):
+            compact["excerpt"] = truncate_text(citation["content"], excerpt_chars)
+        unique[key] = compact
+    return list(unique.values())[:max_citations]
+
+
+def _file_ids(items_list: list, citations: list) -> list:
+    ids = [str(item.get("id")) for item in items_list or [] if item.get("id")]
+    ids += [citation["id"] for citation in citations if citation.get("id")]
+    return list(dict.fromkeys(ids))
+
+
+def _fit(result: dict, key: str, budget_chars: int) -> dict:
+    """Truncates result[key] so the serialized result fits in budget_chars, where possible."""
+    overflow = len(to_json(result)) - budget_chars
+    if overflow > 0 and result.get(key):
+        result[key] = truncate_text(result[key], max(len(result[key]) - overflow, 0))
+        result["truncated"] = True
+    return result
+
+
+def compact_answer(response_data: dict, items_list: list = None, budget: int = None) -> dict:
+    """
+    Reduces a Box AI or Hub ask response to {"answer", "citations", "file_ids"}
+    within the token budget. Citations share at most a third of the budget;
+    excerpts, then whole citations, are dropped before the answer is cut.
+    """
+    budget_chars = (budget or BOX_RESULT_TOKEN_BUDGET) * CHARS_PER_TOKEN
+    answer = response_data.get("answer") or ""
+    citations = dedupe_citations(response_data.get("citations"))
+    result = {"answer": answer}
+    if not answer:
+        result["completion_reason"] = response_data.get("completion_reason", "No reason provided.")
+    if citations:
+        if len(to_json(citations)) > budget_chars // 3:
+            citations = [{"id": c["id"], "name": c["name"]} for c in citations]
+        while citations and len(to_json(citations)) > budget_chars // 3:
+            citations.pop()
+        result["citations"] = citations
+    file_ids = _file_ids(items_list, citations)
+    if file_ids:
+        result["file_ids"] = file_ids
+    return _fit(result, "answer", budget_chars)
+
+
+def compact_search(prompt: str, entries: list, budget: int = None) -> dict:
+    """
+    Reduces search entries to {"query", "items", "total"}, keeping as many
+    [id, type, name] rows as fit in the token budget.
+    """
+    budget_chars = (budget or BOX_RESULT_TOKEN_BUDGET) * CHARS_PER_TOKEN
+    result = {"query": prompt, "total": len(entries), "items": []}
+    used = len(to_json(result))
+    for entry in entries:
+        row = [str(entry.get("id", "")), entry.get("type", ""), entry.get("name", "")]
+        used += len(to_json(row)) + 1
+        if used > budget_chars:
+            result["omitted"] = len(entries) - len(result["items"])
+            break
+        result["items"].append(row)
+    return result
@@ -0,0 +1,145 @@
+import os
+import re
+import time
+import asyncio
+import logging
+from urllib.parse import unquote
+logger = logging.getLogger(__name__)
+
+# Speculative search. When "on", BoxFlowAgent starts a Box search for the
+# user's keywords while the DecisionRouter LLM is still deciding. If the
+# router picks the search path, the search tool reuses that result; if it
+# picks the hub path, the search is cancelled. Off by default.
+BOX_SPECULATIVE_SEARCH = os.getenv("BOX_SPECULATIVE_SEARCH", "off").lower() == "on"
+
+# Words dropped when reducing a request to search keywords. The search agent
+# is told to send keywords, so these rarely reach the search tool either.
+STOPWORDS = frozenset("""
+    a about all an and any are as at be by can could do does for from give
+    has have how i in is it list me mention mentions my of on or please
+    show tell that the there these this to us was we what where which who
+    with would you find search look get documents document files file
+    content
+""".split())
+
+_TERM_RE = re.compile(r"\w+")
+
+# invocation_id -> SpeculativeSearch started for that invocation.
+_pending = {}
+
+_counters = {
+    "started": 0,
+    "used": 0,        # the search tool took the speculative result
+    "cancelled": 0,   # the router picked the hub path
+    "unused": 0,      # search path, but the tool searched for different keywords
+    "failed": 0,
+    "saved_seconds": 0.0,
+}
+
+
+def search_terms(query: str) -> tuple:
+    """Returns the keywords of a request in order, without stopwords or repeats."""
+    terms = []
+    for term in _TERM_RE.findall(unquote(query).lower()):
+        if term not in STOPWORDS and term not in terms:
+            terms.append(term)
+    return tuple(terms)
+
+
+class SpeculativeSearch:
+    """A search started ahead of the routing decision for one invocation."""
+
+    def __init__(self, query: str, search):
+        self.terms = search_terms(query)
+        self.query = " ".join(self.terms)
+        self.started_at = time.perf_counter()
+        self.finished_at = None
+        self.task = asyncio.create_task(self._run(search))
+
+    async def _run(self, search):
+        try:
+            return await search(self.query)
+        finally:
+            self.finished_at = time.perf_counter()
+
+    def drop(self) -> None:
+        if self.task.done():
+            if not self.task.cancelled():
+                # Retrieve a failure so asyncio does not log it as unhandled.
+                self.task.exception()
+        else:
+            self.task.cancel()
+
+    def matches(self, prompt: str) -> bool:
+        return set(search_terms(prompt)) == set(self.terms)
+
+
+def start(invocation_id: str, query: str, search):
+    """
+    Starts search(keywords) for the invocation's request in a task and returns
+    the SpeculativeSearch, or None when speculation is off or the request has
+    no keywords. search is an async callable returning the result entries.
+    """
+    if not BOX_SPECULATIVE_SEARCH or not search_terms(query):
+        return None
+    speculation = SpeculativeSearch(query, search)
+    _pending[invocation_id] = speculation
+    _counters["started"] += 1
+    logger.info(f"Speculative Box search started for '{speculation.query}'")
+    return speculation
+
+
+def cancel(invocation_id: str) -> None:
+    """Cancels the invocation's speculative search, if it was not used."""
+    speculation = _pending.pop(invocation_id, None)
+    if speculation is not None:
+        speculation.drop()
+        _counters["cancelled"] += 1
+
+
+def discard(invocation_id: str) -> None:
+    """Drops a speculative search that the search tool did not take."""
+    speculation = _pending.pop(invocation_id, None)
+    if speculation is not None:
+        speculation.drop()
+        _counters["unused"] += 1
+
+
+async def take(tool_context, prompt: str):
+    """
+    Returns the entries of the invocation's speculative search when it searched
+    for the same keywords as prompt, waiting for it if it is still running.
+    Returns None when there is nothing to reuse and the tool should search.
+    """
+    if tool_context is None:
+        return None
+    speculation = _pending.get(tool_context.invocation_id)
+    if speculation is None or not speculation.matches(prompt):
+        return None
+    del _pending[tool_context.invocation_id]
+    taken_at = time.perf_counter()
+    try:
+        entries = await speculation.task
+    except Exception as e:
+        logger.warning(f"Speculative Box search failed, searching again: {e}")
+        _counters["failed"] += 1
+        return None
+    # Without speculation the whole search would have run after this point.
+    duration = speculation.finished_at - speculation.started_at
+    waited = max(speculation.finished_at - taken_at, 0.0)
+    _counters["used"] += 1
+    _counters["saved_seconds"] += duration - waited
+    logger.info(f"Reused speculative Box search for '{speculation.query}' ({1000 * (duration - waited):.0f} ms saved)")
+    return entries
+
+
+def get_speculation_stats() -> dict:
+    """
+    Returns speculation counters. Every started search costs Box API calls;
+    only "used" ones save latency, so "started" - "used" is the extra spend.
+    """
+    return {
+        **_counters,
+        "extra_searches": _counters["started"] - _counters["used"],
+        "pending": len(_pending),
+    }
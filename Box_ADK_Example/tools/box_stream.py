@@ -0,0 +1,76 @@
+import os
+import asyncio
+import logging
+logger = logging.getLogger(__name__)
+
+# Streaming mode for Box AI answers. When "on", the async hub and Box AI tools
+# ask Box for an event stream and forward answer text to BoxFlowAgent as it
+# arrives, which BoxFlowAgent yields as partial events. Off by default.
+BOX_AI_STREAM = os.getenv("BOX_AI_STREAM", "off").lower() == "on"
+
+# invocation_id -> asyncio.Queue read by the BoxFlowAgent running that invocation.
+_channels = {}
+
+CHUNK = "chunk"
+EVENT = "event"
+DONE = "done"
+
+
+def open_channel(invocation_id: str) -> asyncio.Queue:
+    """Opens the queue that tools of this invocation publish answer text to."""
+    queue = asyncio.Queue()
+    _channels[invocation_id] = queue
+    return queue
+
+
+def close_channel(invocation_id: str) -> None:
+    _channels.pop(invocation_id, None)
+
+
+def channel_for(tool_context=None):
+    """Returns the open queue for the tool's invocation, or None when answers should not be streamed."""
+    if not BOX_AI_STREAM or tool_context is None:
+        return None
+    return _channels.get(tool_context.invocation_id)
+
+
+def publish(queue: asyncio.Queue, text: str) -> None:
+    if queue is not None and text:
+        queue.put_nowait((CHUNK, text))
+
+
+async def merge_agent_events(agent_events, queue: asyncio.Queue):
+    """
+    Interleaves a sub-agent's events with the answer text its tools publish.
+
+    Yields (EVENT, event) for every event of agent_events and (CHUNK, text)
+    for every published chunk, in arrival order. The sub-agent runs in its own
+    task but is only resumed after the consumer has taken its previous event,
+    so the runner still sees each event before the sub-agent continues.
+    """
+    resume = asyncio.Event()
+
+    async def pump():
+        try:
+            async for event in agent_events:
+                await queue.put((EVENT, event))
+                await resume.wait()
+                resume.clear()
+        finally:
+            await queue.put((DONE, None))
+
+    task = asyncio.create_task(pump())
+    try:
+        while True:
+            kind, item = await queue.get()
+            if kind == DONE:
+                break
+            yield kind, item
+            if kind == EVENT:
+                resume.set()
+        # Surface an exception raised by the sub-agent.
+        await task
+    finally:
+        if not task.done():
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
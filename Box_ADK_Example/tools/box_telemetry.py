@@ -0,0 +1,122 @@
+import os
+import json
+import logging
+import threading
+from contextlib import contextmanager
+from opentelemetry import trace
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import BatchSpanProcessor, SpanExporter, SpanExportResult
+from opentelemetry.trace import SpanKind, Status, StatusCode
+from .box_resilience import endpoint_key
+logger = logging.getLogger(__name__)
+
+# Span exporter for BoxFlowAgent, sub-agent and Box HTTP spans: "none" (the
+# default) leaves OpenTelemetry unconfigured, so spans are no-ops unless the
+# host (e.g. adk web --trace_to_cloud) installed a tracer provider; "jsonl"
+# appends one JSON object per finished span to BOX_TRACE_PATH.
+BOX_TRACE_EXPORTER = os.getenv("BOX_TRACE_EXPORTER", "none").lower()
+BOX_TRACE_PATH = os.getenv("BOX_TRACE_PATH", "box_traces.jsonl")
+
+tracer = trace.get_tracer("Box_ADK_Example")
+
+_configured = False
+_configure_lock = threading.Lock()
+
+
+def _span_record(span) -> dict:
+    parent = span.parent
+    return {
+        "name": span.name,
+        "trace_id": format(span.context.trace_id, "032x"),
+        "span_id": format(span.context.span_id, "016x"),
+        "parent_span_id": format(parent.span_id, "016x") if parent else None,
+        "kind": span.kind.name,
+        "start_time_unix_nano": span.start_time,
+        "end_time_unix_nano": span.end_time,
+        "duration_ms": (span.end_time - span.start_time) / 1e6,
+        "status": span.status.status_code.name,
+        "attributes": dict(span.attributes or {}),
+        "events": [{"name": event.name, "attributes": dict(event.attributes or {})} for event in span.events],
+    }
+
+
+class JsonlSpanExporter(SpanExporter):
+    """Appends finished spans to a file, one JSON object per line."""
+
+    def __init__(self, path: str = BOX_TRACE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, spans) -> SpanExportResult:
+        lines = "".join(json.dumps(_span_record(span), default=str) + "\n" for span in spans)
+        try:
+            with self._lock, open(self.path, "a", encoding="utf-8") as f:
+                f.write(lines)
+        except OSError as e:
+            logger.warning(f"Could not write spans to {self.path}: {e}")
+            return SpanExportResult.FAILURE
+        return SpanExportResult.SUCCESS
+
+
+def configure_tracing(exporter: str = BOX_TRACE_EXPORTER, path: str = BOX_TRACE_PATH) -> None:
+    """
+    Installs the exporter selected by BOX_TRACE_EXPORTER. An SDK tracer
+    provider that is already installed is reused, so ADK's own agent and LLM
+    spans land in the same file. Safe to call more than once.
+    """
+    global _configured
+    if exporter == "none" or _configured:
+        return
+    if exporter != "jsonl":
+        logger.warning(f"Unknown BOX_TRACE_EXPORTER '{exporter}'; spans are not exported")
+        return
+    with _configure_lock:
+        if _configured:
+            return
+        provider = trace.get_tracer_provider()
+        if not isinstance(provider, TracerProvider):
+            provider = TracerProvider()
+            trace.set_tracer_provider(provider)
+        provider.add_span_processor(BatchSpanProcessor(JsonlSpanExporter(path)))
+        _configured = True
+        logger.info(f"Writing trace spans to {path}")
+
+
+def start_http_span(method: str, url: str, payload=None):
+    """
+    Starts a span for one Box API call, retries included, without making it
+    current. Request body size is only computed when the span is recorded.
+    """
+    span = tracer.start_span(f"Box {endpoint_key(method, url)}", kind=SpanKind.CLIENT)
+    if span.is_recording():
+        span.set_attribute("http.request.method", method)
+        span.set_attribute("url.full", url)
+        if payload is not None:
+            span.set_attribute("http.request.body.size", len(json.dumps(payload)))
+    return span
+
+
+def use_span(span):
+    """Makes span current inside a with block without ending it on exit."""
+    return trace.use_span(span, end_on_exit=False)
+
+
+@contextmanager
+def http_span(method: str, url: str, payload=None):
+    """Current span around one Box API call; see start_http_span."""
+    span = start_http_span(method, url, payload)
+    with trace.use_span(span, end_on_exit=True):
+        yield span
+
+
+def record_response(span, response, body_size: int = None) -> None:
+    """Sets the status code and response size of a requests or httpx response on span."""
+    if not span.is_recording():
+        return
+    span.set_attribute("http.response.status_code", response.status_code)
+    if body_size is None:
+        content_length = response.headers.get("Content-Length")
+        body_size = int(content_length) if content_length else len(response.content)
+    span.set_attribute("http.response.body.size", body_size)
+    if response.status_code >= 400:
+        span.set_status(Status(StatusCode.ERROR, f"HTTP {response.status_code}"))
@@ -0,0 +1,162 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Render time per action: re-reading and re-compiling templates vs. the cache.
+
+"before" reads the template file and renders it with `render_template_string`
+on every call, as `map_action_to_html` used to; "after" is the current
+`map_action_to_html`, which renders templates compiled once per app. Both are
+rendered inside the simulator's Flask app context with a synthetic product.
+
+Usage (from agents/personalized-shopping):
+    python benchmarks/bench_render.py [--iterations 500]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+from flask import render_template_string
+
+sys.path.insert(
+    0,
+    os.path.join(
+        os.path.dirname(os.path.abspath(__file__)),
+        "../personalized_shopping/shared_libraries",
+    ),
+)
+
+from web_agent_site.engine.engine import (  # noqa: E402
+    ACTION_TO_TEMPLATE,
+    END_BUTTON,
+    TEMPLATE_DIR,
+    map_action_to_html,
+    read_html_template,
+)
+from web_agent_site.envs.web_agent_text_env import app  # noqa: E402
+
+
+def make_product(i):
+    return {
+        "asin": f"B{i:09d}",
+        "Title": f"Product {i} floral summer dress with pockets",
+        "Price": "$19.99 to $29.99",
+        "Rating": "N.A.",
+        "MainImage": "https://example.com/image.jpg",
+        "Description": "A light cotton dress. " * 40,
+        "BulletPoints": [f"Feature {j}" for j in range(8)],
+        "Reviews": [],
+        "Attributes": ["machine wash", "pockets"],
+        "options": {
+            "color": ["red", "blue", "green"],
+            "size": ["small", "medium", "large"],
+        },
+        "option_to_image": {"red": None, "blue": None, "green": None},
+        "category": "fashion",
+        "query": "dress",
+        "product_category": "Clothing › Women › Dresses",
+    }
+
+
+def actions():
+    """(action, template, kwargs) for one visit to every page type."""
+    products = [make_product(i) for i in range(10)]
+    product = products[0]
+    common = dict(
+        session_id="fixed_0",
+        instruction_text="Find me a floral dress.",
+    )
+    item = dict(
+        common,
+        product_info=product,
+        keywords=["floral", "dress"],
+        page=1,
+        asin=product["asin"],
+        options={"color": "red"},
+    )
+    yield "start", "search_page.html", common
+    yield "search[floral dress]", "results_page.html", dict(
+        common, products=products, keywords=["floral", "dress"], page=1, total=50
+    )
+    yield f"click[{product['asin']}]", "item_page.html", dict(item, show_attrs=False)
+    for sub_page, template in ACTION_TO_TEMPLATE.items():
+        yield f"click[{sub_page}]", template, item
+    yield f"click[{END_BUTTON}]", "done_page.html", dict(
+        common,
+        reward=1.0,
+        asin=product["asin"],
+        options={"color": "red"},
+        goal={"asin": product["asin"], "attributes": ["pockets"]},
+        reward_info=None,
+        goal_attrs=None,
+        purchased_attrs=None,
+        mturk_code=None,
+        query=None,
+        category=None,
+        product_category=None,
+    )
+
+
+def render_uncached(template, kwargs):
+    # The pre-cache code path, minus the parameter mapping.
+    return render_template_string(
+        read_html_template(os.path.join(TEMPLATE_DIR, template)), **kwargs
+    )
+
+
+def time_per_call(fn, iterations):
+    times = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--iterations", type=int, default=500)
+    args = parser.parse_args()
+
+    print(f"{'action':<22} {'before us':>10} {'after us':>10} {'speedup':>8}")
+    totals = [0.0, 0.0]
+    with app.app_context(), app.test_request_context():
+        for action, template, kwargs in actions():
+            before = render_uncached(template, kwargs)
+            after = map_action_to_html(action, **kwargs)
+            assert before == after, f"{action} renders differently"
+            before_us = time_per_call(
+                lambda: render_uncached(template, kwargs), args.iterations
+            )
+            after_us = time_per_call(
+                lambda: map_action_to_html(action, **kwargs), args.iterations
+            )
+            totals[0] += before_us
+            totals[1] += after_us
+            print(
+                f"{action[:22]:<22} {before_us:>10.0f} {after_us:>10.0f} "
+                f"{before_us / after_us:>7.1f}x"
+            )
+    print(
+        f"{'all pages':<22} {totals[0]:>10.0f} {totals[1]:>10.0f} "
+        f"{totals[0] / totals[1]:>7.1f}x"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Purchases/sec scored by get_reward in a loop vs. get_reward_batch.
+
+The purchases are synthetic: products and goals draw attributes and options
+from a shared pool of phrases, so that, as in WebShop, the same strings are
+compared again and again and a fraction of them match. Noun tokens are given,
+so neither path runs spaCy. The batch results are checked against the loop.
+
+Usage (from agents/personalized-shopping):
+    python benchmarks/bench_reward_batch.py [--purchases 20000] [--workers 1]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(
+    0,
+    os.path.join(
+        os.path.dirname(os.path.abspath(__file__)),
+        "../personalized_shopping/shared_libraries",
+    ),
+)
+
+from web_agent_site.engine import goal  # noqa: E402
+
+WORDS = (
+    "cotton polyester machine wash hand long short sleeve slim fit high waist "
+    "button closure elastic lightweight soft comfortable leather rubber sole "
+    "non slip water resistant stainless steel easy clean gluten free sugar "
+    "natural organic red navy blue black white small medium large x-large "
+    "pack of 2 3 6 12 ounce"
+).split()
+
+
+def random_phrase(rng):
+    return " ".join(rng.choices(WORDS, k=rng.randint(1, 4)))
+
+
+def make_purchases(n, seed=0):
+    rng = random.Random(seed)
+    attributes = [random_phrase(rng) for _ in range(2000)]
+    options = [random_phrase(rng) for _ in range(500)]
+    purchases = []
+    for _ in range(n):
+        product = {
+            "Attributes": rng.sample(attributes, rng.randint(3, 12)),
+            "Title": random_phrase(rng),
+            "BulletPoints": [random_phrase(rng) for _ in range(5)],
+            "Description": random_phrase(rng),
+            "name": "product",
+            "name_nouns": ["product"],
+            "query": "query",
+            "product_category": "a › b › c",
+        }
+        target = {
+            "attributes": rng.sample(product["Attributes"], 1)
+            + rng.sample(attributes, rng.randint(1, 3)),
+            "goal_options": {
+                f"option{i}": rng.choice(options) for i in range(rng.randint(0, 3))
+            },
+            "price_upper": rng.choice([30.0, 1000000]),
+            "name": "product",
+            "name_nouns": ["product"],
+            "query": "query",
+            "product_category": "a › b › d",
+        }
+        chosen = {f"option{i}": rng.choice(options) for i in range(rng.randint(0, 3))}
+        purchases.append((product, target, rng.uniform(10, 50), chosen))
+    return purchases
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--purchases", type=int, default=20000)
+    parser.add_argument("--workers", type=int, default=1)
+    args = parser.parse_args()
+
+    purchases = make_purchases(args.purchases)
+    start = time.perf_counter()
+    expected = [goal.get_reward(*purchase, verbose=True) for purchase in purchases]
+    looped = time.perf_counter() - start
+    # Start both runs with no option normalized yet
+    goal._normalize_option.cache_clear()
+    start = time.perf_counter()
+    rewards = goal.get_reward_batch(purchases, workers=args.workers, verbose=True)
+    batched = time.perf_counter() - start
+    assert rewards == expected, "get_reward_batch differs from get_reward"
+
+    n = len(purchases)
+    print(f"{'':<18} {'purchases/s':>12}")
+    print(f"{'get_reward loop':<18} {n / looped:>12.0f}")
+    print(f"{'get_reward_batch':<18} {n / batched:>12.0f}   {looped / batched:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Episodes/sec of RolloutRunner from 1 worker up to the number of cores.
+
+The products and goals are loaded once; every worker count forks from the
+same server. Each episode follows a random policy seeded by its goal index:
+search for words from the instruction, then click random clickables until it
+buys or hits --max_steps. Times include forking the workers and opening their
+Lucene searchers. The rewards are checked to be the same at every worker count.
+
+Usage (from agents/personalized-shopping, after building the search index):
+    python benchmarks/bench_rollouts.py [--num_products 1000] [--episodes 500]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(
+    0,
+    os.path.join(
+        os.path.dirname(os.path.abspath(__file__)),
+        "../personalized_shopping/shared_libraries",
+    ),
+)
+
+from web_agent_site.envs.web_agent_rollouts import RolloutRunner  # noqa: E402
+from web_agent_site.envs.web_agent_text_env import SimServer  # noqa: E402
+from web_agent_site.utils import DEFAULT_FILE_PATH  # noqa: E402
+
+
+def random_policy(env):
+    available = env.get_available_actions()
+    if available["has_search_bar"]:
+        words = env.instruction_text.lower().split()[1:]
+        return f"search[{' '.join(random.sample(words, min(3, len(words))))}]"
+    clickables = [c for c in available["clickables"] if c != "search"]
+    return f"click[{random.choice(clickables)}]"
+
+
+def report(server, worker_counts, session_ints, max_steps):
+    print(f"{'workers':>7} {'episodes/s':>11} {'speedup':>8} {'mean reward':>12}")
+    base, expected = None, None
+    for num_workers in worker_counts:
+        runner = RolloutRunner(
+            random_policy, num_workers, server=server, max_steps=max_steps
+        )
+        start = time.perf_counter()
+        results = runner.run(session_ints)
+        rate = len(session_ints) / (time.perf_counter() - start)
+        rewards = [result["reward"] for result in results]
+        if expected is None:
+            base, expected = rate, rewards
+        assert rewards == expected, f"{num_workers} workers changed the rewards"
+        print(
+            f"{num_workers:>7} {rate:>11.1f} {rate / base:>7.1f}x "
+            f"{statistics.mean(rewards):>12.3f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--num_products", type=int, default=1000)
+    parser.add_argument("--episodes", type=int, default=500)
+    parser.add_argument("--max_steps", type=int, default=15)
+    parser.add_argument("--max_workers", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    server = SimServer(
+        "http://127.0.0.1:3000",
+        DEFAULT_FILE_PATH,
+        num_products=args.num_products,
+        load_search_engine=False,
+    )
+    print(f"SimServer ready in {time.perf_counter() - start:.1f}s, shared by every run.")
+    worker_counts = [1]
+    while worker_counts[-1] * 2 <= args.max_workers:
+        worker_counts.append(worker_counts[-1] * 2)
+    if worker_counts[-1] != args.max_workers:
+        worker_counts.append(args.max_workers)
+    session_ints = [i % len(server.goals) for i in range(args.episodes)]
+    report(server, worker_counts, session_ints, args.max_steps)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Steps/sec of WebAgentVectorEnv at batch sizes 1 to 256.
+
+Every batch size reuses one SimServer. Each session follows a seeded random
+policy: search for words from its instruction, then click random clickables
+until it buys, then start a new goal. "looped" steps the same sessions one
+`WebAgentTextEnv.step` at a time, with one Lucene search per search action;
+"batched" uses `WebAgentVectorEnv.step`, which runs a step's searches as one
+`batch_search`.
+
+Usage (from agents/personalized-shopping, after building the search index):
+    python benchmarks/bench_vector_env.py [--num_products 1000] [--steps 20]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(
+    0,
+    os.path.join(
+        os.path.dirname(os.path.abspath(__file__)),
+        "../personalized_shopping/shared_libraries",
+    ),
+)
+
+from web_agent_site.envs.web_agent_text_env import SimServer  # noqa: E402
+from web_agent_site.envs.web_agent_vector_env import WebAgentVectorEnv  # noqa: E402
+from web_agent_site.utils import DEFAULT_FILE_PATH  # noqa: E402
+
+
+def choose_action(env, rng):
+    available = env.get_available_actions()
+    if available["has_search_bar"]:
+        words = env.instruction_text.lower().split()[1:]
+        return f"search[{' '.join(rng.sample(words, min(3, len(words))))}]"
+    clickables = [c for c in available["clickables"] if c != "search"]
+    return f"click[{rng.choice(clickables)}]"
+
+
+def run(server, batch_size, steps, batched, search_threads=1, seed=0):
+    """Returns steps/sec over `steps` steps of `batch_size` sessions."""
+    rng = random.Random(seed)
+    random.seed(seed)
+    vector_env = WebAgentVectorEnv(
+        batch_size, server=server, search_threads=search_threads
+    )
+    vector_env.reset(sessions=[rng.randrange(len(server.goals)) for _ in range(batch_size)])
+    start = time.perf_counter()
+    for _ in range(steps):
+        actions = [choose_action(env, rng) for env in vector_env.envs]
+        if batched:
+            _, _, dones, _ = vector_env.step(actions)
+        else:
+            dones = [env.step(a)[2] for env, a in zip(vector_env.envs, actions)]
+        for env, done in zip(vector_env.envs, dones):
+            if done:
+                env.reset(session=rng.randrange(len(server.goals)))
+    return batch_size * steps / (time.perf_counter() - start)
+
+
+def report(server, batch_sizes, steps, search_threads):
+    print(f"{'batch':>6} {'looped steps/s':>15} {'batched steps/s':>16}")
+    for batch_size in batch_sizes:
+        looped = run(server, batch_size, steps, batched=False)
+        batched = run(server, batch_size, steps, True, search_threads)
+        print(f"{batch_size:>6} {looped:>15.1f} {batched:>16.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--num_products", type=int, default=1000)
+    parser.add_argument("--steps", type=int, default=20)
+    parser.add_argument("--search_threads", type=int, default=4)
+    parser.add_argument(
+        "--batch_sizes", default="1,2,4,8,16,32,64,128,256"
+    )
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    server = SimServer(
+        "http://127.0.0.1:3000", DEFAULT_FILE_PATH, num_products=args.num_products
+    )
+    print(f"SimServer ready in {time.perf_counter() - start:.1f}s, shared by every batch.")
+    batch_sizes = [int(b) for b in args.batch_sizes.split(",")]
+    report(server, batch_sizes, args.steps, args.search_threads)
+
+
+if __name__ == "__main__":
+    main()
@@ -17,5 +17,10 @@ import torch
 # Workaround to Resolve the PyTorch-Streamlit Incompatibility Issue
 torch.classes.__path__ = []
 
-from .shared_libraries.init_env import init_env, webshop_env
+from .shared_libraries.init_env import (
+    get_init_stats,
+    get_webshop_env,
+    init_env,
+    start_warmup,
+)
 from . import agent
@@ -12,8 +12,40 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+"""Lazily constructed WebShop environment shared by the agent's tools.
+
+Building the environment loads the product catalog, the Lucene index, spaCy
+and the goals, which takes minutes for 50k products. Nothing is loaded at
+import time: the first `get_webshop_env()` call builds it (once, even when
+called from several threads), or `start_warmup()` builds it in a background
+thread so that a server can come up and report readiness via
+`get_init_stats()` in the meantime.
+
+Environment variables:
+  WEBSHOP_NUM_PRODUCTS  Number of products to load (default 50000).
+  WEBSHOP_WARMUP        If "1", start the background warm-up on import.
+"""
+
+import os
+import threading
+import time
+
 import gym
 
+num_product_items = int(os.getenv("WEBSHOP_NUM_PRODUCTS", "50000"))
+
+_webshop_env = None
+_lock = threading.Lock()
+_warmup_thread = None
+_stats = {
+    "state": "not_started",
+    "num_products": num_product_items,
+    "started_at": None,
+    "ready_at": None,
+    "init_seconds": None,
+    "error": None,
+}
+
 
 def init_env(num_products):
     env = gym.make(
@@ -24,7 +56,87 @@ def init_env(num_products):
     return env
 
 
-num_product_items = 50000
-webshop_env = init_env(num_product_items)
-webshop_env.reset()
-print(f"Finished initializing WebshopEnv with {num_product_items} items.")
+def get_webshop_env():
+    """Returns the shared environment, building and resetting it on first use.
+
+    Concurrent callers wait for the same build. If the build fails the error
+    is recorded in `get_init_stats()` and re-raised; the next call retries.
+    """
+    global _webshop_env
+    if _webshop_env is not None:
+        return _webshop_env
+    with _lock:
+        if _webshop_env is not None:
+            return _webshop_env
+        _stats.update(state="loading", started_at=time.time(), error=None)
+        start = time.perf_counter()
+        try:
+            env = init_env(num_product_items)
+            env.reset()
+        except Exception as e:
+            _stats.update(state="failed", error=repr(e))
+            raise
+        _stats.update(
+            state="ready",
+            ready_at=time.time(),
+            init_seconds=time.perf_counter() - start,
+        )
+        _webshop_env = env
+    print(
+        f"Finished initializing WebshopEnv with {num_product_items} items "
+        f"in {_stats['init_seconds']:.1f}s."
+    )
+    return _webshop_env
+
+
+def _warmup():
+    try:
+        get_webshop_env()
+    except Exception as e:
+        print(f"WebshopEnv warm-up failed: {e!r}")
+
+
+def start_warmup():
+    """Starts building the environment in a daemon thread; returns the thread.
+
+    Calling it again while a warm-up is running, or once the environment is
+    ready, does not start another build.
+    """
+    global _warmup_thread
+    with _lock:
+        if _warmup_thread is None or not _warmup_thread.is_alive():
+            if _webshop_env is None:
+                _warmup_thread = threading.Thread(
+                    target=_warmup, name="webshop-env-warmup", daemon=True
+                )
+                _warmup_thread.start()
+        return _warmup_thread
+
+
+def is_ready():
+    return _webshop_env is not None
+
+
+def get_init_stats():
+    """Returns a copy of the initialization state, for health checks.
+
+    `state` is one of "not_started", "loading", "ready" or "failed";
+    `init_seconds` is the build time once ready, and `loading_seconds` the
+    time spent so far while loading.
+    """
+    stats = dict(_stats)
+    if stats["state"] == "loading":
+        stats["loading_seconds"] = time.time() - stats["started_at"]
+    return stats
+
+
+def __getattr__(name):
+    # Keeps `from ...init_env import webshop_env` working; it builds the
+    # environment on first access instead of at import.
+    if name == "webshop_env":
+        return get_webshop_env()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+if os.getenv("WEBSHOP_WARMUP") == "1":
+    start_warmup()
@@ -20,7 +20,9 @@ sys.path.insert(0, "../")
 
 from web_agent_site.engine.engine import load_products
 
-all_products, *_ = load_products(filepath="../data/items_shuffle.json")
+all_products, *_ = load_products(
+    filepath="../data/items_shuffle.json", use_catalog=False
+)
 
 docs = []
 for p in tqdm(all_products, total=len(all_products)):
@@ -0,0 +1,402 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Memory-mapped, pre-processed product catalog.
+
+`build_catalog` runs the `process_products` step of `load_products` once, offline, and writes
+the result to a directory next to the product file:
+
+  core.bin / core_offsets.npy      JSON of the fields used by search, goals,
+                                   result pages and rewards, one blob per row,
+                                   including the spaCy noun tokens of the
+                                   product name for rewards
+  detail.bin / detail_offsets.npy  JSON of the large fields (description,
+                                   bullet points, images, ...)
+  asins.npy, pricing.npy,          per-row columns
+  source_index.npy
+  meta.json                        source file fingerprints and build options
+
+At runtime `open_catalog` memory-maps these files, so startup only reads the
+small columns, rows are decoded when first accessed, and worker processes
+that open the same catalog share its pages through the OS page cache.
+
+Usage:
+    cd personalized_shopping/shared_libraries
+    python -m web_agent_site.engine.catalog [--human_goals]
+"""
+
+import argparse
+from collections import defaultdict
+from collections.abc import Mapping, Sequence
+from functools import lru_cache
+import json
+import mmap
+import os
+import time
+
+import numpy as np
+from tqdm import tqdm
+
+from ..utils import (
+    DEFAULT_ATTR_PATH,
+    DEFAULT_FILE_PATH,
+    HUMAN_ATTR_PATH,
+)
+
+CATALOG_VERSION = 2
+
+# Large fields that only item sub pages and rewards read; everything else is
+# stored in the core blob.
+DETAIL_KEYS = frozenset(
+    {
+        "full_description",
+        "Description",
+        "small_description",
+        "BulletPoints",
+        "Reviews",
+        "images",
+        "option_to_image",
+        "customization_options",
+    }
+)
+
+# Decoded rows kept in memory per catalog.
+ROW_CACHE_SIZE = 8192
+
+
+def catalog_dir(filepath, human_goals):
+    """Returns the catalog directory for a product file and goal type."""
+    stem = os.path.splitext(filepath)[0]
+    return f"{stem}.catalog-{'human' if human_goals else 'synthetic'}"
+
+
+def _fingerprint(paths):
+    fingerprint = {}
+    for path in paths:
+        stat = os.stat(path)
+        fingerprint[os.path.basename(path)] = [stat.st_size, stat.st_mtime_ns]
+    return fingerprint
+
+
+def _source_paths(filepath):
+    return [filepath, DEFAULT_ATTR_PATH, HUMAN_ATTR_PATH]
+
+
+def _write_blobs(path, blobs):
+    offsets = np.zeros(len(blobs) + 1, dtype=np.int64)
+    with open(path, "wb") as f:
+        for i, blob in enumerate(blobs):
+            f.write(blob)
+            offsets[i + 1] = offsets[i] + len(blob)
+    return offsets
+
+
+def build_catalog(filepath=DEFAULT_FILE_PATH, human_goals=False, out_dir=None):
+    """Processes every product in `filepath` and writes the catalog files."""
+    # Imported here: engine imports this module for the runtime fast path.
+    from .engine import clean_product_keys, process_products
+    from .goal import get_noun_tokens_batch
+
+    start = time.time()
+    out_dir = out_dir or catalog_dir(filepath, human_goals)
+    with open(filepath) as f:
+        products = clean_product_keys(json.load(f))
+    all_products, source_index = process_products(products, human_goals)
+    os.makedirs(out_dir, exist_ok=True)
+    # meta.json is written last, so a catalog is never opened half-written.
+    meta_path = os.path.join(out_dir, "meta.json")
+    if os.path.exists(meta_path):
+        os.remove(meta_path)
+
+    # Noun tokens of the product name, which `get_type_reward` compares
+    names = sorted({p["name"] for p in all_products})
+    nouns = dict(zip(names, get_noun_tokens_batch(tqdm(names, desc="nouns"))))
+    for product in all_products:
+        product["name_nouns"] = nouns[product["name"]]
+
+    core, detail = [], []
+    pricing = np.full((len(all_products), 2), np.nan, dtype=np.float64)
+    for i, product in enumerate(all_products):
+        core_fields = {k: v for k, v in product.items() if k not in DETAIL_KEYS}
+        detail_fields = {k: v for k, v in product.items() if k in DETAIL_KEYS}
+        core.append(json.dumps(core_fields).encode("utf-8"))
+        detail.append(json.dumps(detail_fields).encode("utf-8"))
+        pricing[i, : len(product["pricing"])] = product["pricing"]
+
+    np.save(
+        os.path.join(out_dir, "core_offsets.npy"),
+        _write_blobs(os.path.join(out_dir, "core.bin"), core),
+    )
+    np.save(
+        os.path.join(out_dir, "detail_offsets.npy"),
+        _write_blobs(os.path.join(out_dir, "detail.bin"), detail),
+    )
+    np.save(
+        os.path.join(out_dir, "asins.npy"),
+        np.array([p["asin"] for p in all_products], dtype="U10"),
+    )
+    np.save(os.path.join(out_dir, "pricing.npy"), pricing)
+    np.save(
+        os.path.join(out_dir, "source_index.npy"),
+        np.array(source_index, dtype=np.int64),
+    )
+    with open(meta_path + ".tmp", "w") as f:
+        json.dump(
+            {
+                "version": CATALOG_VERSION,
+                "human_goals": bool(human_goals),
+                "num_rows": len(all_products),
+                "sources": _fingerprint(_source_paths(filepath)),
+            },
+            f,
+        )
+    os.replace(meta_path + ".tmp", meta_path)
+    print(
+        f"Wrote catalog of {len(all_products)} products to {out_dir} "
+        f"in {time.time() - start:.1f}s."
+    )
+    return out_dir
+
+
+class CatalogProduct(Mapping):
+    """Read-only product row. Detail fields are decoded on first access."""
+
+    __slots__ = ("_catalog", "_row", "_core", "_detail")
+
+    def __init__(self, catalog, row, core):
+        self._catalog = catalog
+        self._row = row
+        self._core = core
+        self._detail = None
+
+    def _detail_fields(self):
+        if self._detail is None:
+            self._detail = self._catalog._decode("detail", self._row)
+        return self._detail
+
+    def __getitem__(self, key):
+        if key in self._core:
+            return self._core[key]
+        if key in DETAIL_KEYS:
+            return self._detail_fields()[key]
+        raise KeyError(key)
+
+    def __contains__(self, key):
+        return key in self._core or (
+            key in DETAIL_KEYS and key in self._detail_fields()
+        )
+
+    def __iter__(self):
+        yield from self._core
+        yield from self._detail_fields()
+
+    def __len__(self):
+        return len(self._core) + len(self._detail_fields())
+
+    def __repr__(self):
+        return f"CatalogProduct({self._core.get('asin')!r})"
+
+    def to_dict(self):
+        return {**self._core, **self._detail_fields()}
+
+
+def _read_meta(path):
+    with open(os.path.join(path, "meta.json")) as f:
+        return json.load(f)
+
+
+def _map_blob(path):
+    with open(path, "rb") as f:
+        # `mmap` cannot map an empty file, which a catalog of no products has.
+        if os.fstat(f.fileno()).st_size == 0:
+            return b""
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+class ProductCatalog:
+    """Memory-mapped catalog written by `build_catalog`.
+
+    Raises `OSError` or `ValueError` if a file is missing, truncated or
+    inconsistent with `meta.json`.
+    """
+
+    def __init__(self, path, meta=None):
+        self.path = path
+        self.meta = meta if meta is not None else _read_meta(path)
+        self.asins = np.load(os.path.join(path, "asins.npy"), mmap_mode="r")
+        self.pricing = np.load(os.path.join(path, "pricing.npy"), mmap_mode="r")
+        self.source_index = np.load(
+            os.path.join(path, "source_index.npy"), mmap_mode="r"
+        )
+        self._offsets = {}
+        self._blobs = {}
+        for name in ("core", "detail"):
+            self._offsets[name] = np.load(
+                os.path.join(path, f"{name}_offsets.npy"), mmap_mode="r"
+            )
+            self._blobs[name] = _map_blob(os.path.join(path, f"{name}.bin"))
+            if (
+                len(self._offsets[name]) != self.meta["num_rows"] + 1
+                or self._offsets[name][-1] != len(self._blobs[name])
+            ):
+                raise ValueError(f"{name}.bin does not match its offsets")
+        columns = (self.asins, self.pricing, self.source_index)
+        if any(len(column) != self.meta["num_rows"] for column in columns):
+            raise ValueError("Catalog columns do not match meta.json")
+        self.row = lru_cache(maxsize=ROW_CACHE_SIZE)(self._row)
+
+    def _decode(self, name, row):
+        offsets = self._offsets[name]
+        return json.loads(self._blobs[name][offsets[row] : offsets[row + 1]])
+
+    def _row(self, row):
+        return CatalogProduct(self, row, self._decode("core", row))
+
+    def num_rows(self, num_products=None):
+        """Rows that `load_products(num_products=...)` would have kept."""
+        if num_products is None:
+            return len(self.asins)
+        # Rows are in source order, so the first `num_products` source entries
+        # map to a prefix of the rows.
+        return int(np.searchsorted(self.source_index, num_products))
+
+    def load(self, num_products=None):
+        """Returns the same tuple as `load_products`, backed by this catalog."""
+        n = self.num_rows(num_products)
+        all_products = CatalogProducts(self, n)
+        product_item_dict = CatalogProductDict(self, n)
+        product_prices = generate_catalog_prices(self.asins[:n], self.pricing[:n])
+        attribute_to_asins = LazyAttributeIndex(all_products)
+        return all_products, product_item_dict, product_prices, attribute_to_asins
+
+
+class CatalogProducts(Sequence):
+    """The first `n` catalog rows as a sequence of `CatalogProduct`."""
+
+    def __init__(self, catalog, n):
+        self._catalog = catalog
+        self._n = n
+
+    def __len__(self):
+        return self._n
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._n))]
+        if index < 0:
+            index += self._n
+        if not 0 <= index < self._n:
+            raise IndexError(index)
+        return self._catalog.row(index)
+
+
+class CatalogProductDict(Mapping):
+    """ASIN -> `CatalogProduct` over the first `n` catalog rows."""
+
+    def __init__(self, catalog, n):
+        self._catalog = catalog
+        self._rows = {asin: i for i, asin in enumerate(catalog.asins[:n].tolist())}
+
+    def __getitem__(self, asin):
+        return self._catalog.row(self._rows[asin])
+
+    def __contains__(self, asin):
+        return asin in self._rows
+
+    def __iter__(self):
+        return iter(self._rows)
+
+    def __len__(self):
+        return len(self._rows)
+
+
+class LazyAttributeIndex(Mapping):
+    """`attribute_to_asins`, built from the product rows on first use."""
+
+    def __init__(self, all_products):
+        self._all_products = all_products
+        self._index = None
+
+    def _build(self):
+        if self._index is None:
+            index = defaultdict(set)
+            for p in self._all_products:
+                for a in p["Attributes"]:
+                    index[a].add(p["asin"])
+            self._index = index
+        return self._index
+
+    def __getitem__(self, attribute):
+        return self._build()[attribute]
+
+    def __iter__(self):
+        return iter(self._build())
+
+    def __len__(self):
+        return len(self._build())
+
+
+def generate_catalog_prices(asins, pricing):
+    """Same as `engine.generate_product_prices`, from the pricing column."""
+    import random
+
+    product_prices = dict()
+    for asin, (low, high) in zip(asins.tolist(), pricing.tolist()):
+        if np.isnan(high):
+            price = low
+        else:
+            price = random.uniform(low, high)
+        product_prices[asin] = price
+    return product_prices
+
+
+def open_catalog(filepath, human_goals=False):
+    """Returns the catalog for `filepath` if one was built and is up to date, else None."""
+    path = catalog_dir(filepath, human_goals)
+    try:
+        meta = _read_meta(path)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError):
+        print(f"Catalog {path} is unreadable; rebuild it with build_catalog.")
+        return None
+    try:
+        sources = _fingerprint(_source_paths(filepath))
+    except OSError:
+        sources = None
+    if (
+        not isinstance(meta, dict)
+        or meta.get("version") != CATALOG_VERSION
+        or meta.get("human_goals") != bool(human_goals)
+        or meta.get("sources") != sources
+    ):
+        print(f"Catalog {path} is out of date; rebuild it with build_catalog.")
+        return None
+    try:
+        return ProductCatalog(path, meta)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Catalog {path} is incomplete ({e}); rebuild it with build_catalog.")
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the memory-mapped product catalog.")
+    parser.add_argument("--filepath", default=DEFAULT_FILE_PATH)
+    parser.add_argument("--human_goals", action="store_true")
+    args = parser.parse_args()
+    build_catalog(args.filepath, human_goals=args.human_goals)
+
+
+if __name__ == "__main__":
+    main()
@@ -22,8 +22,7 @@ import os
 import random
 import re
 
-from flask import render_template_string
-from pyserini.search.lucene import LuceneSearcher
+from flask import current_app, render_template
 from rich import print
 from tqdm import tqdm
 
@@ -32,10 +31,13 @@ from ..utils import (
     DEFAULT_ATTR_PATH,
     HUMAN_ATTR_PATH,
 )
+from .catalog import open_catalog
 
 TEMPLATE_DIR = os.path.join(BASE_DIR, "templates")
 
 SEARCH_RETURN_N = 50
+# Keyword prefixes for random, attribute, category and query lookups
+SEARCH_KEYWORD_PREFIXES = ("<r>", "<a>", "<c>", "<q>")
 PRODUCT_WINDOW = 10
 TOP_K_ATTR = 10
 
@@ -51,20 +53,26 @@ ACTION_TO_TEMPLATE = {
     "Attributes": "attributes_page.html",
 }
 
+TEMPLATE_NAMES = (
+    "search_page.html",
+    "results_page.html",
+    "done_page.html",
+    "item_page.html",
+    *ACTION_TO_TEMPLATE.values(),
+)
+
 
 def map_action_to_html(action, **kwargs):
     action_name, action_arg = parse_action(action)
     if action_name == "start":
-        path = os.path.join(TEMPLATE_DIR, "search_page.html")
-        html = render_template_string(
-            read_html_template(path=path),
+        html = render_page(
+            "search_page.html",
             session_id=kwargs["session_id"],
             instruction_text=kwargs["instruction_text"],
         )
     elif action_name == "search":
-        path = os.path.join(TEMPLATE_DIR, "results_page.html")
-        html = render_template_string(
-            read_html_template(path=path),
+        html = render_page(
+            "results_page.html",
             session_id=kwargs["session_id"],
             products=kwargs["products"],
             keywords=kwargs["keywords"],
@@ -73,9 +81,8 @@ def map_action_to_html(action, **kwargs):
             instruction_text=kwargs["instruction_text"],
         )
     elif action_name == "click" and action_arg == END_BUTTON:
-        path = os.path.join(TEMPLATE_DIR, "done_page.html")
-        html = render_template_string(
-            read_html_template(path),
+        html = render_page(
+            "done_page.html",
             session_id=kwargs["session_id"],
             reward=kwargs["reward"],
             asin=kwargs["asin"],
@@ -90,9 +97,8 @@ def map_action_to_html(action, **kwargs):
             product_category=kwargs.get("product_category"),
         )
     elif action_name == "click" and action_arg in ACTION_TO_TEMPLATE:
-        path = os.path.join(TEMPLATE_DIR, ACTION_TO_TEMPLATE[action_arg])
-        html = render_template_string(
-            read_html_template(path),
+        html = render_page(
+            ACTION_TO_TEMPLATE[action_arg],
             session_id=kwargs["session_id"],
             product_info=kwargs["product_info"],
             keywords=kwargs["keywords"],
@@ -102,9 +108,8 @@ def map_action_to_html(action, **kwargs):
             instruction_text=kwargs.get("instruction_text"),
         )
     elif action_name == "click":
-        path = os.path.join(TEMPLATE_DIR, "item_page.html")
-        html = render_template_string(
-            read_html_template(path),
+        html = render_page(
+            "item_page.html",
             session_id=kwargs["session_id"],
             product_info=kwargs["product_info"],
             keywords=kwargs["keywords"],
@@ -125,6 +130,29 @@ def read_html_template(path):
     return template
 
 
+def load_templates(app):
+    """Compiles every page template with `app`'s Jinja environment.
+
+    The compiled templates are kept in `app.extensions`, so each one is read
+    and compiled once per app instead of on every rendered page.
+    """
+    templates = app.extensions.get("webshop_templates")
+    if templates is None:
+        templates = {
+            name: app.jinja_env.from_string(
+                read_html_template(os.path.join(TEMPLATE_DIR, name))
+            )
+            for name in TEMPLATE_NAMES
+        }
+        app.extensions["webshop_templates"] = templates
+    return templates
+
+
+def render_page(name, **context):
+    """Renders a page template in the current Flask app context."""
+    return render_template(load_templates(current_app)[name], **context)
+
+
 def parse_action(action):
     """Parse action string to action name and its arguments."""
     pattern = re.compile(r"(.+)\[(.+)\]")
@@ -176,14 +204,35 @@ def get_top_n_product_from_keywords(
     else:
         keywords = " ".join(keywords)
         hits = search_engine.search(keywords, k=SEARCH_RETURN_N)
-        docs = [search_engine.doc(hit.docid) for hit in hits]
-        top_n_asins = [json.loads(doc.raw())["id"] for doc in docs]
-        top_n_products = [
-            product_item_dict[asin] for asin in top_n_asins if asin in product_item_dict
-        ]
+        top_n_products = hits_to_products(hits, search_engine, product_item_dict)
     return top_n_products
 
 
+def hits_to_products(hits, search_engine, product_item_dict):
+    docs = [search_engine.doc(hit.docid) for hit in hits]
+    top_n_asins = [json.loads(doc.raw())["id"] for doc in docs]
+    return [
+        product_item_dict[asin] for asin in top_n_asins if asin in product_item_dict
+    ]
+
+
+def get_top_n_products_batch(keywords_list, search_engine, product_item_dict, threads=1):
+    """Keyword search for several queries in one `batch_search` call.
+
+    Only for plain keyword queries (not `<r>`, `<a>`, `<c>` or `<q>`); returns
+    what `get_top_n_product_from_keywords` would for each of them.
+    """
+    queries = [" ".join(keywords) for keywords in keywords_list]
+    qids = [str(i) for i in range(len(queries))]
+    results = search_engine.batch_search(
+        queries, qids, k=SEARCH_RETURN_N, threads=threads
+    )
+    return [
+        hits_to_products(results[qid], search_engine, product_item_dict)
+        for qid in qids
+    ]
+
+
 def get_product_per_page(top_n_products, page):
     return top_n_products[(page - 1) * PRODUCT_WINDOW : page * PRODUCT_WINDOW]
 
@@ -218,6 +267,10 @@ def init_search_engine(num_products=None):
         raise NotImplementedError(
             f"num_products being {num_products} is not supported yet."
         )
+    # Importing pyserini starts the JVM, which does not survive a fork; keep it
+    # out of module import so rollout workers can fork before searching.
+    from pyserini.search.lucene import LuceneSearcher
+
     search_engine = LuceneSearcher(
         os.path.join(BASE_DIR, f"../search_engine/{indexes}")
     )
@@ -244,13 +297,40 @@ def clean_product_keys(products):
     return products
 
 
-def load_products(filepath, num_products=None, human_goals=True):
-    # TODO: move to preprocessing step -> enforce single source of truth
+def load_products(filepath, num_products=None, human_goals=True, use_catalog=True):
+    # Use the pre-processed catalog when one was built with
+    # `python -m ...engine.catalog`; otherwise process the raw JSON.
+    if use_catalog:
+        catalog = open_catalog(filepath, human_goals)
+        if catalog is not None:
+            print(f"Products loaded from catalog {catalog.path}.")
+            return catalog.load(num_products)
+
     with open(filepath) as f:
         products = json.load(f)
     print("Products loaded.")
     products = clean_product_keys(products)
+    if num_products is not None:
+        # using item_shuffle.json, we assume products already shuffled
+        products = products[:num_products]
+    all_products, _ = process_products(products, human_goals)
 
+    attribute_to_asins = defaultdict(set)
+    for p in all_products:
+        for a in p["Attributes"]:
+            attribute_to_asins[a].add(p["asin"])
+
+    product_item_dict = {p["asin"]: p for p in all_products}
+    product_prices = generate_product_prices(all_products)
+    return all_products, product_item_dict, product_prices, attribute_to_asins
+
+
+def process_products(products, human_goals=True):
+    """Turns raw (key-cleaned) products into the records the web app uses.
+
+    Returns the processed products and, for each one, its index in `products`.
+    Shared by `load_products` and `catalog.build_catalog`.
+    """
     # with open(DEFAULT_REVIEW_PATH) as f:
     #     reviews = json.load(f)
     all_reviews = dict()
@@ -270,10 +350,7 @@ def load_products(filepath, num_products=None, human_goals=True):
 
     asins = set()
     all_products = []
-    attribute_to_asins = defaultdict(set)
-    if num_products is not None:
-        # using item_shuffle.json, we assume products already shuffled
-        products = products[:num_products]
+    source_index = []
     for i, p in tqdm(enumerate(products), total=len(products)):
         asin = p["asin"]
         if asin == "nan" or len(asin) > 10:
@@ -374,11 +451,6 @@ def load_products(filepath, num_products=None, human_goals=True):
         products[i]["query"] = p["query"].lower().strip()
 
         all_products.append(products[i])
+        source_index.append(i)
 
-    for p in all_products:
-        for a in p["Attributes"]:
-            attribute_to_asins[a].add(p["asin"])
-
-    product_item_dict = {p["asin"]: p for p in all_products}
-    product_prices = generate_product_prices(all_products)
-    return all_products, product_item_dict, product_prices, attribute_to_asins
+    return all_products, source_index
@@ -15,16 +15,53 @@
 """Functions for specifying goals and reward calculations."""
 
 from collections import defaultdict
+from functools import lru_cache
 import itertools
 import random
+import numpy as np
+from rapidfuzz.fuzz import token_set_ratio
+from rapidfuzz.process import cpdist
 from rich import print
-import spacy
 from thefuzz import fuzz
+from thefuzz.utils import full_process
 from .normalize import normalize_color
 
-nlp = spacy.load("en_core_web_sm")
-
 PRICE_RANGE = [10.0 * i for i in range(1, 100)]
+NOUN_POS = ("PNOUN", "NOUN", "PROPN")
+# Attributes and options match if their `fuzz.token_set_ratio` exceeds this
+FUZZY_MATCH_THRESHOLD = 85
+
+_nlp = None
+
+
+def get_nlp():
+    """Loads the spaCy pipeline on first use"""
+    global _nlp
+    if _nlp is None:
+        import spacy
+
+        _nlp = spacy.load("en_core_web_sm")
+    return _nlp
+
+
+def _nouns(doc):
+    return [t.text.lower() for t in doc if t.pos_ in NOUN_POS]
+
+
+@lru_cache(maxsize=None)
+def _noun_tokens(text):
+    return tuple(_nouns(get_nlp()(text)))
+
+
+def get_noun_tokens(text):
+    """Lower-cased noun tokens of a product or goal name, memoized per name"""
+    return list(_noun_tokens(text))
+
+
+def get_noun_tokens_batch(texts, batch_size=256):
+    """`get_noun_tokens` for many names, e.g. when building the catalog"""
+    docs = get_nlp().pipe(texts, batch_size=batch_size)
+    return [_nouns(doc) for doc in docs]
 
 
 def get_goals(all_products, product_prices, human_goals=True):
@@ -66,6 +103,7 @@ def get_human_goals(all_products, product_prices):
                     "category": item["category"],
                     "query": item["query"],
                     "name": item["name"],
+                    "name_nouns": item.get("name_nouns"),
                     "product_category": item["product_category"],
                     "instruction_text": product["instruction"].strip(".") + price_text,
                     "attributes": attributes,
@@ -132,6 +170,8 @@ def get_synthetic_goals(all_products, product_prices):
                     "price_upper": price_upper,
                     "goal_options": goal_options,
                     "name": product["Title"],
+                    # The title is the product name (see `process_products`)
+                    "name_nouns": product.get("name_nouns"),
                 }
             )
             for att in attributes:
@@ -161,19 +201,13 @@ def get_type_reward(purchased_product, goal):
     purchased_type = purchased_product["name"]
     desired_type = goal["name"]
 
-    purchased_type_parse = nlp(purchased_type)
-    desired_type_parse = nlp(desired_type)
-
-    purchased_type_parse = [
-        t.text.lower()
-        for t in purchased_type_parse
-        if t.pos_ in ("PNOUN", "NOUN", "PROPN")
-    ]
-    desired_type_parse = [
-        t.text.lower()
-        for t in desired_type_parse
-        if t.pos_ in ("PNOUN", "NOUN", "PROPN")
-    ]
+    # Noun tokens precomputed in the catalog, else parsed once per name
+    purchased_type_parse = purchased_product.get("name_nouns")
+    if purchased_type_parse is None:
+        purchased_type_parse = get_noun_tokens(purchased_type)
+    desired_type_parse = goal.get("name_nouns")
+    if desired_type_parse is None:
+        desired_type_parse = get_noun_tokens(desired_type)
 
     n_intersect_type = len(set(purchased_type_parse) & set(desired_type_parse))
     if len(desired_type_parse) == 0:
@@ -202,7 +236,12 @@ def get_type_reward(purchased_product, goal):
     )
 
 
-def get_attribute_reward(purchased_product, goal):
+def fuzzy_match(s1, s2):
+    """Whether two attributes or options match"""
+    return fuzz.token_set_ratio(s1, s2) > FUZZY_MATCH_THRESHOLD
+
+
+def get_attribute_reward(purchased_product, goal, match=fuzzy_match):
     """Determines whether purchased products shares same attributes as goal"""
     purchased_attrs = purchased_product["Attributes"]
     goal_attrs = goal["attributes"]
@@ -212,8 +251,7 @@ def get_attribute_reward(purchased_product, goal):
         matched = False
         # Check whether goal attribute found in purchased product attribute list
         for p_attr in purchased_attrs:
-            score = fuzz.token_set_ratio(p_attr, g_attr)
-            if score > 85:
+            if match(p_attr, g_attr):
                 num_attr_matches += 1
                 matched = True
                 break
@@ -230,17 +268,22 @@ def get_attribute_reward(purchased_product, goal):
     return r_attr, num_attr_matches
 
 
-def get_option_reward(purchased_options, goal_options):
+@lru_cache(maxsize=65536)
+def _normalize_option(option):
+    # Options repeat across products and goals; normalize each only once
+    return normalize_color(option)
+
+
+def get_option_reward(purchased_options, goal_options, match=fuzzy_match):
     """Calculate reward for purchased product's options w.r.t. goal options"""
-    purchased_options = [normalize_color(o) for o in purchased_options]
-    goal_options = [normalize_color(o) for o in goal_options]
+    purchased_options = [_normalize_option(o) for o in purchased_options]
+    goal_options = [_normalize_option(o) for o in goal_options]
 
     # Perform fuzzy matching of each purchased option against each goal option
     num_option_matches = 0
     for g_option in goal_options:
         for p_option in purchased_options:
-            score = fuzz.token_set_ratio(p_option, g_option)
-            if score > 85:
+            if match(p_option, g_option):
                 num_option_matches += 1
                 break
 
@@ -249,21 +292,27 @@ def get_option_reward(purchased_options, goal_options):
     return r_option, num_option_matches
 
 
+def _goal_options(goal):
+    if isinstance(goal["goal_options"], dict):
+        return goal["goal_options"].items()
+    return goal["goal_options"]
+
+
 def get_reward(purchased_product, goal, price, options, **kwargs):
-    """Get cumulative reward score for purchased product and goal"""
+    """Get cumulative reward score for purchased product and goal
+
+    Pass `match` to replace `fuzzy_match` for attributes and options, and
+    `verbose=True` to also return the score sub-components.
+    """
+    match = kwargs.get("match", fuzzy_match)
     r_type_dict = get_type_reward(purchased_product, goal)
 
     r_price = (price <= goal["price_upper"]) if goal["price_upper"] > 0 else None
 
-    r_att, num_attr_matches = get_attribute_reward(purchased_product, goal)
+    r_att, num_attr_matches = get_attribute_reward(purchased_product, goal, match)
 
     r_option, num_option_matches = get_option_reward(
-        list(options.values()),
-        (
-            goal["goal_options"].items()
-            if isinstance(goal["goal_options"], dict)
-            else goal["goal_options"]
-        ),
+        list(options.values()), _goal_options(goal), match
     )
 
     total_reward = (num_attr_matches + num_option_matches + r_price) / (
@@ -295,3 +344,70 @@ def get_reward(purchased_product, goal, price, options, **kwargs):
             )
         return total_reward, info
     return total_reward
+
+
+def get_fuzzy_matcher(pairs, workers=1):
+    """`fuzzy_match`, scored in one batch for the given (s1, s2) pairs
+
+    Each distinct pair of processed strings is scored once, by rapidfuzz in
+    native code, skipping scores below the threshold. Returns a function that
+    answers `fuzzy_match(s1, s2)` for any of the pairs.
+    """
+    # The processing `fuzz.token_set_ratio` applies; None never matches
+    processed = {None: None}
+    scored = set()
+    for s1, s2 in pairs:
+        if s1 not in processed:
+            processed[s1] = full_process(s1, force_ascii=True)
+        if s2 not in processed:
+            processed[s2] = full_process(s2, force_ascii=True)
+        scored.add((processed[s1], processed[s2]))
+    scored = [(p1, p2) for p1, p2 in scored if p1 is not None and p2 is not None]
+    matched = set()
+    if scored:
+        scores = cpdist(
+            [p1 for p1, _ in scored],
+            [p2 for _, p2 in scored],
+            scorer=token_set_ratio,
+            processor=None,
+            score_cutoff=FUZZY_MATCH_THRESHOLD,
+            dtype=np.float64,
+            workers=workers,
+        )
+        # `fuzz.token_set_ratio` rounds half to even, as `np.rint` does
+        for pair, is_match in zip(scored, np.rint(scores) > FUZZY_MATCH_THRESHOLD):
+            if is_match:
+                matched.add(pair)
+    return lambda s1, s2: (processed[s1], processed[s2]) in matched
+
+
+def get_reward_batch(purchases, workers=1, **kwargs):
+    """`get_reward` for many purchases at once, e.g. for offline evaluation
+
+    Arguments:
+
+    purchases (`list`) -- (purchased_product, goal, price, options) tuples,
+      the arguments of `get_reward`
+    workers (`int`) -- Threads for fuzzy matching; -1 uses every core
+    **kwargs -- As for `get_reward` (e.g. verbose)
+
+    Returns the list of what `get_reward` returns for each purchase. All the
+    attribute and option pairs that `get_reward` may compare are matched in
+    one batch first, so only the cheap part of the reward runs per purchase.
+    """
+
+    def pairs():
+        for purchased_product, goal, _, options in purchases:
+            yield from itertools.product(
+                purchased_product["Attributes"], goal["attributes"]
+            )
+            yield from itertools.product(
+                [_normalize_option(o) for o in options.values()],
+                [_normalize_option(o) for o in _goal_options(goal)],
+            )
+
+    kwargs["match"] = get_fuzzy_matcher(pairs(), workers=workers)
+    return [
+        get_reward(purchased_product, goal, price, options, **kwargs)
+        for purchased_product, goal, price, options in purchases
+    ]
@@ -0,0 +1,294 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Structured pages for the simulated WebShop server.
+
+`map_action_to_page` takes the same arguments as `map_action_to_html` but
+returns a `Page` holding what the text environment reads from a page: the
+visible text, the clickables, the instruction and the product image. They
+are built from the template data directly, so text observations need neither
+rendering nor parsing; the HTML is rendered only if `Page.html` is read.
+
+Each builder below mirrors one template: its visible text nodes in document
+order, as BeautifulSoup's "html.parser" would extract them from the rendered
+page.
+"""
+
+from flask import current_app
+from jinja2.utils import htmlsafe_json_dumps
+
+from .engine import ACTION_TO_TEMPLATE, END_BUTTON, map_action_to_html, parse_action
+
+# Whitespace-only text nodes outside <pre> are collapsed by BeautifulSoup.
+_STRIP_ASCII_SPACES = str.maketrans("", "", "\x20\x0a\x09\x0c\x0d")
+
+BACK_TO_SEARCH_BUTTONS = ["Back to Search", "< Prev"]
+
+
+class Page:
+    """A rendered-on-demand page of the simulated WebShop site.
+
+    Attributes:
+
+    texts (`list`) -- Visible text nodes, stripped, in document order
+    clickables (`dict`) -- Lower-cased button/link text or option value ->
+      attributes of the element (`class`, `name`, `value`), as `SimServer`
+      reads them when handling a click
+    has_search_bar (`bool`) -- Whether the page has the search input
+    instruction_text (`str`) -- Text of the instruction heading, if any
+    image_url (`str`) -- Source of the product image, if any
+    """
+
+    def __init__(
+        self,
+        action,
+        kwargs,
+        texts,
+        clickables,
+        has_search_bar=False,
+        instruction_text=None,
+        image_url=None,
+    ):
+        self.action = action
+        self.kwargs = kwargs
+        self.texts = texts
+        self.clickables = clickables
+        self.has_search_bar = has_search_bar
+        self.instruction_text = instruction_text
+        self.image_url = image_url
+        # Pages are built inside the server's request context; keep the app
+        # so the HTML can be rendered later, outside of it.
+        self._app = current_app._get_current_object()
+        self._html = None
+
+    @property
+    def html(self):
+        if self._html is None:
+            with self._app.app_context(), self._app.test_request_context():
+                self._html = map_action_to_html(self.action, **self.kwargs)
+        return self._html
+
+    def text(self):
+        """Same as `WebAgentTextEnv.convert_html_to_text(self.html, simple=True)`."""
+        return " [SEP] ".join(self.texts)
+
+
+def _get(obj, key):
+    # `{{ obj.key }}` renders missing keys, and any key of None, as "".
+    if obj is None:
+        return ""
+    try:
+        return obj[key]
+    except (KeyError, TypeError):
+        return ""
+
+
+def _text_node(text, pre=False):
+    """Returns the text node html.parser makes of `text`, or None if there is none."""
+    text = str(text)
+    if text == "":
+        return None
+    if not pre and not text.translate(_STRIP_ASCII_SPACES):
+        return "\n" if "\n" in text else " "
+    return text
+
+
+class _Texts(list):
+    """Collects visible text the way `convert_html_to_text` extracts it."""
+
+    def add(self, text, pre=False):
+        node = _text_node(text, pre)
+        if node is not None and node != "\n":
+            self.append(node.strip())
+
+
+def _button():
+    return {"class": ["btn"]}
+
+
+def _instruction(texts, instruction_text, label="Instruction:"):
+    texts.add(label)
+    texts.add(instruction_text)
+    return label + (_text_node(instruction_text) or "")
+
+
+def _start_page(kwargs):
+    texts = _Texts()
+    texts.add("WebShop")
+    instruction = _instruction(texts, kwargs["instruction_text"], "Instruction: ")
+    texts.add("Search")
+    return dict(
+        texts=texts,
+        clickables={"search": _button()},
+        has_search_bar=True,
+        instruction_text=instruction,
+    )
+
+
+def _navigation(texts, kwargs, buttons):
+    instruction = _instruction(texts, kwargs["instruction_text"])
+    clickables = {}
+    for button in buttons:
+        texts.add(button)
+        clickables[button.lower()] = _button()
+    return instruction, clickables
+
+
+def _results_page(kwargs):
+    texts = _Texts()
+    page = kwargs["page"]
+    instruction, clickables = _navigation(texts, kwargs, ["Back to Search"])
+    texts.add(f"Page {page} (Total results: {kwargs['total']})")
+    for button in (["< Prev"] if page > 1 else []) + ["Next >"]:
+        texts.add(button)
+        clickables[button.lower()] = _button()
+    for item in kwargs["products"]:
+        texts.add(item["asin"])
+        texts.add(item["Title"])
+        texts.add(item["Price"])
+    for item in kwargs["products"]:
+        link_text = _text_node(item["asin"]) or ""
+        clickables[link_text.lower()] = {"class": ["product-link"]}
+    return dict(texts=texts, clickables=clickables, instruction_text=instruction)
+
+
+def _item_page(kwargs):
+    texts = _Texts()
+    product_info = kwargs["product_info"]
+    instruction, clickables = _navigation(texts, kwargs, BACK_TO_SEARCH_BUTTONS)
+    radios = {}
+    for option_name, option_contents in product_info["options"].items():
+        texts.add(option_name)
+        for option_content in option_contents:
+            texts.add(option_content)
+            radios[str(option_content)] = {
+                "type": "radio",
+                "name": str(option_name),
+                "value": str(option_content),
+            }
+    texts.add(product_info["Title"])
+    texts.add(f"Price: {product_info['Price']}")
+    texts.add(f"Rating: {product_info['Rating']}")
+    buttons = ["Description", "Features", "Reviews"]
+    if kwargs["show_attrs"]:
+        buttons.append("Attributes")
+    for button in buttons + [END_BUTTON]:
+        texts.add(button)
+        clickables[button.lower()] = _button()
+    clickables.update(radios)
+    return dict(
+        texts=texts,
+        clickables=clickables,
+        instruction_text=instruction,
+        image_url=str(product_info["MainImage"]),
+    )
+
+
+def _sub_page(kwargs, sub_page):
+    texts = _Texts()
+    product_info = kwargs["product_info"]
+    instruction, clickables = _navigation(texts, kwargs, BACK_TO_SEARCH_BUTTONS)
+    if sub_page == "Description":
+        texts.add(product_info["Description"])
+    elif sub_page == "Features":
+        for bulletpoint in product_info["BulletPoints"]:
+            texts.add(f" {bulletpoint}")
+    elif sub_page == "Reviews":
+        for review in product_info["Reviews"]:
+            texts.add(f'"{_get(review, "title")}"')
+            texts.add(_get(review, "score"))
+            texts.add(_get(review, "body"))
+    elif sub_page == "Attributes":
+        for attribute in product_info["Attributes"]:
+            texts.add(f" {attribute}")
+        texts.add(product_info["category"])
+        texts.add(product_info["query"])
+        texts.add(product_info["product_category"])
+    return dict(texts=texts, clickables=clickables, instruction_text=instruction)
+
+
+def _tojson(value):
+    # The `tojson` filter with the app's JSON policies.
+    policies = current_app.jinja_env.policies
+    return htmlsafe_json_dumps(
+        value,
+        dumps=policies["json.dumps_function"],
+        **policies["json.dumps_kwargs"],
+    )
+
+
+def _done_page(kwargs):
+    filters = current_app.jinja_env.filters
+    goal = kwargs.get("goal")
+    texts = _Texts()
+    texts.add("Thank you for shopping with us!")
+    texts.add("Your code: ")
+    texts.add(kwargs.get("mturk_code"), pre=True)
+    texts.add(" (Paste it in your MTurk interface.)")
+    texts.add("Purchased")
+    for label, value in [
+        ("asin", kwargs["asin"]),
+        ("options", _tojson(kwargs["options"])),
+        ("attrs", kwargs.get("purchased_attrs")),
+        ("category", kwargs.get("category")),
+        ("query", kwargs.get("query")),
+        ("product category", kwargs.get("product_category")),
+    ]:
+        texts.add(label)
+        texts.add(value, pre=True)
+    texts.add("Target")
+    for label, key in [
+        ("asin", "asin"),
+        ("options", "goal_options"),
+        ("attrs", "attributes"),
+        ("price upper", "price_upper"),
+        ("instuction text", "instruction_text"),
+        ("category", "category"),
+        ("product category", "product_category"),
+        ("query", "query"),
+    ]:
+        texts.add(label)
+        texts.add(_get(goal, key), pre=True)
+    texts.add("Goal ")
+    texts.add(filters["pprint"](goal), pre=True)
+    texts.add("Reward")
+    texts.add("Your score (min 0.0, max 1.0)")
+    texts.add(kwargs["reward"], pre=True)
+    texts.add("Reward Details ")
+    texts.add(filters["pprint"](kwargs.get("reward_info")), pre=True)
+    return dict(texts=texts, clickables={})
+
+
+def map_action_to_page(action, **kwargs):
+    """Returns the `Page` that `map_action_to_html(action, **kwargs)` renders.
+
+    Must be called in the Flask app context the HTML would be rendered in.
+    """
+    action_name, action_arg = parse_action(action)
+    if action_name == "start":
+        fields = _start_page(kwargs)
+    elif action_name == "search":
+        fields = _results_page(kwargs)
+    elif action_name == "click" and action_arg == END_BUTTON:
+        fields = _done_page(kwargs)
+    elif action_name == "click" and action_arg in ACTION_TO_TEMPLATE:
+        fields = _sub_page(kwargs, action_arg)
+    elif action_name == "click":
+        fields = _item_page(kwargs)
+    else:
+        raise ValueError("Action name not recognized.")
+    # The session's options dict changes with later clicks; keep this page's.
+    if isinstance(kwargs.get("options"), dict):
+        kwargs["options"] = dict(kwargs["options"])
+    return Page(action, kwargs, **fields)
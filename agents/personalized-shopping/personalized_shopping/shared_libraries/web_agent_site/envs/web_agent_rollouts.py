@@ -0,0 +1,157 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Rollouts of WebShop goals in forked worker processes.
+
+`RolloutRunner` loads the products and goals once, in the parent process,
+then forks workers that share them copy-on-write (products from a
+memory-mapped catalog are shared through the page cache as well). Each worker
+opens its own Lucene searcher after the fork, since the JVM does not survive
+one, and plays the goals it is handed with a `WebAgentTextEnv`.
+"""
+
+import gc
+import multiprocessing
+import os
+import random
+
+from ..utils import DEFAULT_FILE_PATH
+from .web_agent_text_env import SimServer, WebAgentTextEnv
+
+# Set in the parent before forking, and inherited by the workers.
+_runner = None
+# Per worker process.
+_env = None
+
+
+class RolloutRunner:
+    """Plays WebShop goals with a policy across worker processes"""
+
+    def __init__(
+        self,
+        policy,
+        num_workers=None,
+        observation_mode="text",
+        file_path=DEFAULT_FILE_PATH,
+        max_steps=100,
+        seed=0,
+        server=None,
+        **kwargs,
+    ):
+        """Constructor for rollout runner
+
+        Arguments:
+
+        policy (`func`) -- Maps a `WebAgentTextEnv` to its next action; it is
+          inherited by the workers, so it need not be picklable
+        num_workers (`int`) -- Worker processes (default: CPU count); 0 plays
+          the goals in this process
+        observation_mode (`str`) -- As for `WebAgentTextEnv`
+        file_path (`str`) -- Products file
+        max_steps (`int`) -- Steps after which an episode is cut off
+        seed (`int`) -- `random` is seeded with `seed + session_int` before
+          each episode, so results do not depend on the worker that plays it
+        server (`SimServer`) -- Server to share; to fork workers, it must not
+          have opened its search engine. By default one is created from `kwargs`
+        **kwargs -- `SimServer` arguments (num_products, human_goals, ...)
+        """
+        self.policy = policy
+        self.num_workers = os.cpu_count() if num_workers is None else num_workers
+        self.observation_mode = observation_mode
+        self.max_steps = max_steps
+        self.seed = seed
+        self.server = (
+            SimServer(
+                "http://127.0.0.1:3000",
+                file_path,
+                kwargs.get("filter_goals"),
+                kwargs.get("limit_goals", -1),
+                kwargs.get("num_products"),
+                kwargs.get("human_goals"),
+                kwargs.get("show_attrs", False),
+                load_search_engine=False,
+            )
+            if server is None
+            else server
+        )
+
+    def run(self, session_ints, chunksize=1):
+        """Plays the goal of every index in `session_ints`
+
+        Returns a list with one dict per goal, in the order of `session_ints`:
+        `session_int`, `reward`, `done`, `steps` and the server's `verbose_info`
+        for the purchase (None if the episode hit `max_steps`).
+        """
+        global _runner, _env
+        _runner, _env = self, None
+        if self.num_workers == 0:
+            try:
+                return [_rollout(session_int) for session_int in session_ints]
+            finally:
+                _runner = _env = None
+
+        if self.server.search_engine is not None:
+            raise ValueError(
+                "Cannot fork workers once the server has opened its search engine;"
+                " create it with load_search_engine=False."
+            )
+        # Objects already loaded never change; keep the collector from
+        # touching (and so copying) their pages in every worker.
+        gc.collect()
+        gc.freeze()
+        try:
+            context = multiprocessing.get_context("fork")
+            with context.Pool(self.num_workers) as pool:
+                return pool.map(_rollout, session_ints, chunksize=chunksize)
+        finally:
+            gc.unfreeze()
+            _runner = None
+
+
+def _init_env():
+    # Runs on a worker's first episode; errors reach `run` through the pool.
+    global _env
+    server = _runner.server
+    if server.search_engine is None:
+        server.init_search_engine()
+    # The constructor resets the env to a random goal: keep it from drawing
+    # from `random`, and drop the session it starts.
+    state = random.getstate()
+    _env = WebAgentTextEnv(
+        observation_mode=_runner.observation_mode,
+        server=server,
+        session_prefix=f"worker{os.getpid()}_",
+    )
+    random.setstate(state)
+    server.user_sessions.pop(_env.session, None)
+
+
+def _rollout(session_int):
+    if _env is None:
+        _init_env()
+    random.seed(_runner.seed + session_int)
+    _env.reset(session=session_int)
+    reward, done, steps = 0.0, False, 0
+    while not done and steps < _runner.max_steps:
+        _, reward, done, _ = _env.step(_runner.policy(_env))
+        steps += 1
+    # Drop the finished session, so a later episode of the same goal starts anew
+    session = _env.server.user_sessions.pop(_env.session)
+    return dict(
+        session_int=session_int,
+        reward=reward,
+        done=done,
+        steps=steps,
+        verbose_info=session.get("verbose_info"),
+    )
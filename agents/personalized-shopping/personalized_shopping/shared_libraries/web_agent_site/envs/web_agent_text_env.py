@@ -30,14 +30,17 @@ from ..engine.engine import (
     END_BUTTON,
     NEXT_PAGE,
     PREV_PAGE,
+    SEARCH_KEYWORD_PREFIXES,
     get_product_per_page,
     get_top_n_product_from_keywords,
+    get_top_n_products_batch,
     init_search_engine,
     load_products,
-    map_action_to_html,
+    load_templates,
     parse_action,
 )
 from ..engine.goal import get_goals, get_reward
+from ..engine.page import map_action_to_page
 from ..utils import (
     DEFAULT_FILE_PATH,
     FEAT_CONV,
@@ -150,32 +153,18 @@ class WebAgentTextEnv(gym.Env):
 
     def get_available_actions(self):
         """Returns list of available actions at the current step"""
-        html_obj = self._parse_html()
-
-        # Collect search bar, buttons, links, and options as clickables
-        search_bar = html_obj.find(id="search_input")
-        has_search_bar = True if search_bar is not None else False
-        buttons = html_obj.find_all(class_="btn")
-        product_links = html_obj.find_all(class_="product-link")
-        buying_options = html_obj.select('input[type="radio"]')
-
-        self.text_to_clickable = {
-            f"{b.get_text()}".lower(): b for b in buttons + product_links
-        }
-        for opt in buying_options:
-            opt_value = opt.get("value")
-            self.text_to_clickable[f"{opt_value}"] = opt
+        # Search bar, buttons, links, and options, as collected by the server
+        page = self.browser.page
+        self.text_to_clickable = dict(page.clickables)
         return dict(
-            has_search_bar=has_search_bar,
+            has_search_bar=page.has_search_bar,
             clickables=list(self.text_to_clickable.keys()),
         )
 
     def get_image(self):
-        """Scrape image from page HTML and return as a list of pixel values"""
-        html_obj = self._parse_html(self.browser.page_source)
-        image_url = html_obj.find(id="product-image")
+        """Get image of the current page and return as a list of pixel values"""
+        image_url = self.browser.page.image_url
         if image_url is not None:
-            image_url = image_url["src"]
             if image_url in self.ids:
                 image_idx = self.ids[image_url]
                 image = self.feats[image_idx]
@@ -184,9 +173,7 @@ class WebAgentTextEnv(gym.Env):
 
     def get_instruction_text(self):
         """Get corresponding instruction text for current environment session"""
-        html_obj = self._parse_html(self.browser.page_source)
-        instruction_text = html_obj.find(id="instruction-text").h4.text
-        return instruction_text
+        return self.browser.page.instruction_text
 
     def _parse_html(self, html=None):
         """Returns web request result wrapped in BeautifulSoup object
@@ -204,13 +191,13 @@ class WebAgentTextEnv(gym.Env):
     @property
     def observation(self):
         """Compiles state into either the `html` or `text` observation mode"""
-        html = self.state["html"]
         if self.observation_mode == "html":
-            return html
+            return self.browser.page_source
         elif self.observation_mode == "text":
-            return self.convert_html_to_text(html, simple=True)
+            # Built from the page's structured data, without rendering HTML
+            return self.browser.page.text()
         elif self.observation_mode == "text_rich":
-            return self.convert_html_to_text(html, simple=False)
+            return self.convert_html_to_text(self.browser.page_source, simple=False)
         elif self.observation_mode == "url":
             return self.state["url"]
         else:
@@ -310,6 +297,7 @@ class SimServer:
         num_products=None,
         human_goals=0,
         show_attrs=False,
+        load_search_engine=True,
     ):
         """Constructor for simulated server serving WebShop application
 
@@ -321,6 +309,8 @@ class SimServer:
         num_products (`int`) -- Number of products to search across
         human_goals (`bool`) -- If true, load human goals; otherwise, load synthetic
           goals
+        load_search_engine (`bool`) -- If false, leave `search_engine` unset until
+          `init_search_engine` is called, e.g. after forking worker processes
         """
         # Load all products, goals, and search engine
         self.base_url = base_url
@@ -331,7 +321,11 @@ class SimServer:
                 human_goals=human_goals,
             )
         )
-        self.search_engine = init_search_engine(num_products=num_products)
+        self.num_products = num_products
+        self.search_engine = None
+        if load_search_engine:
+            self.init_search_engine()
+        load_templates(app)
         self.goals = get_goals(self.all_products, self.product_prices, human_goals)
         self.show_attrs = show_attrs
 
@@ -361,21 +355,54 @@ class SimServer:
         self.weights = [goal["weight"] for goal in self.goals]
         self.cum_weights = [0] + np.cumsum(self.weights).tolist()
         self.user_sessions = dict()
+        self.prefetched_results = dict()
         self.search_time = 0
         self.render_time = 0
         self.sample_time = 0
         self.assigned_instruction_text = None  # TODO: very hacky, should remove
 
+    def init_search_engine(self):
+        """Open the Lucene index for the server's products"""
+        self.search_engine = init_search_engine(num_products=self.num_products)
+
+    def prefetch_search_results(self, keywords_list, threads=1):
+        """Run the keyword searches of several sessions as one batch
+
+        `search_results` uses the prefetched results for matching keywords
+        until `clear_prefetched_results` is called.
+        """
+        queries = {
+            tuple(keywords): keywords
+            for keywords in keywords_list
+            if keywords
+            and keywords[0] not in SEARCH_KEYWORD_PREFIXES
+            and tuple(keywords) not in self.prefetched_results
+        }
+        if not queries:
+            return
+        old_time = time.time()
+        results = get_top_n_products_batch(
+            list(queries.values()),
+            self.search_engine,
+            self.product_item_dict,
+            threads=threads,
+        )
+        self.prefetched_results.update(zip(queries, results))
+        self.search_time += time.time() - old_time
+
+    def clear_prefetched_results(self):
+        self.prefetched_results.clear()
+
     @app.route("/", methods=["GET", "POST"])
     def index(self, session_id, **kwargs):
         """Redirect to the search page with the given session ID"""
-        html = map_action_to_html(
+        web_page = map_action_to_page(
             "start",
             session_id=session_id,
             instruction_text=kwargs["instruction_text"],
         )
         url = f"{self.base_url}/{session_id}"
-        return html, url
+        return web_page, url
 
     @app.route("/", methods=["GET", "POST"])
     def search_results(self, session_id, **kwargs):
@@ -394,12 +421,14 @@ class SimServer:
 
         # Perform search on keywords from items and record amount of time it takes
         old_time = time.time()
-        top_n_products = get_top_n_product_from_keywords(
-            keywords,
-            self.search_engine,
-            self.all_products,
-            self.product_item_dict,
-        )
+        top_n_products = self.prefetched_results.get(tuple(keywords))
+        if top_n_products is None:
+            top_n_products = get_top_n_product_from_keywords(
+                keywords,
+                self.search_engine,
+                self.all_products,
+                self.product_item_dict,
+            )
         self.search_time += time.time() - old_time
 
         # Get product list from search result asins and get list of corresponding URLs
@@ -411,9 +440,9 @@ class SimServer:
             f"{keywords_url_string}/{page}"
         )
 
-        # Render HTML search page and record amount of time taken
+        # Build search page and record amount of time taken
         old_time = time.time()
-        html = map_action_to_html(
+        web_page = map_action_to_page(
             "search",
             session_id=session_id,
             products=products,
@@ -426,11 +455,11 @@ class SimServer:
             instruction_text=self.assigned_instruction_text,
         )
         self.render_time += time.time() - old_time
-        return html, url
+        return web_page, url
 
     @app.route("/", methods=["GET", "POST"])
     def item_page(self, session_id, **kwargs):
-        """Render and return the HTML for a product item page"""
+        """Build and return the page for a product item page"""
         session = self.user_sessions[session_id]
         clickable_name = kwargs["clickable_name"]
         text_to_clickable = kwargs["text_to_clickable"]
@@ -449,7 +478,7 @@ class SimServer:
             session["options"][clickable_key] = clickable_name
             session["actions"]["options"] += 1
 
-        # Set fields + url of page, then render page's HTML
+        # Set fields + url of page, then build the page
         product_info = self.product_item_dict[session["asin"]]
         keywords_url_string = "+".join(session["keywords"])
         option_string = json.dumps(session["options"])
@@ -460,7 +489,7 @@ class SimServer:
             f'{session["page"]}/{option_string}'
         )
 
-        html = map_action_to_html(
+        web_page = map_action_to_page(
             "click",
             session_id=session_id,
             product_info=product_info,
@@ -474,11 +503,11 @@ class SimServer:
             instruction_text=self.assigned_instruction_text,
             show_attrs=self.show_attrs,
         )
-        return html, url
+        return web_page, url
 
     @app.route("/", methods=["GET", "POST"])
     def item_sub_page(self, session_id, **kwargs):
-        """Render and return the HTML for a product's sub page (i.e.
+        """Build and return the page for a product's sub page (i.e.
 
         description, features)
         """
@@ -489,7 +518,7 @@ class SimServer:
                 clickable_name = k
                 break
 
-        # Set fields + url of page, then render page's HTML
+        # Set fields + url of page, then build the page
         product_info = self.product_item_dict[session["asin"]]
         session["actions"][clickable_name] += 1
         keywords_url_string = "+".join(session["keywords"])
@@ -498,7 +527,7 @@ class SimServer:
             f'{session["asin"]}/{keywords_url_string}/{session["page"]}/'
             f'{clickable_name}/{session["options"]}'
         )
-        html = map_action_to_html(
+        web_page = map_action_to_page(
             f"click[{clickable_name}]",
             session_id=session_id,
             product_info=product_info,
@@ -511,11 +540,11 @@ class SimServer:
             # This is used for rendering the page
             instruction_text=self.assigned_instruction_text,
         )
-        return html, url
+        return web_page, url
 
     @app.route("/", methods=["GET", "POST"])
     def done(self, session_id, **kwargs):
-        """Render and return HTML for done page"""
+        """Build and return the done page"""
         session = self.user_sessions[session_id]
         goal = self.user_sessions[session_id]["goal"]
         purchased_product = self.product_item_dict[session["asin"]]
@@ -539,7 +568,7 @@ class SimServer:
             f"{self.base_url}/done/{session_id}/"
             f'{session["asin"]}/{session["options"]}'
         )
-        html = map_action_to_html(
+        web_page = map_action_to_page(
             f"click[{END_BUTTON}]",
             session_id=session_id,
             reward=reward,
@@ -550,10 +579,14 @@ class SimServer:
             # This is used for rendering the page
             instruction_text=self.assigned_instruction_text,
         )
-        return html, url, reward
+        return web_page, url, reward
 
     def receive(self, session_id, current_url, session_int=None, **kwargs):
-        """Map action to the corresponding page"""
+        """Map action to the corresponding page
+
+        Returns the `Page` (its HTML is rendered when first read), the page's URL
+        and the reward/done status.
+        """
         status = dict(reward=0.0, done=False)
 
         with app.app_context(), app.test_request_context():
@@ -583,7 +616,7 @@ class SimServer:
             if not kwargs:
                 # If no action, reset the session variables
                 kwargs["instruction_text"] = instruction_text
-                html, url = self.index(session_id, **kwargs)
+                web_page, url = self.index(session_id, **kwargs)
                 self.user_sessions[session_id].update(
                     {
                         "keywords": None,
@@ -596,23 +629,23 @@ class SimServer:
                 )
             elif "keywords" in kwargs:
                 # If search keywords are available, run a search
-                html, url = self.search_results(session_id, **kwargs)
+                web_page, url = self.search_results(session_id, **kwargs)
             elif "clickable_name" in kwargs:
                 clickable_name = kwargs["clickable_name"].lower()
                 if clickable_name == END_BUTTON.lower():
                     # If "buy now" clicked, calculate reward and flag session as terminated
-                    html, url, reward = self.done(session_id, **kwargs)
+                    web_page, url, reward = self.done(session_id, **kwargs)
                     status["reward"] = reward
                     status["done"] = True
                 elif clickable_name == BACK_TO_SEARCH.lower():
                     # If "back to search" clicked, recursively reset the session back to search page
-                    html, url, status = self.receive(session_id, current_url)
+                    web_page, url, status = self.receive(session_id, current_url)
                 elif (
                     clickable_name == NEXT_PAGE.lower()
                     and self.get_page_name(current_url) == "search_results"
                 ):
                     # If "next page" clicked from search results, re-render with `page` enumerated
-                    html, url, status = self.receive(
+                    web_page, url, status = self.receive(
                         session_id,
                         current_url,
                         keywords=session["keywords"],
@@ -623,7 +656,7 @@ class SimServer:
                     and self.get_page_name(current_url) == "search_results"
                 ):
                     # If "prev page" clicked from search results, re-render with `page` denumerated
-                    html, url, status = self.receive(
+                    web_page, url, status = self.receive(
                         session_id,
                         current_url,
                         keywords=session["keywords"],
@@ -634,13 +667,13 @@ class SimServer:
                     and self.get_page_name(current_url) == "item_sub_page"
                 ):
                     # If "prev page" clicked from sub page, return to corresponding item page
-                    html, url = self.item_page(session_id, **kwargs)
+                    web_page, url = self.item_page(session_id, **kwargs)
                 elif (
                     clickable_name == PREV_PAGE.lower()
                     and self.get_page_name(current_url) == "item_page"
                 ):
                     # If "prev page" clicked from item page, return to search results page
-                    html, url = self.search_results(
+                    web_page, url = self.search_results(
                         session_id,
                         keywords=session["keywords"],
                         page=session["page"],
@@ -648,11 +681,11 @@ class SimServer:
                     )
                 elif clickable_name in [k.lower() for k in ACTION_TO_TEMPLATE]:
                     # Render item_sub_page if clickable is description, features, or reviews
-                    html, url = self.item_sub_page(session_id, **kwargs)
+                    web_page, url = self.item_sub_page(session_id, **kwargs)
                 else:
                     # Otherwise, render current item page
-                    html, url = self.item_page(session_id, **kwargs)
-            return html, url, status
+                    web_page, url = self.item_page(session_id, **kwargs)
+            return web_page, url, status
 
     def get_page_name(self, url):
         """Determine which page (i.e.
@@ -674,20 +707,25 @@ class SimBrowser:
     def __init__(self, server):
         self.server = server
         self.current_url = None
-        self.page_source = None
+        self.page = None
         self.session_id = None
 
+    @property
+    def page_source(self):
+        """HTML of the current page, rendered on first access"""
+        return None if self.page is None else self.page.html
+
     def get(self, url, session_id=None, session_int=None):
-        """Set browser variables to corresponding link, page HTML for URL"""
+        """Set browser variables to corresponding link, page for URL"""
         self.session_id = url.split("/")[-1] if session_id is None else session_id
-        self.page_source, _, _ = self.server.receive(
+        self.page, _, _ = self.server.receive(
             self.session_id, self.current_url, session_int=session_int
         )
         self.current_url = url
 
     def click(self, clickable_name, text_to_clickable):
         """Wrapper for `receive` handler for performing click action on current page"""
-        self.page_source, self.current_url, status = self.server.receive(
+        self.page, self.current_url, status = self.server.receive(
             self.session_id,
             current_url=self.current_url,
             clickable_name=clickable_name,
@@ -699,7 +737,7 @@ class SimBrowser:
         """Wrapper for `receive` handler for performing search action on current page"""
         if isinstance(keywords, str):
             keywords = keywords.split(" ")
-        self.page_source, self.current_url, status = self.server.receive(
+        self.page, self.current_url, status = self.server.receive(
             self.session_id,
             current_url=self.current_url,
             keywords=keywords,
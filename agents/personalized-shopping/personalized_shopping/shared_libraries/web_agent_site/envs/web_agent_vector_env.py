@@ -0,0 +1,126 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Batch of WebShop text environments sharing one simulated server."""
+
+from ..engine.engine import parse_action
+from ..utils import DEFAULT_FILE_PATH
+from .web_agent_text_env import WebAgentTextEnv
+
+
+class WebAgentVectorEnv:
+    """Steps `num_envs` WebShop sessions together
+
+    All sessions share one `SimServer`, and with it the product catalog, the
+    Lucene searcher and the goals, so memory does not grow with the batch
+    size. The search actions of a step are run as one batched search.
+    """
+
+    def __init__(
+        self,
+        num_envs,
+        observation_mode="text",
+        file_path=DEFAULT_FILE_PATH,
+        server=None,
+        search_threads=1,
+        **kwargs,
+    ):
+        """Constructor for vector environment
+
+        Arguments:
+
+        num_envs (`int`) -- Number of sessions stepped together
+        observation_mode, file_path, **kwargs -- As for `WebAgentTextEnv`
+        server (`SimServer`) -- Server to share; by default one is created
+        search_threads (`int`) -- Threads for the batched Lucene search
+        """
+        self.num_envs = num_envs
+        self.search_threads = search_threads
+        first = WebAgentTextEnv(
+            observation_mode=observation_mode,
+            file_path=file_path,
+            server=server,
+            **kwargs,
+        )
+        self.server = first.server
+        self.envs = [first] + [
+            WebAgentTextEnv(
+                observation_mode=observation_mode,
+                file_path=file_path,
+                server=self.server,
+                **kwargs,
+            )
+            for _ in range(num_envs - 1)
+        ]
+        # Session names are per server; keep environments that reset to the
+        # same goal index from sharing a session.
+        session_prefix = kwargs.get("session_prefix") or ""
+        for i, env in enumerate(self.envs):
+            env.session_prefix = f"{session_prefix}{i}_"
+
+    def reset(self, sessions=None, instruction_texts=None):
+        """Starts a new session in every environment; returns the observations
+
+        Arguments:
+
+        sessions (`list`) -- Per environment, a goal index (`int`), a session
+          name (`str`) or None for a random one
+        instruction_texts (`list`) -- Per environment, instruction override
+        """
+        sessions = sessions or [None] * self.num_envs
+        instruction_texts = instruction_texts or [None] * self.num_envs
+        return [
+            env.reset(session=session, instruction_text=instruction_text)[0]
+            for env, session, instruction_text in zip(
+                self.envs, sessions, instruction_texts
+            )
+        ]
+
+    def step(self, actions):
+        """Takes one action per environment
+
+        Returns lists of observations, rewards, done flags and infos, as
+        `WebAgentTextEnv.step` does for a single environment.
+        """
+        if len(actions) != self.num_envs:
+            raise ValueError(f"Expected {self.num_envs} actions, got {len(actions)}.")
+        self.server.prefetch_search_results(
+            [self._search_keywords(action) for action in actions],
+            threads=self.search_threads,
+        )
+        try:
+            results = [env.step(action) for env, action in zip(self.envs, actions)]
+        finally:
+            self.server.clear_prefetched_results()
+        observations, rewards, dones, infos = (list(x) for x in zip(*results))
+        return observations, rewards, dones, infos
+
+    def get_available_actions(self):
+        return [env.get_available_actions() for env in self.envs]
+
+    @property
+    def observations(self):
+        return [env.observation for env in self.envs]
+
+    @staticmethod
+    def _search_keywords(action):
+        # The keywords `WebAgentTextEnv.step` would search for, if any.
+        action_name, action_arg = parse_action(action)
+        if action_name == "search" and action_arg:
+            return action_arg.lower().split(" ")
+        return None
+
+    def close(self):
+        for env in self.envs:
+            env.close()
@@ -0,0 +1,134 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+
+import pytest
+
+from personalized_shopping.shared_libraries.web_agent_site.engine import (
+    catalog,
+    engine,
+    goal,
+)
+from personalized_shopping.shared_libraries.web_agent_site.envs.web_agent_text_env import (
+    SimServer,
+)
+
+COLORS = ["red", "blue", "green", "black"]
+TYPES = ["dress", "shirt", "hat", "shoes", "skirt"]
+
+
+def make_product(i):
+    return {
+        # Duplicate and invalid ASINs are skipped by `process_products`
+        "asin": "nan" if i == 7 else f"B{i % 58:09d}",
+        "category": "fashion",
+        "query": TYPES[i % 5],
+        "product_category": "Clothing › Women › Dresses",
+        "name": f"Floral {TYPES[i % 5]} {i % 5}",
+        "full_description": "A light cotton dress. " * (i % 3),
+        "small_description": ["Pockets"] if i % 2 else "Pockets",
+        "pricing": ["$19.99 - $29.99", "$4", None][i % 3],
+        "customization_options": {
+            "Color": [{"value": "Red/Blue", "image": "https://example.com/red.jpg"}]
+        }
+        if i % 2
+        else None,
+        "images": ["https://example.com/image.jpg"],
+        "brand": "Acme",
+    }
+
+
+def noun_tokens(name):
+    return name.lower().split()[1:2]
+
+
+@pytest.fixture
+def products_file(tmp_path, monkeypatch):
+    """A small product file with its attribute files; returns its path.
+
+    It has more than `SEARCH_RETURN_N` products, which a `<r>` search samples.
+    """
+    products = [make_product(i) for i in range(60)]
+    attributes = {
+        p["asin"]: {
+            "attributes": ["machine wash", f"size {i % 4}"],
+            "instruction": f"Find me a {COLORS[i % 4]} floral {TYPES[i % 5]}",
+            "instruction_attributes": ["machine wash"],
+        }
+        for i, p in enumerate(products)
+    }
+    filepath = tmp_path / "items.json"
+    filepath.write_text(json.dumps(products))
+    (tmp_path / "items_ins.json").write_text(json.dumps(attributes))
+    (tmp_path / "items_human_ins.json").write_text(json.dumps({}))
+    for module in (catalog, engine):
+        monkeypatch.setattr(module, "DEFAULT_ATTR_PATH", str(tmp_path / "items_ins.json"))
+        monkeypatch.setattr(module, "HUMAN_ATTR_PATH", str(tmp_path / "items_human_ins.json"))
+    # Noun tokens without loading a spaCy model
+    monkeypatch.setattr(goal, "get_noun_tokens", noun_tokens)
+    monkeypatch.setattr(
+        goal, "get_noun_tokens_batch", lambda names: [noun_tokens(name) for name in names]
+    )
+    return str(filepath)
+
+
+class Hit:
+    def __init__(self, docid):
+        self.docid = docid
+
+
+class Doc:
+    def __init__(self, docid):
+        self.docid = docid
+
+    def raw(self):
+        return json.dumps({"id": self.docid})
+
+
+class StubSearcher:
+    """Stands in for the Lucene searcher: ranks products by shared title words."""
+
+    def __init__(self, products):
+        self.products = products
+        self.calls = {"search": 0, "batch_search": 0}
+
+    def _hits(self, query, k):
+        words = set(query.lower().split())
+        scored = [
+            (-len(words & set(p["Title"].lower().split())), p["asin"])
+            for p in self.products
+        ]
+        return [Hit(asin) for score, asin in sorted(scored) if score < 0][:k]
+
+    def search(self, query, k):
+        self.calls["search"] += 1
+        return self._hits(query, k)
+
+    def batch_search(self, queries, qids, k, threads):
+        self.calls["batch_search"] += 1
+        return {qid: self._hits(query, k) for query, qid in zip(queries, qids)}
+
+    def doc(self, docid):
+        return Doc(docid)
+
+
+@pytest.fixture
+def server(products_file):
+    """A SimServer over `products_file`, searching with a `StubSearcher`."""
+    server = SimServer(
+        "http://127.0.0.1:3000", products_file, load_search_engine=False
+    )
+    server.search_engine = StubSearcher(server.all_products)
+    return server
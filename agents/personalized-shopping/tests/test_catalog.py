@@ -0,0 +1,78 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import os
+import random
+
+import pytest
+
+from personalized_shopping.shared_libraries.web_agent_site.engine import (
+    catalog,
+    engine,
+    goal,
+)
+
+
+def load(filepath, num_products=None, use_catalog=True):
+    random.seed(0)
+    return engine.load_products(
+        filepath, num_products, human_goals=False, use_catalog=use_catalog
+    )
+
+
+@pytest.mark.parametrize("num_products", [None, 10])
+def test_catalog_same_as_processing_products(products_file, num_products):
+    expected = load(products_file, num_products, use_catalog=False)
+    catalog.build_catalog(products_file, human_goals=False)
+    products, item_dict, prices, attribute_to_asins = load(products_file, num_products)
+
+    assert isinstance(products, catalog.CatalogProducts)
+    rows = [dict(p) for p in products]
+    assert [p.pop("name_nouns") for p in rows] == [goal.get_noun_tokens(p["name"]) for p in rows]
+    assert rows == expected[0]
+    assert {asin: dict(p) for asin, p in item_dict.items()} == {
+        asin: dict(p, name_nouns=goal.get_noun_tokens(p["name"]))
+        for asin, p in expected[1].items()
+    }
+    assert prices == expected[2]
+    assert dict(attribute_to_asins) == dict(expected[3])
+
+
+def test_open_catalog_missing_or_stale(products_file):
+    assert catalog.open_catalog(products_file) is None
+    catalog.build_catalog(products_file, human_goals=False)
+    assert catalog.open_catalog(products_file) is not None
+    assert catalog.open_catalog(products_file, human_goals=True) is None
+
+    os.utime(products_file, ns=(0, 0))
+    assert catalog.open_catalog(products_file) is None
+
+
+@pytest.mark.parametrize("name", ["meta.json", "core.bin", "detail_offsets.npy", "asins.npy"])
+def test_open_catalog_half_written(products_file, name):
+    path = catalog.build_catalog(products_file, human_goals=False)
+    with open(os.path.join(path, name), "r+b") as f:
+        f.truncate(os.path.getsize(f.name) // 2)
+    assert catalog.open_catalog(products_file) is None
+    assert not isinstance(load(products_file)[0], catalog.CatalogProducts)
+
+
+def test_empty_catalog(products_file):
+    with open(products_file, "w") as f:
+        json.dump([], f)
+    catalog.build_catalog(products_file, human_goals=False)
+    opened = catalog.open_catalog(products_file)
+    assert opened is not None
+    assert [len(x) for x in opened.load()] == [0, 0, 0, 0]
@@ -0,0 +1,157 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import random
+
+from bs4 import BeautifulSoup
+import pytest
+
+from personalized_shopping.shared_libraries.web_agent_site.engine.engine import (
+    ACTION_TO_TEMPLATE,
+    END_BUTTON,
+    map_action_to_html,
+)
+from personalized_shopping.shared_libraries.web_agent_site.engine.page import (
+    map_action_to_page,
+)
+from personalized_shopping.shared_libraries.web_agent_site.envs.web_agent_text_env import (
+    WebAgentTextEnv,
+    app,
+)
+
+# Whitespace, entities, markup and separators, which the HTML parser treats
+# specially
+PIECES = [
+    "a", "Dress", " ", "  ", "\n", " \n ", "\t", "\r\n", "&", "&amp;", "<b>",
+    "'", '"', "é", "\xa0", "x y", "", "10.5", "[SEP]",
+]
+PAGE_TYPES = ["start", "search", "item", *ACTION_TO_TEMPLATE, END_BUTTON]
+
+
+def random_text(rng):
+    return "".join(rng.choice(PIECES) for _ in range(rng.randint(0, 4)))
+
+
+def random_value(rng):
+    r = rng.random()
+    if r < 0.05:
+        return None
+    if r < 0.1:
+        return rng.randint(0, 5)
+    return random_text(rng)
+
+
+def random_product(rng, i):
+    return {
+        "asin": f"B{i:09d}" if rng.random() < 0.9 else random_text(rng) or "X",
+        "Title": random_value(rng),
+        "Price": random_value(rng),
+        "Rating": random_value(rng),
+        "MainImage": random_text(rng),
+        "Description": random_value(rng),
+        "BulletPoints": [random_value(rng) for _ in range(rng.randint(0, 3))],
+        "Reviews": [
+            {"title": random_value(rng), "score": rng.randint(0, 5), "body": random_value(rng)}
+            for _ in range(rng.randint(0, 2))
+        ],
+        "Attributes": [random_value(rng) for _ in range(rng.randint(0, 3))],
+        "options": {
+            random_text(rng) or "color": [
+                random_text(rng) or "red" for _ in range(rng.randint(0, 3))
+            ]
+            for _ in range(rng.randint(0, 2))
+        },
+        "option_to_image": {},
+        "category": random_value(rng),
+        "query": random_value(rng),
+        "product_category": random_value(rng),
+    }
+
+
+def random_page(rng, page_type):
+    """(action, kwargs) of a page of the given type with fuzzed data."""
+    products = [random_product(rng, i) for i in range(rng.randint(0, 4))]
+    product = products[0] if products else random_product(rng, 0)
+    common = dict(session_id="fixed_0", instruction_text=random_value(rng))
+    item = dict(
+        common,
+        product_info=product,
+        keywords=["a"],
+        page=rng.randint(1, 3),
+        asin=product["asin"],
+        options={"color": "red"},
+    )
+    if page_type == "start":
+        return "start", common
+    if page_type == "search":
+        return "search[a]", dict(
+            common,
+            products=products,
+            keywords=["a"],
+            page=rng.randint(1, 3),
+            total=rng.randint(0, 50),
+        )
+    if page_type == "item":
+        return "click[a]", dict(item, show_attrs=rng.random() < 0.5)
+    if page_type in ACTION_TO_TEMPLATE:
+        return f"click[{page_type}]", item
+    goal_keys = ["asin", "goal_options", "attributes", "price_upper", "instruction_text", "category"]
+    goal = {key: random_value(rng) for key in goal_keys if rng.random() < 0.8}
+    return f"click[{END_BUTTON}]", dict(
+        common,
+        reward=rng.random(),
+        asin=product["asin"],
+        options={"color": random_value(rng)},
+        goal=None if rng.random() < 0.3 else goal,
+        reward_info=None if rng.random() < 0.5 else {"r_att": 1.0},
+        purchased_attrs=random_value(rng),
+        category=random_value(rng),
+    )
+
+
+def parsed_clickables(soup):
+    """Clickables as `get_available_actions` used to read them from the HTML."""
+    clickables = {
+        f"{b.get_text()}".lower(): b
+        for b in soup.find_all(class_="btn") + soup.find_all(class_="product-link")
+    }
+    for option in soup.select('input[type="radio"]'):
+        clickables[f"{option.get('value')}"] = option
+    return clickables
+
+
+@pytest.mark.parametrize("page_type", PAGE_TYPES)
+def test_page_same_as_parsed_html(page_type):
+    env = WebAgentTextEnv.__new__(WebAgentTextEnv)
+    rng = random.Random(page_type)
+    with app.app_context(), app.test_request_context():
+        for _ in range(100):
+            action, kwargs = random_page(rng, page_type)
+            html = map_action_to_html(action, **dict(kwargs))
+            page = map_action_to_page(action, **dict(kwargs))
+            soup = BeautifulSoup(html, "html.parser")
+
+            assert page.text() == env.convert_html_to_text(html, simple=True)
+            assert page.has_search_bar == (soup.find(id="search_input") is not None)
+            clickables = parsed_clickables(soup)
+            assert list(page.clickables) == list(clickables)
+            # SimServer reads the first class and the name of a clickable
+            for key, tag in clickables.items():
+                assert page.clickables[key].get("class", [])[:1] == tag.get("class", [])[:1]
+                assert page.clickables[key].get("name") == tag.get("name")
+            instruction = soup.find(id="instruction-text")
+            assert page.instruction_text == (instruction.h4.text if instruction else None)
+            image = soup.find(id="product-image")
+            assert page.image_url == (image["src"] if image else None)
+            assert page.html == html
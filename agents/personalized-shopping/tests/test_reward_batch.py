@@ -0,0 +1,80 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import random
+
+from personalized_shopping.shared_libraries.web_agent_site.engine.goal import (
+    fuzzy_match,
+    get_fuzzy_matcher,
+    get_reward,
+    get_reward_batch,
+)
+
+WORDS = [
+    "cotton", "cottons", "machine", "wash", "washable", "long", "sleeve",
+    "short", "sleeves", "slim", "fit", "high", "waist", "waisted", "red",
+    "navy", "blue", "black", "small", "medium", "x-large", "pack", "of", "2",
+]
+
+
+def random_phrase(rng):
+    return " ".join(rng.choices(WORDS, k=rng.randint(1, 5)))
+
+
+def random_purchase(rng):
+    """(purchased_product, goal, price, options) with overlapping phrases."""
+    phrases = [random_phrase(rng) for _ in range(8)]
+    product = {
+        "Attributes": rng.sample(phrases, rng.randint(0, 5)),
+        "Title": random_phrase(rng),
+        "BulletPoints": [random_phrase(rng)],
+        "Description": random_phrase(rng),
+        "name": "cotton shirt",
+        "name_nouns": ["cotton", "shirt"],
+        "query": "shirt",
+        "product_category": "Clothing › Men › Shirts",
+    }
+    goal_options = {f"option{i}": rng.choice(phrases) for i in range(rng.randint(0, 3))}
+    if rng.random() < 0.5:
+        goal_options = list(goal_options.values())
+    goal = {
+        "attributes": rng.sample(phrases, rng.randint(1, 4)),
+        "goal_options": goal_options,
+        "price_upper": rng.choice([30.0, 1000000]),
+        "name": "cotton shirt",
+        "name_nouns": ["shirt"],
+        "query": rng.choice(["shirt", "dress"]),
+        "product_category": "Clothing › Men › Pants",
+    }
+    options = {f"option{i}": rng.choice(phrases) for i in range(rng.randint(0, 3))}
+    return product, goal, rng.uniform(10, 50), options
+
+
+def test_fuzzy_matcher_same_as_fuzzy_match():
+    rng = random.Random(0)
+    pairs = [(random_phrase(rng), random_phrase(rng)) for _ in range(2000)]
+    pairs += [("machine wash", "machine wash"), ("", ""), (None, "red"), ("Red", "red")]
+    # Scores of exactly 85.0 and 85.5, either side of the rounded threshold
+    pairs += [("a" * 20, "a" * 17 + "b" * 3), ("a" * 200, "a" * 171 + "b" * 29)]
+    match = get_fuzzy_matcher(pairs)
+    for s1, s2 in pairs:
+        assert match(s1, s2) == fuzzy_match(s1, s2), (s1, s2)
+
+
+def test_reward_batch_same_as_get_reward():
+    rng = random.Random(0)
+    purchases = [random_purchase(rng) for _ in range(500)]
+    expected = [get_reward(*purchase, verbose=True) for purchase in purchases]
+    assert get_reward_batch(purchases, verbose=True) == expected
+    assert get_reward_batch(purchases, workers=2) == [reward for reward, _ in expected]
@@ -0,0 +1,54 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import random
+
+import pytest
+
+from personalized_shopping.shared_libraries.web_agent_site.envs.web_agent_rollouts import (
+    RolloutRunner,
+)
+
+
+def random_policy(env):
+    available = env.get_available_actions()
+    if available["has_search_bar"]:
+        words = env.instruction_text.lower().split()[3:6]
+        return f"search[{' '.join(random.sample(words, min(2, len(words))))}]"
+    clickables = [c for c in available["clickables"] if c != "search"]
+    return f"click[{random.choice(clickables)}]"
+
+
+@pytest.fixture
+def rollout_server(server, monkeypatch):
+    """`server` with its searcher opened on first use, as in a worker."""
+    searcher, server.search_engine = server.search_engine, None
+    monkeypatch.setattr(
+        server, "init_search_engine", lambda: setattr(server, "search_engine", searcher)
+    )
+    return server
+
+
+def test_workers_same_as_in_process(rollout_server):
+    session_ints = list(range(len(rollout_server.goals))) * 2
+    in_process = RolloutRunner(random_policy, 0, server=rollout_server, max_steps=20)
+    expected = in_process.run(session_ints)
+    # Only the episodes' sessions were started, and each one was dropped
+    assert rollout_server.user_sessions == {}
+    assert any(result["done"] for result in expected)
+
+    rollout_server.search_engine = None
+    forked = RolloutRunner(random_policy, 2, server=rollout_server, max_steps=20)
+    assert forked.run(session_ints, chunksize=3) == expected
+
@@ -0,0 +1,100 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import random
+
+import pytest
+
+from personalized_shopping.shared_libraries.web_agent_site.envs.web_agent_vector_env import (
+    WebAgentVectorEnv,
+)
+
+NUM_ENVS = 6
+
+
+def choose_action(env, rng):
+    """Searches (sometimes the same words as another session, or with a
+    `<r>`, `<c>` or `<q>` prefix), otherwise clicks a random clickable."""
+    available = env.get_available_actions()
+    if available["has_search_bar"]:
+        words = env.instruction_text.lower().split()[3:6]
+        keywords = rng.choice(
+            [
+                " ".join(rng.sample(words, min(2, len(words)))),
+                "floral dress",
+                "<r>",
+                "<c> fashion",
+                "<q> shirt",
+            ]
+        )
+        return f"search[{keywords}]"
+    clickables = [c for c in available["clickables"] if c != "search"]
+    return f"click[{rng.choice(clickables)}]"
+
+
+def trace(server, batched, steps=30):
+    """Observations, rewards and dones of seeded sessions stepped together."""
+    # A new session draws a goal from `random`; start both runs with none
+    server.user_sessions.clear()
+    rng = random.Random(0)
+    random.seed(0)
+    vector_env = WebAgentVectorEnv(NUM_ENVS, server=server)
+    vector_env.reset(sessions=list(range(NUM_ENVS)))
+    results = []
+    for _ in range(steps):
+        actions = [choose_action(env, rng) for env in vector_env.envs]
+        if batched:
+            observations, rewards, dones, _ = vector_env.step(actions)
+        else:
+            observations, rewards, dones, _ = (
+                list(x)
+                for x in zip(*[env.step(a) for env, a in zip(vector_env.envs, actions)])
+            )
+        results.append((actions, observations, rewards, dones))
+        assert server.prefetched_results == {}
+        for env, done in zip(vector_env.envs, dones):
+            if done:
+                env.reset(session=rng.randrange(len(server.goals)))
+    return results
+
+
+def test_batched_step_same_as_looped(server):
+    calls = server.search_engine.calls
+    looped = trace(server, batched=False)
+    looped_searches = calls["search"]
+    batched = trace(server, batched=True)
+    assert batched == looped
+    # Only page turns, not search actions, still search one query at a time
+    assert calls["search"] - looped_searches < looped_searches
+    assert calls["batch_search"] > 0
+    assert any(any(dones) for _, _, _, dones in looped)
+
+
+def test_repeated_keywords_searched_once(server):
+    vector_env = WebAgentVectorEnv(3, server=server)
+    vector_env.reset(sessions=[0, 1, 2])
+    observations, _, _, _ = vector_env.step(
+        ["search[floral dress]", "search[floral dress]", "search[red shirt]"]
+    )
+    assert observations[0] == observations[1] != observations[2]
+    assert server.search_engine.calls == {"search": 0, "batch_search": 1}
+
+
+def test_prefetched_results_cleared_when_an_env_raises(server):
+    vector_env = WebAgentVectorEnv(2, server=server)
+    vector_env.reset(sessions=[0, 1])
+    # SimServer has no attribute index, so an `<a>` search fails
+    with pytest.raises(TypeError):
+        vector_env.step(["search[floral dress]", "search[<a> machine wash]"])
+    assert server.prefetched_results == {}